@@ -1,35 +1,21 @@
 import streamlit as st
 from grok_search import GrokContractorSearch
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from validators import is_valid_email
+from result_cache import SearchCache, ScoreCache, ReviewCache, normalize_search_key
+from contractor_store import ContractorStore, BackgroundRefresher
+from email_outbox import EmailOutbox
+from email_templates import quote_context, build_quote_message, build_digest_message
+from session_store import SessionResultStore
+from santo_score import DEFAULT_WEIGHTS
+from entity_resolution import normalize_business_name, normalize_phone
 import os
 from dotenv import load_dotenv
 import time
 import re
-from urllib.parse import urlparse
 
 # Load environment variables
 load_dotenv()
 
-# Persistent notification bar logic
-if 'show_email_notification' not in st.session_state:
-    st.session_state['show_email_notification'] = False
-if 'email_notification_time' not in st.session_state:
-    st.session_state['email_notification_time'] = 0
-
-# Show persistent notification bar if needed
-if st.session_state.get('show_email_notification', False):
-    st.markdown('''
-    <div style="position:fixed;top:80px;right:20px;z-index:9999;background:#28a745;color:white;padding:16px 32px;border-radius:8px;box-shadow:0 2px 8px rgba(0,0,0,0.15);font-size:1.1em;">
-        ✅ Email sent successfully!
-    </div>
-    ''', unsafe_allow_html=True)
-    # If 4 seconds have passed, hide the notification and rerun
-    if time.time() - st.session_state['email_notification_time'] > 4:
-        st.session_state['show_email_notification'] = False
-        st.experimental_rerun()
-
 # Set page config
 st.set_page_config(
    page_title="SantoScore v0.2",
@@ -38,219 +24,417 @@ st.set_page_config(
 )
 
 # Initialize session state
-if 'search_results' not in st.session_state:
-   st.session_state.search_results = None
 if 'search_params' not in st.session_state:
    st.session_state.search_params = None
+if 'refresh_key' not in st.session_state:
+   st.session_state.refresh_key = None
 
 # Initialize Grok search
 @st.cache_resource
 def get_grok_search():
-    return GrokContractorSearch()
+    return GrokContractorSearch(cache=SearchCache(), score_cache=ScoreCache(), store=ContractorStore(), review_cache=ReviewCache())
+
+# Background Grok refreshes behind instant answers from the contractor store
+@st.cache_resource
+def get_refresher():
+    return BackgroundRefresher()
+
+# Search results of every session, bounded in memory and kept on disk (see session_store.py)
+@st.cache_resource
+def get_result_store():
+    return SessionResultStore()
 
 grok_search = get_grok_search()
+refresher = get_refresher()
+result_store = get_result_store()
+
+# Sessions only keep a handle to their results, also put in the page URL so a
+# reload (or a server restart) brings the results back
+if 'results_handle' not in st.session_state:
+   st.session_state.results_handle = st.query_params.get("results")
+   if st.session_state.results_handle:
+      st.session_state.search_params = result_store.get_params(st.session_state.results_handle)
 
 # Email configuration
 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 SENDER_PASSWORD = os.getenv("SENDER_PASSWORD")
+SALES_EMAIL = "sales@santoelectronics.com"
+
+# Contractor cards per results page (the page size can also be changed above the results)
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", 5))
+PAGE_SIZE_OPTIONS = sorted({5, 10, 20, RESULTS_PAGE_SIZE})
+# Contractors requested by "Load more" (only the missing ones are fetched, see GrokContractorSearch.search_more)
+MORE_RESULTS_STEP = int(os.getenv("MORE_RESULTS_STEP", 5))
+# Seconds "Show reviews" waits for a review prefetch that is still running
+REVIEW_PREFETCH_WAIT = float(os.getenv("REVIEW_PREFETCH_WAIT", 60))
+# Re-rank sliders, one per SantoScore component
+WEIGHT_LABELS = {
+    "rating": "Overall rating",
+    "reviews": "Review ratings",
+    "sentiment": "Review sentiment",
+    "volume": "Number of reviews",
+    "license": "License",
+    "contact": "Contact details",
+}
 
 # Add validation to ensure credentials are loaded
 if not SENDER_EMAIL or not SENDER_PASSWORD:
     st.error("Email credentials not found. Please check your .env file.")
     st.stop()
 
-# Validation functions
+# Quote emails are queued and sent by a background worker over one SMTP connection.
+# With OUTBOX_DIGEST_WINDOW=<seconds> sales gets one digest email per window instead.
+@st.cache_resource
+def get_outbox():
+    return EmailOutbox(
+        smtp_server=SMTP_SERVER,
+        smtp_port=SMTP_PORT,
+        sender_email=SENDER_EMAIL,
+        sender_password=SENDER_PASSWORD,
+        digest_builder=lambda digest, contexts: build_digest_message(SENDER_EMAIL, [digest], contexts)
+    ).start()
 
-def is_valid_email(email):
-    if not email:
-        return False
-    pattern = r"^[\w\.-]+@[\w\.-]+\.\w{2,}$"
-    return re.match(pattern, email) is not None
-
-def is_valid_website(url):
-    if not url:
-        return False
-    try:
-        result = urlparse(url)
-        return all([result.scheme in ("http", "https"), result.netloc])
-    except Exception:
-        return False
-
-def is_valid_phone(phone):
-    if not phone:
-        return False
-    # Accepts (123) 456-7890, 123-456-7890, 1234567890, +1 123 456 7890, etc.
-    pattern = r"^(\+\d{1,3}[- ]?)?(\(?\d{3}\)?[- ]?)?\d{3}[- ]?\d{4}$"
-    return re.match(pattern, phone) is not None
-
-# Enhanced website validation function
-def is_website_safe_for_display(url):
-    """Additional validation for displaying websites to users"""
-    if not url or not url.strip():
-        return False, "No website provided"
-    
-    # Use the same validation as in grok_search.py
-    from grok_search import validate_website_safety
-    return validate_website_safety(url)
+outbox = get_outbox()
 
 # Function to send email
 def send_quote_request(contractor_name, contractor_email, user_email, problem_statement, send_to_business, contractor_details=None, search_params=None):
     try:
-        # --- Main email to sales@santoelectronics.com (unchanged) ---
-        msg = MIMEMultipart('alternative')
-        msg['From'] = SENDER_EMAIL
-        msg['Subject'] = f"🔧 Quote Request for {contractor_name} - SantoScore"
-        # Create HTML email body with all business details
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
-                <h2 style="color: #007bff; text-align: center; border-bottom: 3px solid #007bff; padding-bottom: 10px;">
-                    🔧 New Quote Request via SantoScore
-                </h2>
-                
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <h3 style="color: #28a745; margin-top: 0;">📋 Contractor Information</h3>
-                    <p><strong>Business Name:</strong> {contractor_name}</p>
-                    {f'<p><strong>Phone:</strong> {contractor_details.phone}</p>' if contractor_details and contractor_details.phone else ''}
-                    {f'<p><strong>Email:</strong> {contractor_details.email}</p>' if contractor_details and contractor_details.email else ''}
-                    {f'<p><strong>Website:</strong> <a href="{contractor_details.website}" target="_blank">{contractor_details.website}</a></p>' if contractor_details and contractor_details.website else ''}
-                    {f'<p><strong>Address:</strong> {contractor_details.address}</p>' if contractor_details and contractor_details.address else ''}
-                    {f'<p><strong>License Status:</strong> <span style="color: #28a745; font-weight: bold;">{contractor_details.license_status}</span></p>' if contractor_details and contractor_details.license_status else ''}
-                    {f'<p><strong>Services Offered:</strong> {contractor_details.services}</p>' if contractor_details and contractor_details.services else ''}
-                    {f'<p><strong>Quality Score:</strong> <span style="color: #007bff; font-weight: bold; font-size: 1.1em;">{contractor_details.quality_score:.1f}/10</span></p>' if contractor_details and hasattr(contractor_details, 'quality_score') else ''}
-                    {f'<p><strong>Overall Rating:</strong> <span style="color: #ffc107; font-weight: bold;">{contractor_details.rating}</span></p>' if contractor_details and contractor_details.rating else ''}
-                    {f'<p style="color: #dc3545; font-weight: bold;">Note: This business could not be emailed directly as no business email was found.</p>' if not contractor_email else ''}
-                </div>
-                
-                {f'''
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <h3 style="color: #17a2b8; margin-top: 0;">🔍 Search Details</h3>
-                    <div style="display: flex; justify-content: space-between; flex-wrap: wrap; gap: 15px;">
-                        <div style="flex: 1; min-width: 150px;">
-                            <p style="margin: 0;"><strong>Service Type:</strong></p>
-                            <p style="background-color: #e3f2fd; padding: 8px; border-radius: 5px; margin: 5px 0; color: #1565c0; font-weight: bold;">{search_params.get('service_type', 'N/A')}</p>
-                        </div>
-                        <div style="flex: 1; min-width: 150px;">
-                            <p style="margin: 0;"><strong>Location:</strong></p>
-                            <p style="background-color: #e8f5e8; padding: 8px; border-radius: 5px; margin: 5px 0; color: #2e7d32; font-weight: bold;">{search_params.get('location', 'N/A')}</p>
-                        </div>
-                        <div style="flex: 1; min-width: 150px;">
-                            <p style="margin: 0;"><strong>Results Found:</strong></p>
-                            <p style="background-color: #fff3e0; padding: 8px; border-radius: 5px; margin: 5px 0; color: #ef6c00; font-weight: bold;">{search_params.get('actual_results', search_params.get('max_results', 'N/A'))} contractors</p>
-                        </div>
-                    </div>
-                    <div style="margin-top: 15px; text-align: center;">
-                        <p style="margin: 0; color: #666; font-size: 0.9em;">
-                            <strong>Search performed on:</strong> {search_params.get('search_timestamp', 'N/A')}
-                        </p>
-                    </div>
-                </div>
-                ''' if search_params else ''}
-                
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <h3 style="color: #dc3545; margin-top: 0;">👤 Customer Information</h3>
-                    <p><strong>Customer Email:</strong> <a href="mailto:{user_email}">{user_email}</a></p>
-                    <p><strong>Service Request:</strong></p>
-                    <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; border-radius: 4px; margin: 10px 0;">
-                        <em>"{problem_statement}"</em>
-                    </div>
-                </div>
-                
-                {f'''
-                <div style="background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <h3 style="color: #6f42c1; margin-top: 0;">📝 Business Description</h3>
-                    <p>{contractor_details.description}</p>
-                </div>
-                ''' if contractor_details and contractor_details.description else ''}
-                
-                <div style="background-color: #e9ecef; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                    <p style="margin: 0;"><strong>Quote Request Settings:</strong></p>
-                    <p style="margin: 5px 0; color: {'#28a745' if send_to_business else '#dc3545'};">
-                        Send to Business: <strong>{'✅ Yes' if send_to_business else '❌ No'}</strong>
-                    </p>
-                </div>
-                
-                <div style="text-align: center; margin-top: 30px;">
-                    <p style="background-color: #007bff; color: white; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                        <strong>Please follow up with this customer regarding their service needs.</strong>
-                    </p>
-                    <p style="font-size: 0.9em; color: #666;">
-                        This quote request was generated via <strong>SantoScore</strong> - Your trusted contractor search platform
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        # Create plain text version as fallback
-        text_body = f"""
-        New Quote Request via SantoScore
-        ================================
-        
-        CONTRACTOR INFORMATION:
-        -----------------------
-        Business Name: {contractor_name}
-        {"Phone: " + contractor_details.phone if contractor_details and contractor_details.phone else ""}
-        {"Email: " + contractor_details.email if contractor_details and contractor_details.email else ""}
-        {"Website: " + contractor_details.website if contractor_details and contractor_details.website else ""}
-        {"Address: " + contractor_details.address if contractor_details and contractor_details.address else ""}
-        {"License Status: " + contractor_details.license_status if contractor_details and contractor_details.license_status else ""}
-        {"Services: " + contractor_details.services if contractor_details and contractor_details.services else ""}
-        {"Quality Score: " + str(contractor_details.quality_score) + "/10" if contractor_details and hasattr(contractor_details, 'quality_score') else ""}
-        {"Overall Rating: " + contractor_details.rating if contractor_details and contractor_details.rating else ""}
-        {"NOTE: This business could not be emailed directly as no business email was found." if not contractor_email else ""}
-        
-        {f'''
-        SEARCH DETAILS:
-        ---------------
-        Service Type: {search_params.get('service_type', 'N/A')}
-        Location: {search_params.get('location', 'N/A')}
-        Results Found: {search_params.get('actual_results', search_params.get('max_results', 'N/A'))} contractors
-        Search performed on: {search_params.get('search_timestamp', 'N/A')}
-        
-        ''' if search_params else ''}
-        
-        CUSTOMER INFORMATION:
-        ---------------------
-        Customer Email: {user_email}
-        Service Request: {problem_statement}
-        
-        {"BUSINESS DESCRIPTION:" if contractor_details and contractor_details.description else ""}
-        {"--------------------" if contractor_details and contractor_details.description else ""}
-        {contractor_details.description if contractor_details and contractor_details.description else ""}
-        
-        QUOTE REQUEST SETTINGS:
-        -----------------------
-        Send to Business: {'Yes' if send_to_business else 'No'}
-        
-        Please follow up with this customer regarding their service needs.
-        
-        This quote request was generated via SantoScore - Your trusted contractor search platform
-        """
-        # Attach both HTML and plain text versions
-        msg.attach(MIMEText(text_body, 'plain'))
-        msg.attach(MIMEText(html_body, 'html'))
+        # --- Main email to sales@santoelectronics.com, rendered from the precompiled templates in email_templates.py ---
+        context = quote_context(contractor_name, contractor_email, user_email, problem_statement, send_to_business, contractor_details, search_params)
         # Determine recipients
-        recipients = ["sales@santoelectronics.com"]
+        recipients = [SALES_EMAIL]
         # Do not send to contractor email for now, even if send_to_business is True
         # if send_to_business and contractor_email:
         #     recipients.append(contractor_email)
-        msg['To'] = ', '.join(recipients)
-        # --- Send main email to sales only ---
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.send_message(msg)
+        if outbox.digest_window > 0:
+            # Digest mode: sales gets one email listing every request of the window
+            if not outbox.add_to_digest(SALES_EMAIL, context):
+                return False, "Error sending quote request: it could not be queued"
+            st.session_state['last_quote_id'] = None
+            return True, "Quote request sent successfully!"
+        # --- Queue main email to sales only (sent in the background, see email_outbox.py) ---
+        message_id = outbox.enqueue(build_quote_message(SENDER_EMAIL, recipients, context), recipients)
+        if message_id is None:
+            return False, "Error sending quote request: it could not be queued"
+        st.session_state['last_quote_id'] = message_id
         # --- Do NOT send a separate email to the business (feature disabled for now) ---
         # (business email logic is fully commented out)
         return True, "Quote request sent successfully!"
     except Exception as e:
         return False, f"Error sending quote request: {str(e)}"
 
+# Contact details shown on the cards use the validation flags computed when the contractor was parsed (see models.py)
+def prepare_display(contractors, scores):
+    """Precompute the contact details, shown score and score class of every contractor card"""
+    lazy_reviews = (st.session_state.get('search_params') or {}).get('lazy_reviews', False)
+    display = []
+    for contractor, score in zip(contractors, scores):
+        email_valid = contractor.email_valid
+        if contractor.website_safe:
+            website = contractor.website
+        else:
+            website = "N/A"
+        # Quality score color coding
+        if score >= 8:
+            score_class = "score-high"
+        elif score >= 6:
+            score_class = "score-medium"
+        else:
+            score_class = "score-low"
+        display.append({
+            'phone': contractor.phone if contractor.phone_valid else "N/A",
+            'email': contractor.email if email_valid else "N/A",
+            'email_valid': email_valid,
+            'website': website,
+            'score': float(score),
+            'score_class': score_class,
+            # Reviews of lazy review searches are fetched when the card first needs them
+            'lazy_reviews': lazy_reviews,
+        })
+    return display
+
+# Per-card keys (suffixed with the card number) of the previous results; the
+# non-widget ones would otherwise stay in the session forever
+CARD_STATE_PATTERN = re.compile(r'^(show_quote_form|quote_error|show_reviews|email|problem|send_business)_\d+$')
+
+def clear_card_state():
+    for key in [key for key in st.session_state if CARD_STATE_PATTERN.match(str(key))]:
+        del st.session_state[key]
+
+def set_search_results(contractors):
+    """Replace the session's results in the shared result store, keeping only their handle"""
+    clear_card_state()
+    if st.session_state.get('results_handle'):
+        result_store.discard(st.session_state.results_handle)
+        # Review prefetches nobody opened would otherwise be kept until they expire
+        refresher.discard(review_job_prefix(st.session_state.results_handle))
+    handle = result_store.put(contractors, st.session_state.get('search_params'))
+    st.session_state.results_handle = handle
+    st.query_params["results"] = handle
+    st.session_state.results_page = 0
+
+def get_search_results():
+    """Return the session's results, or None before the first search (or once they have expired)"""
+    handle = st.session_state.get('results_handle')
+    if not handle:
+        return None
+    contractors = result_store.get(handle)
+    if contractors is None:
+        st.session_state.results_handle = None
+        st.query_params.pop("results", None)
+    return contractors
+
+def set_results_page(page):
+    st.session_state.results_page = page
+
+def reset_results_view():
+    """Filters and weights renumber the cards, so per-card state and the page start over"""
+    clear_card_state()
+    st.session_state.results_page = 0
+
+def results_view(result_set):
+    """Indices of the contractors to show (filtered, best first) and the scores they are ranked by"""
+    keep = result_set.mask(
+        licensed_only=st.session_state.get('filter_licensed', False),
+        min_rating=st.session_state.get('filter_min_rating', 0.0),
+        require_email=st.session_state.get('filter_email', False),
+        require_phone=st.session_state.get('filter_phone', False)
+    )
+    scores = result_set.score
+    if st.session_state.get('rerank', False):
+        scores = result_set.rerank({name: st.session_state.get(f"weight_{name}", weight) for name, weight in DEFAULT_WEIGHTS.items()})
+    return result_set.select(keep, scores), scores
+
+def load_more_results():
+    """Grow the results by MORE_RESULTS_STEP contractors, fetching only the ones not shown yet"""
+    result_set = get_search_results()
+    params = dict(st.session_state.get('search_params') or {})
+    if not result_set or not params.get('service_type'):
+        return
+    max_results = len(result_set) + MORE_RESULTS_STEP
+    errors = []
+    def report_error(message, status_type="info"):
+        if status_type == "error":
+            errors.append(message)
+    with st.spinner(f"Searching for {MORE_RESULTS_STEP} more contractors..."):
+        contractors = grok_search.search_more(
+            list(result_set),
+            params['service_type'],
+            params.get('location', ''),
+            max_results,
+            status_callback=report_error,
+            skip_reviews=params.get('skip_reviews', False),
+            scoring=params.get('scoring', 'llm'),
+            lazy_reviews=params.get('lazy_reviews', False),
+            single_pass=params.get('single_pass', False),
+            sharded=params.get('sharded', False)
+        )
+    if len(contractors) > len(result_set):
+        params['max_results'] = max_results
+        st.session_state.search_params = params
+        set_search_results(contractors)
+        st.toast(f"➕ Added {len(contractors) - len(result_set)} contractors")
+    elif errors:
+        st.toast(f"❌ {errors[-1]}")
+    else:
+        st.toast("No more contractors found for this search")
+
+def review_job_prefix(handle=None):
+    """Review prefetches belong to one set of session results"""
+    return f"reviews:{handle or st.session_state.get('results_handle')}:"
+
+def review_job_key(contractor):
+    """Key a review prefetch on the contractor's identity, not the Python object (ids are reused)"""
+    return f"{review_job_prefix()}{normalize_business_name(contractor.name)}|{normalize_phone(contractor.phone)}"
+
+def prefetch_reviews(contractor, info):
+    """Start fetching the reviews of a lazy review card in the background"""
+    if info['lazy_reviews'] and not contractor.reviews:
+        params = st.session_state.get('search_params') or {}
+        refresher.submit(review_job_key(contractor), grok_search.fetch_reviews, contractor,
+                         params.get('service_type', ''), params.get('location', ''), params.get('skip_reviews', False))
+
+def load_reviews(contractor, info):
+    """Fetch the reviews of a lazy review card (a finished prefetch is a review cache hit)"""
+    if not info['lazy_reviews'] or contractor.reviews:
+        return
+    params = st.session_state.get('search_params') or {}
+    with st.spinner(f"Loading reviews for {contractor.name}..."):
+        # Wait for a prefetch that is still running instead of requesting the same reviews again
+        reviews = refresher.pop(review_job_key(contractor), timeout=REVIEW_PREFETCH_WAIT)
+        if reviews and not contractor.reviews:
+            contractor.reviews = reviews
+        if not contractor.reviews:
+            grok_search.fetch_reviews(contractor, params.get('service_type', ''), params.get('location', ''), params.get('skip_reviews', False))
+    if contractor.reviews:
+        result_store.save(st.session_state.results_handle)
+
+# Each card and quote form is a fragment: clicking inside one reruns only that card or form
+@st.fragment
+def render_contractor_card(i, contractor, info):
+    """Render one contractor card with its quote form and reviews"""
+    # Contractor card
+    st.markdown(f"""
+    <div class="contractor-card">
+        <h3>
+            <span class="rank-badge">#{i}</span>
+            {contractor.name}
+        </h3>
+        <p><strong>SantoScore:</strong> <span class="{info['score_class']}">{info['score']:.1f}/10</span></p>
+
+    </div>
+    """, unsafe_allow_html=True)
+    if contractor.score_explanation:
+        st.caption(contractor.score_explanation)
+    # Contact information and Quote button
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        st.markdown("**📞 Contact Information**")
+        st.write(f"**Phone:** {info['phone']}")
+        st.write(f"**Email:** {info['email']}")
+        st.write(f"**Website:** {info['website']}")
+        if contractor.address:
+            st.write(f"**Address:** {contractor.address}")
+        if contractor.license_status:
+            st.write(f"**License Status:** {contractor.license_status}")
+    with col2:
+        st.markdown("**🔧 Services & Description**")
+        if contractor.services:
+            st.write(f"**Services:** {contractor.services}")
+        if contractor.description:
+            st.write(f"**Description:** {contractor.description}")
+    with col3:
+        st.markdown("**📝 Request Quote**")
+        st.button(f"Get Quote", key=f"quote_{i}", on_click=open_quote_form, args=(i,))
+    render_quote_form(i, contractor, info)
+    # Reviews section (collapsed by default and only rendered while shown)
+    st.markdown("**⭐ Customer Reviews**")
+    if contractor.reviews or info['lazy_reviews']:
+        label = "Show reviews" if info['lazy_reviews'] else f"Show {len(contractor.reviews)} reviews"
+        if not st.toggle(label, key=f"show_reviews_{i}"):
+            st.markdown("---")
+            return
+        load_reviews(contractor, info)
+    if contractor.reviews:
+        for review in contractor.reviews:
+            st.markdown(f"""
+            <div class="review-item">
+                <strong>{review.reviewer_name}</strong>
+                {f" • {review.rating}" if review.rating else ""}
+                {f" • {review.date}" if review.date else ""}
+                <br><br>
+                "{review.review_text}"
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.write("No reviews available")
+    st.markdown("---")
+
+def open_quote_form(i):
+    st.session_state[f"show_quote_form_{i}"] = True
+    st.session_state[f"quote_error_{i}"] = None
+
+def close_quote_form(i):
+    st.session_state[f"show_quote_form_{i}"] = False
+    st.session_state[f"quote_error_{i}"] = None
+
+def submit_quote_form(i, contractor, info):
+    """Validate and queue the quote request of one contractor's form"""
+    user_email = st.session_state.get(f"email_{i}", "")
+    problem_statement = st.session_state.get(f"problem_{i}", "")
+    send_to_business = st.session_state.get(f"send_business_{i}", False)
+    if not user_email or not problem_statement:
+        st.session_state[f"quote_error_{i}"] = "Please fill in all required fields."
+    elif not is_valid_email(user_email):
+        st.session_state[f"quote_error_{i}"] = "Please enter a valid email address."
+    elif send_to_business and contractor.email and not info['email_valid']:
+        st.session_state[f"quote_error_{i}"] = "This contractor's email is invalid. Cannot send to business."
+    else:
+        # Get search parameters safely and add actual results count
+        search_params = (st.session_state.get('search_params') or {}).copy()
+        search_params['actual_results'] = len(get_search_results() or [])
+        search_params['search_timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        success, message = send_quote_request(
+            contractor.name,
+            contractor.email if info['email_valid'] else None,
+            user_email,
+            problem_statement,
+            send_to_business,
+            contractor,  # Pass all contractor details
+            search_params  # Pass search parameters
+        )
+        if success:
+            st.toast(f"✅ {message}")
+            # Clear the form
+            close_quote_form(i)
+        else:
+            st.session_state[f"quote_error_{i}"] = message
+
+@st.fragment
+def render_quote_form(i, contractor, info):
+    """Render the quote request form of one contractor while it is open"""
+    # Quote form (shown when button is clicked)
+    if not st.session_state.get(f"show_quote_form_{i}", False):
+        return
+    # The reviews are usually wanted next, so start loading them while the form is filled in
+    prefetch_reviews(contractor, info)
+    with st.container():
+        st.markdown("---")
+        st.markdown(f"### Quote Request Form for {contractor.name}")
+        # Use columns for better layout
+        form_col1, form_col2 = st.columns([2, 1])
+        with form_col1:
+            st.text_input("Your Email*", key=f"email_{i}")
+            st.caption("Your email is secure. We will never share your email address.")
+            st.text_area(
+                "Problem Statement*", 
+                placeholder="Please describe the work you need done...",
+                key=f"problem_{i}",
+                height=100
+            )
+            send_to_business = st.checkbox(
+                "Send quote request to the business as well",
+                value=False,
+                key=f"send_business_{i}"
+            )
+        with form_col2:
+            st.markdown("**Quote Details:**")
+            st.info(f"Contractor: {contractor.name}")
+            if contractor.email and send_to_business:
+                st.info(f"Will be sent to: {contractor.email}")
+        # Action buttons (callbacks run before the form re-renders, so no extra rerun is needed)
+        if st.session_state.get(f"quote_error_{i}"):
+            st.error(st.session_state[f"quote_error_{i}"])
+        button_col1, button_col2 = st.columns([1, 1])
+        with button_col1:
+            st.button("Send Quote Request", key=f"submit_{i}", type="primary", on_click=submit_quote_form, args=(i, contractor, info))
+        with button_col2:
+            st.button("Cancel", key=f"cancel_{i}", on_click=close_quote_form, args=(i,))
+
+        # Santo Electronics membership section
+        st.markdown("---")
+
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.markdown("**If you are not a member, join us now!**")
+            st.markdown("""
+            <a href="https://www.santoelectronics.com/premium" target="_blank">
+                <button style='background-color: #007bff; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; width: 100%;'>Signup</button>
+            </a>
+            """, unsafe_allow_html=True)
+        with col2:
+            st.markdown("**If you are a member, login here:**")
+            st.markdown("""
+            <a href="https://www.santoelectronics.com/account/login" target="_blank">
+                <button style='background-color: #6c757d; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; width: 100%;'>Login</button>
+            </a>
+            """, unsafe_allow_html=True)
+        st.markdown("---")
+
 # Custom CSS for styling
 st.markdown("""
 <style>
@@ -326,6 +510,27 @@ with st.form("search_form"):
         else:
             st.caption("🚀 Fast mode: ~30-50% faster search")
     
+    single_pass = st.checkbox(
+        "⚡ Single-pass search & scoring",
+        value=False,
+        help="Ask Grok for contractors, reviews and SantoScores in one structured response instead of a separate scoring call. Roughly halves search time, but results appear all at once."
+    )
+    local_scoring = st.checkbox(
+        "🧮 Instant local SantoScore",
+        value=False,
+        help="Calculate SantoScores locally from ratings, reviews, license status and contact details instead of a second Grok analysis call. Ignored in single-pass mode."
+    )
+    sharded = st.checkbox(
+        "🧩 Parallel batches for large searches",
+        value=False,
+        help="Split large searches into several smaller Grok requests that run at the same time and merge the results. Ignored in single-pass mode."
+    )
+    lazy_reviews = st.checkbox(
+        "📝 Load reviews on demand",
+        value=False,
+        help="Search for contractor details and overall ratings only, so results appear much sooner. Each contractor's reviews are fetched when you show them or open its quote form. SantoScores are then based on the overall rating rather than individual reviews."
+    )
+    
     search_button = st.form_submit_button("🔍 Search Contractors", type="primary")
 
 # Handle search
@@ -347,22 +552,109 @@ if search_button:
                     st.error(f"❌ **Error**\n\n{message}")
         
         try:
+            scoring = "local" if local_scoring and not single_pass else "llm"
+            sharded = sharded and not single_pass
+            
             # Store search parameters
             st.session_state.search_params = {
                 'service_type': service_type.strip(),
                 'location': location.strip(),
                 'max_results': max_results,
-                'skip_reviews': not check_fake_reviews
+                'skip_reviews': not check_fake_reviews,
+                'single_pass': single_pass,
+                'scoring': scoring,
+                'sharded': sharded,
+                'lazy_reviews': lazy_reviews
             }
+            st.session_state.refresh_key = None
             
-            # Search for contractors with status updates
-            contractors = grok_search.search_contractors(
-                service_type=service_type.strip(),
-                location=location.strip(),
-                max_results=max_results,
-                status_callback=update_status,
-                skip_reviews=not check_fake_reviews
+            # Serve repeated searches straight from the result cache
+            cached_contractors = grok_search.get_cached_results(
+                service_type.strip(), location.strip(), max_results, not check_fake_reviews, scoring, lazy_reviews, single_pass, sharded
             )
+            # Otherwise answer instantly from contractors found by earlier searches
+            local_contractors = grok_search.get_local_results(
+                service_type.strip(), location.strip(), max_results
+            ) if cached_contractors is None else []
+            
+            if cached_contractors is not None:
+                contractors = cached_contractors
+                update_status("⚡ Loaded cached results for this search", "info")
+            elif local_contractors:
+                # Stale-while-revalidate: show the stored contractors now and refresh them from Grok in the background
+                contractors = local_contractors
+                refresh_key = normalize_search_key(service_type, location, max_results, not check_fake_reviews, scoring, lazy_reviews, single_pass, sharded)
+                refresher.submit(
+                    refresh_key,
+                    grok_search.search_contractors,
+                    service_type=service_type.strip(),
+                    location=location.strip(),
+                    max_results=max_results,
+                    skip_reviews=not check_fake_reviews,
+                    single_pass=single_pass,
+                    scoring=scoring,
+                    sharded=sharded,
+                    lazy_reviews=lazy_reviews
+                )
+                st.session_state.refresh_key = refresh_key
+                update_status(f"⚡ Showing {len(contractors)} known contractors, refreshing from Grok in the background...", "info")
+            elif single_pass:
+                # Search and scoring in one structured call (results are cached by the search itself)
+                contractors = grok_search.search_contractors(
+                    service_type=service_type.strip(),
+                    location=location.strip(),
+                    max_results=max_results,
+                    status_callback=update_status,
+                    skip_reviews=not check_fake_reviews,
+                    single_pass=True,
+                    scoring=scoring,
+                    lazy_reviews=lazy_reviews
+                )
+            else:
+                # Stream contractors and draw a preview card for each one as it arrives
+                # One root span covers streaming and scoring, like search_contractors does
+                with grok_search.metrics.span("search", service_type=service_type.strip(), location=location.strip(), max_results=max_results,
+                                              skip_reviews=not check_fake_reviews, single_pass=False, scoring=scoring, stream=True, sharded=sharded,
+                                              lazy_reviews=lazy_reviews) as search_span:
+                    preview_container = st.empty()
+                    preview = preview_container.container()
+                    contractors = []
+                    for contractor in grok_search.search_contractors_stream(
+                        service_type=service_type.strip(),
+                        location=location.strip(),
+                        max_results=max_results,
+                        status_callback=update_status,
+                        skip_reviews=not check_fake_reviews,
+                        sharded=sharded,
+                        lazy_reviews=lazy_reviews
+                    ):
+                        contractors.append(contractor)
+                        preview.markdown(f"""
+                        <div class="contractor-card">
+                            <h3>
+                                <span class="rank-badge">{len(contractors)}</span>
+                                {contractor.name}
+                            </h3>
+                            <p><strong>Rating:</strong> {contractor.rating or 'N/A'}{'' if lazy_reviews else f' • <strong>Reviews:</strong> {len(contractor.reviews)}'}</p>
+                            <p><em>Calculating SantoScore...</em></p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                
+                    if contractors:
+                        # Status update: Calculating quality scores once every contractor has arrived
+                        if scoring == "local":
+                            update_status("🧮 Calculating local SantoScores...", "info")
+                        elif check_fake_reviews:
+                            update_status("⭐ Calculating SantoScores (full mode with validated review analysis)...", "info")
+                        else:
+                            update_status("⭐ Calculating SantoScores (fast mode with basic review data)...", "info")
+                        contractors = grok_search.score_contractors(contractors, service_type.strip(), scoring)
+                        grok_search.cache_results(
+                            service_type.strip(), location.strip(), max_results, not check_fake_reviews, contractors, scoring, lazy_reviews, sharded=sharded
+                        )
+
+                    preview_container.empty()
+                    search_span.set(results=len(contractors))
             
             if contractors:
                 # Status update: Sorting and preparing results
@@ -370,7 +662,7 @@ if search_button:
                 
                 # Sort contractors by quality score (highest first)
                 contractors.sort(key=lambda x: x.quality_score, reverse=True)
-                st.session_state.search_results = contractors
+                set_search_results(contractors)
                 
                 # Status update: Ready to display
                 update_status("🎯 Results ready! Displaying your contractor matches...", "success")
@@ -379,7 +671,7 @@ if search_button:
                 time.sleep(1)
                 status_container.empty()
             else:
-                st.session_state.search_results = []
+                set_search_results([])
                 # Clear status popup and show no results
                 status_container.empty()
                 
@@ -387,174 +679,134 @@ if search_button:
             update_status(f"An error occurred: {str(e)}", "error")
             st.write("Please try again or check your API key.")
 
-# Display results from session state
-if st.session_state.search_results is not None:
-    contractors = st.session_state.search_results
-    if not contractors:
+# Display results from the result store
+result_set = get_search_results()
+if result_set is not None:
+    if not result_set:
         st.warning("No contractors found. Please try different search terms.")
     else:
         # Display summary
-        params = st.session_state.search_params
-        st.success(f"Found {len(contractors)} contractors for {params['service_type']}")
+        params = st.session_state.search_params or {}
+        st.success(f"Found {len(result_set)} contractors for {params.get('service_type', '')}")
+        if st.session_state.get('last_quote_id') is None and 'last_quote_id' in st.session_state:
+            st.caption(f"📨 Last quote request: in the next sales digest ({outbox.digest_size(SALES_EMAIL)} waiting)")
+        elif st.session_state.get('last_quote_id'):
+            delivery = outbox.status(st.session_state['last_quote_id'])
+            if delivery:
+                st.caption(f"📨 Last quote request: {delivery['status']}" + (f" ({delivery['last_error']})" if delivery['status'] == 'failed' else ""))
+        
+        if st.session_state.refresh_key:
+            @st.fragment(run_every=2)
+            def refresh_watcher():
+                """Swap in the background Grok results once they arrive"""
+                refresh_key = st.session_state.refresh_key
+                if refresher.pending(refresh_key):
+                    st.caption("🔄 These are contractors from earlier searches. Refreshing them from Grok in the background...")
+                    return
+                refreshed = refresher.result(refresh_key)
+                st.session_state.refresh_key = None
+                if refreshed:
+                    refreshed.sort(key=lambda x: x.quality_score, reverse=True)
+                    set_search_results(refreshed)
+                st.rerun()
+            
+            refresh_watcher()
         st.markdown("---")
-        # Display contractors
-        for i, contractor in enumerate(contractors, 1):
-            # Quality score color coding
-            if contractor.quality_score >= 8:
-                score_class = "score-high"
-            elif contractor.quality_score >= 6:
-                score_class = "score-medium"
-            else:
-                score_class = "score-low"
-            # Contractor card
-            st.markdown(f"""
-            <div class="contractor-card">
-                <h3>
-                    <span class="rank-badge">#{i}</span>
-                    {contractor.name}
-                </h3>
-                <p><strong>SantoScore:</strong> <span class="{score_class}">{contractor.quality_score:.1f}/10</span></p>
-            </div>
-            """, unsafe_allow_html=True)
-            # Contact information and Quote button
-            col1, col2, col3 = st.columns([2, 2, 1])
-            with col1:
-                st.markdown("**📞 Contact Information**")
-                if is_valid_phone(contractor.phone):
-                    st.write(f"**Phone:** {contractor.phone}")
-                else:
-                    st.write("**Phone:** N/A")
-                if is_valid_email(contractor.email):
-                    st.write(f"**Email:** {contractor.email}")
-                else:
-                    st.write("**Email:** N/A")
-                if contractor.website:
-                    is_safe, reason = is_website_safe_for_display(contractor.website)
-                    if is_safe:
-                        st.write(f"**Website:** {contractor.website}")
-                    else:
-                        st.write("**Website:** N/A (safety concerns)")
-                else:
-                    st.write("**Website:** N/A")
-                if contractor.address:
-                    st.write(f"**Address:** {contractor.address}")
-                if contractor.license_status:
-                    st.write(f"**License Status:** {contractor.license_status}")
-            with col2:
-                st.markdown("**🔧 Services & Description**")
-                if contractor.services:
-                    st.write(f"**Services:** {contractor.services}")
-                if contractor.description:
-                    st.write(f"**Description:** {contractor.description}")
-            with col3:
-                st.markdown("**📝 Request Quote**")
-                if st.button(f"Get Quote", key=f"quote_{i}"):
-                    st.session_state[f"show_quote_form_{i}"] = True
-            # Quote form (shown when button is clicked)
-            if st.session_state.get(f"show_quote_form_{i}", False):
-                with st.container():
-                    st.markdown("---")
-                    st.markdown(f"### Quote Request Form for {contractor.name}")
-                    # Use columns for better layout
-                    form_col1, form_col2 = st.columns([2, 1])
-                    with form_col1:
-                        user_email = st.text_input("Your Email*", key=f"email_{i}")
-                        st.caption("Your email is secure. We will never share your email address.")
-                        problem_statement = st.text_area(
-                            "Problem Statement*", 
-                            placeholder="Please describe the work you need done...",
-                            key=f"problem_{i}",
-                            height=100
-                        )
-                        send_to_business = st.checkbox(
-                            "Send quote request to the business as well",
-                            value=False,
-                            key=f"send_business_{i}"
-                        )
-                    with form_col2:
-                        st.markdown("**Quote Details:**")
-                        st.info(f"Contractor: {contractor.name}")
-                        if contractor.email and send_to_business:
-                            st.info(f"Will be sent to: {contractor.email}")
-                    # Action buttons
-                    button_col1, button_col2 = st.columns([1, 1])
-                    with button_col1:
-                        if st.button("Send Quote Request", key=f"submit_{i}", type="primary"):
-                            if not user_email or not problem_statement:
-                                st.error("Please fill in all required fields.")
-                            elif not is_valid_email(user_email):
-                                st.error("Please enter a valid email address.")
-                            elif send_to_business and contractor.email and not is_valid_email(contractor.email):
-                                st.error("This contractor's email is invalid. Cannot send to business.")
-                            else:
-                                # Get search parameters safely and add actual results count
-                                search_params = st.session_state.get('search_params', {}).copy()
-                                search_params['actual_results'] = len(contractors)
-                                search_params['search_timestamp'] = time.strftime("%Y-%m-%d %H:%M:%S")
-                                
-                                success, message = send_quote_request(
-                                    contractor.name,
-                                    contractor.email if is_valid_email(contractor.email) else None,
-                                    user_email,
-                                    problem_statement,
-                                    send_to_business,
-                                    contractor,  # Pass all contractor details
-                                    search_params  # Pass search parameters
-                                )
-                                if success:
-                                    st.success(message)
-                                    st.session_state['show_email_notification'] = True
-                                    st.session_state['email_notification_time'] = time.time()
-                                    # Clear the form
-                                    st.session_state[f"show_quote_form_{i}"] = False
-                                    st.rerun()
-                                else:
-                                    st.error(message)
-                    with button_col2:
-                        if st.button("Cancel", key=f"cancel_{i}"):
-                            st.session_state[f"show_quote_form_{i}"] = False
-                            st.rerun()
-                    
-                    # Santo Electronics membership section
-                    st.markdown("---")
-                    
-                    col1, col2 = st.columns([1, 1])
-                    with col1:
-                        st.markdown("**If you are not a member, join us now!**")
-                        st.markdown("""
-                        <a href="https://www.santoelectronics.com/premium" target="_blank">
-                            <button style='background-color: #007bff; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; width: 100%;'>Signup</button>
-                        </a>
-                        """, unsafe_allow_html=True)
-                    with col2:
-                        st.markdown("**If you are a member, login here:**")
-                        st.markdown("""
-                        <a href="https://www.santoelectronics.com/account/login" target="_blank">
-                            <button style='background-color: #6c757d; color: white; border: none; padding: 10px 20px; border-radius: 5px; font-weight: bold; width: 100%;'>Login</button>
-                        </a>
-                        """, unsafe_allow_html=True)
-                    st.markdown("---")
-            # Reviews section
-            st.markdown("**⭐ Customer Reviews**")
-            if contractor.reviews:
-                for review in contractor.reviews:
-                    st.markdown(f"""
-                    <div class="review-item">
-                        <strong>{review.reviewer_name}</strong>
-                        {f" • {review.rating}" if review.rating else ""}
-                        {f" • {review.date}" if review.date else ""}
-                        <br><br>
-                        "{review.review_text}"
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.write("No reviews available")
-            st.markdown("---")
+        # Filter and re-rank the results in memory (see result_set.py), without a new search
+        with st.expander("🎛️ Filter & re-rank results"):
+            filter_col1, filter_col2 = st.columns([1, 1])
+            with filter_col1:
+                st.checkbox("Active license only", key='filter_licensed', on_change=reset_results_view)
+                st.checkbox("Must have an email address", key='filter_email', on_change=reset_results_view)
+                st.checkbox("Must have a phone number", key='filter_phone', on_change=reset_results_view)
+                st.slider("Minimum rating", min_value=0.0, max_value=5.0, value=0.0, step=0.5, key='filter_min_rating', on_change=reset_results_view)
+            with filter_col2:
+                rerank = st.toggle(
+                    "Rank by my own weights",
+                    key='rerank',
+                    on_change=reset_results_view,
+                    help="Rank by a local SantoScore computed with the weights below instead of the search's SantoScore."
+                )
+                for name, label in WEIGHT_LABELS.items():
+                    st.slider(label, min_value=0.0, max_value=1.0, value=DEFAULT_WEIGHTS[name], step=0.05,
+                              key=f"weight_{name}", disabled=not rerank, on_change=reset_results_view)
+        order, scores = results_view(result_set)
+        if len(order) < len(result_set):
+            st.caption(f"Showing {len(order)} of {len(result_set)} contractors matching the filters")
+        # Display one page of contractors (each card re-renders on its own, see render_contractor_card)
+        page_size = st.selectbox(
+            "Contractors per page",
+            options=PAGE_SIZE_OPTIONS,
+            index=PAGE_SIZE_OPTIONS.index(RESULTS_PAGE_SIZE),
+            key='results_page_size',
+            on_change=set_results_page,
+            args=(0,)
+        )
+        page_count = max(1, (len(order) + page_size - 1) // page_size)
+        page = min(st.session_state.get('results_page', 0), page_count - 1)
+        start = page * page_size
+        end = min(start + page_size, len(order))
+        page_order = order[start:end]
+        display = prepare_display([result_set[j] for j in page_order], scores[page_order])
+        for n, j in enumerate(page_order):
+            render_contractor_card(start + n + 1, result_set[j], display[n])
+        if not len(order):
+            st.info("No contractors match these filters.")
+        
+        # Page navigation
+        if page_count > 1:
+            nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+            with nav_col1:
+                st.button("← Previous", key="results_prev", disabled=page == 0, on_click=set_results_page, args=(page - 1,))
+            with nav_col2:
+                st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count} • Contractors {start + 1}-{end} of {len(order)}</p>", unsafe_allow_html=True)
+            with nav_col3:
+                st.button("Next →", key="results_next", disabled=page >= page_count - 1, on_click=set_results_page, args=(page + 1,))
+        
+        # More results for the same search, without repeating the contractors already found
+        if not st.session_state.refresh_key:
+            st.button(f"➕ Load {MORE_RESULTS_STEP} more contractors", key="load_more", on_click=load_more_results)
+
 
 # Information when no search has been performed
-elif st.session_state.search_results is None:
+else:
     st.info("👆 Enter a service type and location to search for contractors.")
 
+# Stage timings collected by the search pipeline spans (see metrics.py)
+with st.expander("⏱️ Pipeline timings"):
+    histograms = grok_search.metrics.snapshot()["histograms"]
+    timing_rows = []
+    for name, summary in histograms.items():
+        if not name.endswith(".duration_ms"):
+            continue
+        stage = name[:-len(".duration_ms")]
+        tokens = histograms.get(f"{stage}.total_tokens")
+        timing_rows.append({
+            "Stage": stage,
+            "Count": summary["count"],
+            "p50 (ms)": round(summary["p50"]),
+            "p95 (ms)": round(summary["p95"]),
+            "p99 (ms)": round(summary["p99"]),
+            "Tokens (p50)": tokens["p50"] if tokens else None,
+        })
+    if timing_rows:
+        st.table(timing_rows)
+    else:
+        st.caption("No searches have run in this session yet.")
+    store_stats = result_store.stats()
+    st.caption(
+        f"🗄️ Search results of all sessions: {store_stats['memory_entries']} in memory "
+        f"({store_stats['memory_bytes'] / 1048576:.1f} of {store_stats['max_bytes'] / 1048576:.0f} MB), "
+        f"{store_stats['entries']} on disk"
+    )
+    limiter_stats = grok_search.limiter.stats()
+    st.caption(
+        f"🚦 xAI searches: {limiter_stats['active']} of {limiter_stats['max_concurrent']} slots in use, "
+        f"{limiter_stats['queued']} waiting, {limiter_stats['retries']} API retries"
+    )
+
+
+
 # Footer
 st.markdown("---")
 st.markdown("SantoScore v1.0 Contractor Search")
@@ -0,0 +1,328 @@
+import os
+import asyncio
+from typing import List, AsyncIterator, Optional
+from openai import AsyncOpenAI
+from grok_search import GrokContractorSearch, SearchStream, Contractor, Review, GROK_BASE_URL
+from rate_limiter import AdmissionTimeout
+from record_replay import wrap_client, AsyncRecordingClient, AsyncReplayClient
+from entity_resolution import ContractorIndex
+
+
+class AsyncGrokContractorSearch(GrokContractorSearch):
+    """
+    asyncio version of GrokContractorSearch built on AsyncOpenAI.
+
+    Prompt building, response parsing, merging and caching are the synchronous
+    class's helpers; the methods here only await the API calls (and run cache and
+    store access in threads), so results are identical. Every public method is a coroutine (or async
+    generator), which lets one event loop run many searches concurrently:
+
+        search = AsyncGrokContractorSearch()
+        results = await asyncio.gather(
+            search.search_contractors("plumber", "Austin, TX"),
+            search.search_contractors("roofer", "Denver, CO"),
+        )
+
+    Searches can be cancelled like any other task; cancellation is never
+    swallowed by the error handling below. API calls go through the same
+    rate limiter as the synchronous class (admit_async / call_async), so
+    async and threaded searches share one set of buckets and search slots.
+    """
+
+    def __init__(self, cache=None, timeout: Optional[float] = None, score_batch_size: int = None, score_workers: int = None, score_cache=None, metrics=None, store=None, review_cache=None, limiter=None):
+        super().__init__(cache=cache, score_batch_size=score_batch_size, score_workers=score_workers, score_cache=score_cache, metrics=metrics, store=store, review_cache=review_cache, limiter=limiter)
+        # Default wall-clock limit for a whole search (search call + scoring call)
+        self.timeout = timeout if timeout is not None else float(os.getenv("GROK_SEARCH_TIMEOUT", 180))
+
+    def _create_client(self):
+        """
+        Create the async OpenAI-compatible client for the xAI API
+        (GROK_RECORD_MODE=record/replay wraps it, see record_replay.py).
+        The client does not retry on its own; the rate limiter retries with jitter.
+        """
+        return wrap_client(
+            lambda: AsyncOpenAI(api_key=os.getenv("GROK_API_KEY"), base_url=GROK_BASE_URL, max_retries=0),
+            AsyncRecordingClient,
+            AsyncReplayClient
+        )
+
+    async def search_contractors(self, service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, single_pass: bool = False, scoring: str = "llm", timeout: Optional[float] = None, sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Search for contractors using Grok-4 API (web search), giving up after timeout seconds
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self.metrics.span("search", service_type=service_type, location=location, max_results=max_results,
+                               skip_reviews=skip_reviews, single_pass=single_pass, scoring=scoring, sharded=sharded, lazy_reviews=lazy_reviews) as span:
+            try:
+                contractors = await asyncio.wait_for(
+                    self._search(service_type, location, max_results, status_callback, skip_reviews, single_pass, scoring, sharded, lazy_reviews),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"Contractor search timed out after {timeout} seconds")
+                span.set(timed_out=True)
+                if status_callback:
+                    status_callback(f"⏱️ Search timed out after {timeout:.0f} seconds", "error")
+                contractors = []
+            span.set(results=len(contractors))
+            return contractors
+
+    async def _search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, single_pass: bool, scoring: str, sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the search and scoring calls without a timeout
+        """
+        cached = await asyncio.to_thread(self.get_cached_results, service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+        if cached is not None:
+            return self._cache_hit(cached, status_callback)
+
+        # Wait for a search slot (the queue position is reported through status_callback)
+        try:
+            async with self.limiter.admit_async(status_callback):
+                return await self._run_search(service_type, location, max_results, status_callback, skip_reviews, single_pass, scoring, sharded, lazy_reviews)
+        except AdmissionTimeout as e:
+            return self._search_failed(e, status_callback)
+
+    async def _run_search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, single_pass: bool, scoring: str, sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the search call and scoring call of a search that was not cached
+        """
+        user_prompt = self._timed_search_prompt(service_type, location, max_results, skip_reviews, lazy_reviews)
+
+        try:
+            if status_callback:
+                status_callback("🔍 Searching the web for contractors...", "info")
+
+            if single_pass:
+                response = await self._complete("single_pass_api", self._single_pass_request(service_type, location, max_results, skip_reviews, lazy_reviews))
+                safe_contractors = self._single_pass_results(response, skip_reviews, status_callback)
+                if safe_contractors is not None:
+                    return await asyncio.to_thread(
+                        self._finalize_search, safe_contractors, service_type, location, max_results, skip_reviews, status_callback, scoring, lazy_reviews, single_pass, sharded
+                    )
+
+            if sharded and self._shard_count(max_results) > 1:
+                safe_contractors = await self._sharded_search(service_type, location, max_results, skip_reviews, status_callback, lazy_reviews)
+            else:
+                response = await self._complete("search_api", self._search_request(user_prompt))
+                safe_contractors = self._search_results(response, skip_reviews, status_callback)
+                safe_contractors = await self._continue_search(safe_contractors, service_type, location, max_results, skip_reviews, status_callback, response, lazy_reviews)
+
+            self._report_scoring(status_callback, skip_reviews)
+            safe_contractors = await self.score_contractors(safe_contractors, service_type, scoring)
+
+            return await asyncio.to_thread(
+                self._finalize_search, safe_contractors, service_type, location, max_results, skip_reviews, status_callback, scoring, lazy_reviews, single_pass, sharded
+            )
+        except Exception as e:
+            return self._search_failed(e, status_callback)
+
+    async def search_contractors_stream(self, service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, sharded: bool = False, lazy_reviews: bool = False) -> AsyncIterator[Contractor]:
+        """
+        Stream contractors from Grok-4 as soon as each CONTRACTOR block is complete.
+        Yielded contractors are not scored yet - collect them and await
+        score_contractors once the stream is exhausted.
+        With sharded=True each shard's contractors are yielded as soon as that shard finishes.
+        With lazy_reviews=True contractors arrive without reviews (see fetch_reviews).
+        The search holds a slot of the rate limiter's admission queue while it streams;
+        if no slot frees up in time it is reported through status_callback and nothing is yielded.
+        """
+        try:
+            async with self.limiter.admit_async(status_callback):
+                async for contractor in self._stream_search(service_type, location, max_results, status_callback, skip_reviews, sharded, lazy_reviews):
+                    yield contractor
+        except AdmissionTimeout as e:
+            self._search_failed(e, status_callback)
+
+    async def _stream_search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, sharded: bool, lazy_reviews: bool) -> AsyncIterator[Contractor]:
+        """
+        Stream the search (or shard) requests and their continuations for search_contractors_stream
+        """
+        if status_callback:
+            status_callback("🔍 Searching the web for contractors...", "info")
+
+        received = []
+        if sharded and self._shard_count(max_results) > 1:
+            async for contractor in self._stream_shards(service_type, location, max_results, skip_reviews, status_callback, lazy_reviews):
+                received.append(contractor)
+                yield contractor
+        attempts, stage, request = self._first_stream_request(service_type, location, max_results, skip_reviews, received, sharded, lazy_reviews)
+
+        for attempt in range(attempts):
+            state = {}
+            async for contractor in self._stream_contractors(stage, request, received, max_results, status_callback, state):
+                received.append(contractor)
+                yield contractor
+
+            stage, request = "continuation_api", self._next_stream_continuation(attempt, state, service_type, location, max_results, skip_reviews, received, status_callback, lazy_reviews)
+            if request is None:
+                break
+
+        print(f"=== STREAMED {len(received)} CONTRACTORS ===")
+
+    async def search_more(self, contractors: List[Contractor], service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> List[Contractor]:
+        """
+        Grow earlier results to max_results with continuation requests, scoring only
+        the new contractors (see GrokContractorSearch.search_more)
+        """
+        with self._search_more_span(contractors, service_type, location, max_results, scoring, lazy_reviews) as span:
+            cached = await asyncio.to_thread(self._cached_more_results, span, contractors, service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+            if cached is not None:
+                return cached
+            try:
+                async with self.limiter.admit_async(status_callback):
+                    merged = await self._continue_search(list(contractors), service_type, location, max_results, skip_reviews, status_callback, lazy_reviews=lazy_reviews)
+                    new = self._new_contractors(span, contractors, merged, status_callback)
+                    if not new:
+                        return contractors
+                    await self.score_contractors(new, service_type, scoring)
+            except Exception as e:
+                return self._search_more_failed(e, contractors, status_callback)
+            return await asyncio.to_thread(self._finish_search_more, span, merged, service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+
+    async def _continue_search(self, contractors: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, response=None, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Request the contractors still missing, up to max_continuations times
+        (see GrokContractorSearch._continue_search)
+        """
+        for attempt in range(self.max_continuations):
+            request = self._next_continuation(contractors, service_type, location, max_results, skip_reviews, status_callback, response, lazy_reviews)
+            if request is None:
+                break
+            response = await self._complete("continuation_api", request, attempt=attempt + 1)
+            merged = self._merge_continuation(contractors, response, skip_reviews)
+            if merged is None:
+                break
+            contractors = merged
+        return contractors
+
+    async def _sharded_search(self, service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the shard requests concurrently, merge the results without duplicates
+        and top up with a continuation request if the shards came back short
+        """
+        shard_requests = self._shard_requests(service_type, location, max_results, skip_reviews, lazy_reviews=lazy_reviews)
+        if status_callback:
+            status_callback(f"🧩 Searching in {len(shard_requests)} parallel batches...", "info")
+
+        shards = await asyncio.gather(*(self._search_shard(request, index, skip_reviews) for index, request in enumerate(shard_requests)))
+        return await self._continue_search(self._merge_shards(shards, max_results), service_type, location, max_results, skip_reviews, status_callback, lazy_reviews=lazy_reviews)
+
+    async def _search_shard(self, request, index: int, skip_reviews: bool) -> List[Contractor]:
+        """
+        Run one shard request (a failed shard returns no contractors instead of failing the search)
+        """
+        try:
+            return self._search_results(await self._complete("shard_api", request, shard=index + 1), skip_reviews)
+        except Exception as e:
+            return self._shard_failed(e, index)
+
+    async def _stream_shards(self, service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, lazy_reviews: bool = False) -> AsyncIterator[Contractor]:
+        """
+        Run the shard requests concurrently and yield each shard's new contractors
+        as soon as that shard finishes
+        """
+        shard_requests = self._shard_requests(service_type, location, max_results, skip_reviews, lazy_reviews=lazy_reviews)
+        entities = ContractorIndex()
+        count = 0
+        for next_shard in asyncio.as_completed([self._search_shard(request, index, skip_reviews) for index, request in enumerate(shard_requests)]):
+            accepted = self._accept_contractors(entities, await next_shard, count, max_results, status_callback)
+            count += len(accepted)
+            for contractor in accepted:
+                yield contractor
+
+    async def _stream_contractors(self, stage: str, request, received: List[Contractor], max_results: int, status_callback, state) -> AsyncIterator[Contractor]:
+        """
+        Stream one search (or continuation) request and yield each contractor not
+        already in received, until max_results have arrived in total.
+        Sets state["finish_reason"] and state["contractors"] (number yielded).
+        """
+        search_stream = SearchStream(self, stage, request, received, max_results, status_callback)
+        try:
+            stream = await self.limiter.call_async(self.client.chat.completions.create, request)
+            async for chunk in stream:
+                for contractor in search_stream.feed(chunk):
+                    yield contractor
+                if search_stream.full:
+                    await stream.close()
+                    search_stream.span.set(closed_early=True)
+                    break
+            for contractor in search_stream.finish():
+                yield contractor
+        except Exception as e:
+            search_stream.fail(e)
+        finally:
+            search_stream.close(state)
+
+    async def fetch_reviews(self, contractor: Contractor, service_type: str = "", location: str = "", skip_reviews: bool = False) -> List[Review]:
+        """
+        Fetch reviews for one contractor of a lazy_reviews search and store them on the contractor
+        """
+        key = self._review_cache_key(contractor, skip_reviews)
+        with self.metrics.span("fetch_reviews") as span:
+            reviews = await asyncio.to_thread(self._cached_reviews, key)
+            span.set(cached=reviews is not None)
+            if reviews is None:
+                try:
+                    response = await self._complete("reviews_api", self._reviews_request(contractor, service_type, location, skip_reviews))
+                except Exception as e:
+                    return self._fetch_reviews_failed(e, contractor)
+                reviews = await asyncio.to_thread(self._reviews_from_response, key, response)
+            span.set(reviews=len(reviews))
+
+        await asyncio.to_thread(self._save_reviews, contractor, reviews, service_type, location)
+        return reviews
+
+    async def score_contractors(self, contractors: List[Contractor], service_type: str, scoring: str = "llm") -> List[Contractor]:
+        """
+        Calculate SantoScores for contractors collected from search_contractors_stream.
+        scoring="llm" asks grok-4, scoring="local" uses the local SantoScoreEngine.
+        """
+        with self.metrics.span("scoring", scoring=scoring, contractors=len(contractors)):
+            if scoring == "local":
+                return self.score_engine.score_contractors(contractors)
+            return await self._calculate_quality_scores(contractors, service_type)
+
+    async def _complete(self, stage: str, request, **attributes):
+        """
+        Run a chat completion inside a timing span that records token usage and finish_reason
+        """
+        with self.metrics.span(stage, model=request.get("model"), max_tokens=request.get("max_tokens"), **attributes) as span:
+            response = await self.limiter.call_async(self.client.chat.completions.create, request)
+            return self._completed(span, request, response)
+
+    async def _calculate_quality_scores(self, contractors: List[Contractor], service_type: str) -> List[Contractor]:
+        """
+        Calculate quality scores for contractors using Grok API (using grok-4 for best quality)
+        
+        Batches of score_batch_size are scored concurrently on the event loop (at
+        most score_workers at a time) and matched back by contractor id/name.
+        """
+        misses = await asyncio.to_thread(self._apply_cached_scores, contractors, service_type)
+        if not misses:
+            return contractors
+
+        semaphore = asyncio.Semaphore(self.score_workers)
+
+        async def score(batch: List[Contractor]) -> List[Contractor]:
+            async with semaphore:
+                return await self._score_batch(batch, service_type)
+
+        scored = await asyncio.gather(*(score(batch) for batch in self._score_batches(misses)))
+        await asyncio.to_thread(self._store_cached_scores, scored, service_type)
+        return contractors
+
+    async def _score_batch(self, batch: List[Contractor], service_type: str) -> List[Contractor]:
+        """
+        Score one batch, retrying only the contractors that were not scored.
+        Returns the contractors that received an LLM score.
+        """
+        pending = batch
+        for attempt in range(1 + self.score_retries):
+            try:
+                response = await self._complete("scoring_api", self._scoring_request(pending, service_type), batch_size=len(pending), attempt=attempt + 1)
+                pending = self._assign_batch_scores(pending, response)
+            except Exception as e:
+                print(f"Error calculating quality scores (attempt {attempt + 1}): {e}")
+            if not pending:
+                break
+        return self._finish_score_batch(batch, pending)
@@ -0,0 +1,335 @@
+"""
+Headless batch runner for contractor searches.
+
+Reads a CSV of queries (columns service_type, location and optionally
+max_results), runs them through GrokContractorSearch on a bounded worker pool
+with a queries-per-minute limit, and streams every query's contractors to
+JSONL or Parquet as soon as that query finishes. Finished queries are recorded
+in a checkpoint file, so an interrupted run continues where it stopped:
+
+    python batch_search.py queries.csv --output results.jsonl --workers 4 --rate 30
+    python batch_search.py queries.csv --output results.parquet --scoring local
+
+JSONL output is appended to. Parquet output (needs pyarrow) is a directory
+with one part file per run; read it with pyarrow.parquet.read_table(path).
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Iterable
+from dotenv import load_dotenv
+from grok_search import GrokContractorSearch
+from models import Contractor
+from metrics import Histogram
+from result_cache import SearchCache, ScoreCache, normalize_search_key
+from contractor_store import ContractorStore
+from rate_limiter import TokenBucket
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RESULTS = 10
+# Scalar columns of every output row, in order (reviews are added as a list in JSONL and as JSON text in Parquet)
+ROW_FIELDS = (
+    "query", "service_type", "location", "rank", "name", "phone", "phone_e164", "email", "website", "domain",
+    "address", "services", "rating", "rating_value", "license_status", "license_state", "license_number",
+    "description", "quality_score", "score_explanation", "review_count",
+)
+
+
+def read_queries(path: str, default_max_results: int) -> List[Dict[str, Any]]:
+    """
+    Read the query CSV, skipping rows without a service_type
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as file:
+        for line, row in enumerate(csv.DictReader(file), 2):
+            service_type = (row.get("service_type") or "").strip()
+            if not service_type:
+                print(f"Skipping line {line}: no service_type")
+                continue
+            try:
+                max_results = int(row.get("max_results") or default_max_results)
+            except ValueError:
+                print(f"Line {line}: invalid max_results {row.get('max_results')!r}, using {default_max_results}")
+                max_results = default_max_results
+            queries.append({
+                "service_type": service_type,
+                "location": (row.get("location") or "").strip(),
+                "max_results": max_results,
+            })
+    return queries
+
+
+def query_key(query: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """
+    Checkpoint key of a query (the search cache key of the same search)
+    """
+    return normalize_search_key(query["service_type"], query["location"], query["max_results"], options["skip_reviews"],
+                                options["scoring"], options["lazy_reviews"], options["single_pass"], options["sharded"])
+
+
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as file:
+        return {line.strip() for line in file if line.strip()}
+
+
+def contractor_rows(query: Dict[str, Any], key: str, contractors: List[Contractor]) -> List[Dict[str, Any]]:
+    """
+    One flat output row per contractor, tagged with its query
+    """
+    rows = []
+    for rank, contractor in enumerate(contractors, 1):
+        row = {
+            "query": key,
+            "service_type": query["service_type"],
+            "location": query["location"],
+            "rank": rank,
+            "review_count": len(contractor.reviews),
+        }
+        for name in ROW_FIELDS:
+            if name not in row:
+                row[name] = getattr(contractor, name)
+        row["license_state"] = contractor.license_state.value
+        row["reviews"] = [review.to_dict() for review in contractor.reviews]
+        rows.append(row)
+    return rows
+
+
+class JSONLWriter:
+    """
+    Appends rows as JSON lines, flushed after every query
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes rows to a new part file of a Parquet dataset directory, one row group per query
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema(
+            [(name, pa.string()) for name in ("query", "service_type", "location")]
+            + [("rank", pa.int32())]
+            + [(name, pa.string()) for name in ("name", "phone", "phone_e164", "email", "website", "domain", "address", "services", "rating")]
+            + [("rating_value", pa.float64())]
+            + [(name, pa.string()) for name in ("license_status", "license_state", "license_number", "description")]
+            + [("quality_score", pa.float64()), ("score_explanation", pa.string()), ("review_count", pa.int32()), ("reviews", pa.string())]
+        )
+        os.makedirs(path, exist_ok=True)
+        part = len([name for name in os.listdir(path) if name.endswith(".parquet")])
+        self.path = os.path.join(path, f"part-{part:05d}.parquet")
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        columns = {name: [row[name] for row in rows] for name in self.schema.names}
+        columns["reviews"] = [json.dumps(reviews, ensure_ascii=False) for reviews in columns["reviews"]]
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path: str, output_format: str):
+    """
+    Open the output writer, or None if Parquet was asked for without pyarrow installed
+    """
+    if output_format == "parquet":
+        try:
+            return ParquetWriter(path)
+        except ImportError:
+            print("Parquet output needs pyarrow (pip install pyarrow), or use a .jsonl output")
+            return None
+    return JSONLWriter(path)
+
+
+class BatchRunner:
+    """
+    Runs queries on a bounded worker pool and hands each result to the writer as it finishes
+    """
+
+    def __init__(self, grok_search: GrokContractorSearch, writer, checkpoint_path: str, workers: int = DEFAULT_WORKERS,
+                 rate_per_minute: float = 0.0, options: Dict[str, Any] = None, verbose: bool = False):
+        self.grok_search = grok_search
+        self.writer = writer
+        self.checkpoint_path = checkpoint_path
+        self.workers = max(1, workers)
+        # Query starts are spaced evenly (a one-query bucket); API requests are also limited by rate_limiter.LIMITER
+        self.query_bucket = TokenBucket(rate_per_minute / 60.0, 1)
+        self.options = options or {}
+        self.verbose = verbose
+        self.latency = Histogram()
+        self.stats = {"queries": 0, "skipped": 0, "failed": 0, "empty": 0, "contractors": 0}
+
+    def run(self, queries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run every query not in the checkpoint, writing results as queries finish.
+        At most workers queries are in flight, so a long CSV is never queued up at once.
+        """
+        done = load_checkpoint(self.checkpoint_path)
+        started = time.perf_counter()
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint, ThreadPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = {}
+            for query in queries:
+                key = query_key(query, self.options)
+                if key in done:
+                    self.stats["skipped"] += 1
+                    continue
+                done.add(key)
+                if len(in_flight) >= self.workers:
+                    self._collect(in_flight, checkpoint)
+                in_flight[pool.submit(self._search, query)] = (query, key)
+            while in_flight:
+                self._collect(in_flight, checkpoint)
+        self.stats["seconds"] = time.perf_counter() - started
+        return self.stats
+
+    def _search(self, query: Dict[str, Any]):
+        wait = self.query_bucket.reserve(1)
+        if wait:
+            time.sleep(wait)
+        started = time.perf_counter()
+        contractors = self.grok_search.search_contractors(
+            service_type=query["service_type"],
+            location=query["location"],
+            max_results=query["max_results"],
+            status_callback=self._status if self.verbose else None,
+            skip_reviews=self.options.get("skip_reviews", False),
+            single_pass=self.options.get("single_pass", False),
+            scoring=self.options.get("scoring", "llm"),
+            sharded=self.options.get("sharded", False),
+            lazy_reviews=self.options.get("lazy_reviews", False)
+        )
+        return contractors, time.perf_counter() - started
+
+    def _collect(self, in_flight: Dict, checkpoint):
+        """
+        Write the results of finished queries and checkpoint them
+        """
+        finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for future in finished:
+            query, key = in_flight.pop(future)
+            label = f"{query['service_type']} / {query['location'] or '-'}"
+            try:
+                contractors, seconds = future.result()
+            except Exception as e:
+                # Not checkpointed, so the next run retries it
+                self.stats["failed"] += 1
+                print(f"Error in query {label}: {e}")
+                continue
+            self.latency.observe(seconds)
+            self.stats["queries"] += 1
+            self.stats["contractors"] += len(contractors)
+            if not contractors:
+                # search_contractors returns [] on API errors too, so empty queries are retried as well
+                self.stats["empty"] += 1
+                print(f"No contractors for {label} ({seconds:.1f}s)")
+                continue
+            self.writer.write(contractor_rows(query, key, contractors))
+            checkpoint.write(key + "\n")
+            checkpoint.flush()
+            print(f"{len(contractors):>3} contractors for {label} ({seconds:.1f}s)")
+
+    def _status(self, message: str, status_type: str = "info"):
+        print(f"  [{status_type}] {message.splitlines()[0]}")
+
+
+def print_stats(stats: Dict[str, Any], latency: Histogram, stages: Dict[str, Dict[str, float]]):
+    seconds = stats.get("seconds") or 0.0
+    print()
+    print(f"Queries: {stats['queries']} done, {stats['empty']} empty, {stats['failed']} failed, {stats['skipped']} skipped (checkpointed or repeated)")
+    print(f"Contractors: {stats['contractors']}")
+    if seconds:
+        print(f"Throughput: {stats['queries'] / seconds * 60:.1f} queries/min, {stats['contractors'] / seconds:.2f} contractors/s over {seconds:.1f}s")
+    summary = latency.summary()
+    if summary["count"]:
+        print(f"Query latency: p50 {summary['p50']:.2f}s, p95 {summary['p95']:.2f}s, p99 {summary['p99']:.2f}s, max {summary['max']:.2f}s")
+    # Per-stage timings recorded by the search pipeline spans (see metrics.py)
+    rows = [(name[:-len(".duration_ms")], summary) for name, summary in stages.items() if name.endswith(".duration_ms")]
+    if rows:
+        print(f"\n{'stage':<24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage, summary in sorted(rows):
+            print(f"{stage:<24} {summary['count']:>7} {summary['p50']:>9.0f} {summary['p95']:>9.0f} {summary['p99']:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run contractor searches for every row of a CSV")
+    parser.add_argument("queries", help="CSV with service_type, location and optional max_results columns")
+    parser.add_argument("--output", required=True, help="output .jsonl file or .parquet directory")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="output format (default: from the output extension)")
+    parser.add_argument("--checkpoint", help="file of finished queries (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="queries run at the same time")
+    parser.add_argument("--rate", type=float, default=0.0, help="maximum queries started per minute (0 = no limit)")
+    parser.add_argument("--max-results", type=int, default=DEFAULT_MAX_RESULTS, help="contractors per query when the CSV has no max_results")
+    parser.add_argument("--scoring", choices=("llm", "local"), default="llm", help="SantoScore by grok-4 or the local engine")
+    parser.add_argument("--skip-reviews", action="store_true", help="fast mode without review validation")
+    parser.add_argument("--lazy-reviews", action="store_true", help="contractor details and overall ratings only")
+    parser.add_argument("--single-pass", action="store_true", help="search and score in one structured call")
+    parser.add_argument("--sharded", action="store_true", help="split large searches into parallel requests")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the search, score and contractor caches")
+    parser.add_argument("--verbose", action="store_true", help="print the status updates of every search")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    output_format = args.format or ("parquet" if args.output.rstrip("/\\").endswith(".parquet") else "jsonl")
+    queries = read_queries(args.queries, args.max_results)
+    if not queries:
+        print(f"No queries in {args.queries}")
+        return 1
+
+    writer = open_writer(args.output, output_format)
+    if writer is None:
+        return 2
+    if args.no_cache:
+        grok_search = GrokContractorSearch()
+    else:
+        grok_search = GrokContractorSearch(cache=SearchCache(), score_cache=ScoreCache(), store=ContractorStore())
+    options = {
+        "skip_reviews": args.skip_reviews,
+        "scoring": args.scoring,
+        "lazy_reviews": args.lazy_reviews,
+        "single_pass": args.single_pass,
+        "sharded": args.sharded and not args.single_pass,
+    }
+    runner = BatchRunner(
+        grok_search, writer, args.checkpoint or args.output.rstrip("/\\") + ".checkpoint",
+        workers=args.workers, rate_per_minute=args.rate, options=options, verbose=args.verbose
+    )
+    print(f"Running {len(queries)} queries with {runner.workers} workers, writing {output_format} to {args.output}")
+    if runner.workers > grok_search.limiter.max_concurrent:
+        print(f"Note: only {grok_search.limiter.max_concurrent} searches run at a time (GROK_MAX_CONCURRENT_SEARCHES), the other workers wait for a slot")
+
+    try:
+        stats = runner.run(queries)
+    except KeyboardInterrupt:
+        print("\nInterrupted - finished queries are checkpointed, run again to continue")
+        return 130
+    finally:
+        writer.close()
+    print_stats(stats, runner.latency, grok_search.metrics.snapshot()["histograms"])
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional
+from models import Contractor, Review
+from entity_resolution import blocking_keys, review_key
+
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+# Trade words share a stem across forms ("plumber", "plumbing", "plumbers")
+STEM_SUFFIXES = ("ers", "ors", "ing", "er", "or", "s")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS contractors (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        email TEXT NOT NULL,
+        website TEXT NOT NULL,
+        address TEXT NOT NULL,
+        services TEXT NOT NULL,
+        rating TEXT NOT NULL,
+        description TEXT NOT NULL,
+        license_status TEXT NOT NULL,
+        quality_score REAL NOT NULL,
+        score_explanation TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL
+    )""",
+    # Blocking keys (see entity_resolution.blocking_keys) -> contractor
+    """CREATE TABLE IF NOT EXISTS contractor_keys (
+        key TEXT PRIMARY KEY,
+        contractor_id INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER PRIMARY KEY,
+        contractor_id INTEGER NOT NULL,
+        review_key TEXT NOT NULL,
+        reviewer_name TEXT NOT NULL,
+        rating TEXT NOT NULL,
+        review_text TEXT NOT NULL,
+        date TEXT NOT NULL,
+        source TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        UNIQUE (contractor_id, review_key)
+    )""",
+    # Searches each contractor was found by
+    """CREATE TABLE IF NOT EXISTS contractor_searches (
+        contractor_id INTEGER NOT NULL,
+        service_type TEXT NOT NULL,
+        location TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        PRIMARY KEY (contractor_id, service_type, location)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_contractor_keys_contractor ON contractor_keys (contractor_id)",
+)
+
+FTS_SCHEMA = """CREATE VIRTUAL TABLE IF NOT EXISTS contractors_fts USING fts5(
+    name, services, description, address, queries, tokenize = 'unicode61'
+)"""
+
+CONTRACTOR_FIELDS = "name, phone, email, website, address, services, rating, description, license_status, quality_score, score_explanation"
+CONTRACTOR_COLUMNS = "id, " + CONTRACTOR_FIELDS
+
+
+def normalize_query_text(text: str) -> str:
+    """
+    Lowercase and collapse whitespace, like result_cache.normalize_search_key
+    """
+    return re.sub(r'\s+', ' ', (text or "").strip().lower())
+
+
+def stem(token: str) -> str:
+    """
+    Strip a common trade-word suffix, keeping at least 4 characters
+    """
+    for suffix in STEM_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def fts_terms(text: str, stemmed: bool = False) -> str:
+    """
+    Build an FTS5 "any of these prefixes" expression, e.g. '("plumb"* OR "austin"*)'
+    """
+    tokens = SEARCH_TOKEN_PATTERN.findall((text or "").lower())
+    if stemmed:
+        tokens = [stem(token) for token in tokens]
+    tokens = list(dict.fromkeys(tokens))
+    if not tokens:
+        return ""
+    return "(" + " OR ".join(f'"{token}"*' for token in tokens) + ")"
+
+
+class ContractorStore:
+    """
+    Persistent SQLite knowledge base of every contractor and review ever parsed,
+    with first-seen/last-seen timestamps and full-text search (FTS5 when the
+    SQLite build has it, LIKE matching otherwise). Records are matched on the
+    same blocking keys as entity_resolution, so a refresh updates them in place.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("CONTRACTOR_STORE_PATH", "contractor_store.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            try:
+                self._conn.execute(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                print(f"FTS5 not available, contractor store falls back to LIKE search: {e}")
+                self.fts = False
+
+    def upsert(self, contractors: List[Contractor], service_type: str = "", location: str = "") -> int:
+        """
+        Insert new contractors and update known ones (non-empty fresh values win,
+        new reviews are added, last_seen is bumped). Returns the number of new contractors.
+        """
+        if not contractors:
+            return 0
+        service_type = normalize_query_text(service_type)
+        location = normalize_query_text(location)
+        now = time.time()
+        added = 0
+        try:
+            with self._lock, self._conn:
+                for contractor in contractors:
+                    contractor_id, is_new = self._upsert_contractor(contractor, now)
+                    added += is_new
+                    self._upsert_reviews(contractor_id, contractor.reviews, now)
+                    if service_type:
+                        self._conn.execute(
+                            """INSERT INTO contractor_searches (contractor_id, service_type, location, first_seen, last_seen)
+                            VALUES (?, ?, ?, ?, ?)
+                            ON CONFLICT (contractor_id, service_type, location) DO UPDATE SET last_seen = excluded.last_seen""",
+                            (contractor_id, service_type, location, now, now)
+                        )
+                    self._index(contractor_id)
+        except Exception as e:
+            print(f"Error writing contractor store: {e}")
+        return added
+
+    def _upsert_contractor(self, contractor: Contractor, now: float):
+        """
+        Insert or update one contractor row and its blocking keys (call with the lock held)
+        """
+        keys = blocking_keys(contractor)
+        placeholders = ",".join("?" * len(keys))
+        ids = sorted({row[0] for row in self._conn.execute(
+            f"SELECT contractor_id FROM contractor_keys WHERE key IN ({placeholders})", keys
+        )}) if keys else []
+
+        fields = (
+            contractor.name, contractor.phone or "", contractor.email or "", contractor.website or "",
+            contractor.address or "", contractor.services or "", contractor.rating or "",
+            contractor.description or "", contractor.license_status or ""
+        )
+        if not ids:
+            cursor = self._conn.execute(
+                f"""INSERT INTO contractors ({CONTRACTOR_FIELDS}, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (*fields, contractor.quality_score or 0.0, contractor.score_explanation or "", now, now)
+            )
+            contractor_id, is_new = cursor.lastrowid, True
+        else:
+            contractor_id, is_new = ids[0], False
+            for other in ids[1:]:
+                self._merge_rows(contractor_id, other)
+            self._conn.execute(
+                """UPDATE contractors SET
+                    name = COALESCE(NULLIF(?, ''), name), phone = COALESCE(NULLIF(?, ''), phone),
+                    email = COALESCE(NULLIF(?, ''), email), website = COALESCE(NULLIF(?, ''), website),
+                    address = COALESCE(NULLIF(?, ''), address), services = COALESCE(NULLIF(?, ''), services),
+                    rating = COALESCE(NULLIF(?, ''), rating), description = COALESCE(NULLIF(?, ''), description),
+                    license_status = COALESCE(NULLIF(?, ''), license_status),
+                    quality_score = CASE WHEN ? > 0 THEN ? ELSE quality_score END,
+                    score_explanation = CASE WHEN ? > 0 THEN ? ELSE score_explanation END,
+                    last_seen = ?
+                WHERE id = ?""",
+                (*fields, contractor.quality_score, contractor.quality_score,
+                 contractor.quality_score, contractor.score_explanation or "", now, contractor_id)
+            )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO contractor_keys (key, contractor_id) VALUES (?, ?)",
+            [(key, contractor_id) for key in keys]
+        )
+        return contractor_id, is_new
+
+    def _merge_rows(self, contractor_id: int, other: int):
+        """
+        Fold a stored contractor that turned out to be the same business into contractor_id
+        """
+        self._conn.execute("UPDATE OR IGNORE reviews SET contractor_id = ? WHERE contractor_id = ?", (contractor_id, other))
+        self._conn.execute("UPDATE OR IGNORE contractor_searches SET contractor_id = ? WHERE contractor_id = ?", (contractor_id, other))
+        self._conn.execute("UPDATE contractor_keys SET contractor_id = ? WHERE contractor_id = ?", (contractor_id, other))
+        self._conn.execute(
+            "UPDATE contractors SET first_seen = MIN(first_seen, (SELECT first_seen FROM contractors WHERE id = ?)) WHERE id = ?",
+            (other, contractor_id)
+        )
+        for table in ("reviews", "contractor_searches"):
+            self._conn.execute(f"DELETE FROM {table} WHERE contractor_id = ?", (other,))
+        self._conn.execute("DELETE FROM contractors WHERE id = ?", (other,))
+        if self.fts:
+            self._conn.execute("DELETE FROM contractors_fts WHERE rowid = ?", (other,))
+
+    def _upsert_reviews(self, contractor_id: int, reviews: List[Review], now: float):
+        rows = []
+        for review in reviews or []:
+            key = hashlib.sha1("\x1f".join(review_key(review)).encode("utf-8")).hexdigest()
+            rows.append((contractor_id, key, review.reviewer_name or "", review.rating or "", review.review_text or "",
+                         review.date or "", review.source or "", now, now))
+        self._conn.executemany(
+            """INSERT INTO reviews (contractor_id, review_key, reviewer_name, rating, review_text, date, source, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (contractor_id, review_key) DO UPDATE SET last_seen = excluded.last_seen""",
+            rows
+        )
+
+    def _index(self, contractor_id: int):
+        """
+        Refresh the full-text row of a contractor (call with the lock held)
+        """
+        if not self.fts:
+            return
+        row = self._conn.execute(
+            """SELECT c.name, c.services, c.description, c.address,
+                (SELECT group_concat(service_type || ' ' || location, ' | ') FROM contractor_searches WHERE contractor_id = c.id)
+            FROM contractors c WHERE c.id = ?""",
+            (contractor_id,)
+        ).fetchone()
+        self._conn.execute("DELETE FROM contractors_fts WHERE rowid = ?", (contractor_id,))
+        self._conn.execute(
+            "INSERT INTO contractors_fts (rowid, name, services, description, address, queries) VALUES (?, ?, ?, ?, ?, ?)",
+            (contractor_id, *row[:4], row[4] or "")
+        )
+
+    def search(self, service_type: str, location: str = "", limit: int = 15) -> List[Contractor]:
+        """
+        Return the best stored matches for a search: the service terms must match the
+        name, services, description or earlier searches, and the location terms (if any)
+        the address or earlier searches. Best text match first, then SantoScore.
+        """
+        service_terms = fts_terms(service_type, stemmed=True)
+        if not service_terms:
+            return []
+        try:
+            with self._lock:
+                if self.fts:
+                    query = f"{{name services description queries}} : {service_terms}"
+                    location_terms = fts_terms(location)
+                    if location_terms:
+                        query += f" AND {{address queries}} : {location_terms}"
+                    rows = self._conn.execute(
+                        f"""SELECT {', '.join('c.' + column for column in CONTRACTOR_COLUMNS.split(', '))}
+                        FROM contractors_fts JOIN contractors c ON c.id = contractors_fts.rowid
+                        WHERE contractors_fts MATCH ?
+                        ORDER BY bm25(contractors_fts), c.quality_score DESC
+                        LIMIT ?""",
+                        (query, limit)
+                    ).fetchall()
+                else:
+                    patterns = [f"%{stem(token)}%" for token in SEARCH_TOKEN_PATTERN.findall(service_type.lower())]
+                    condition = " OR ".join("(name LIKE ? OR services LIKE ? OR description LIKE ?)" for _ in patterns)
+                    rows = self._conn.execute(
+                        f"SELECT {CONTRACTOR_COLUMNS} FROM contractors WHERE {condition} ORDER BY quality_score DESC LIMIT ?",
+                        (*[pattern for pattern in patterns for _ in range(3)], limit)
+                    ).fetchall()
+                reviews = self._load_reviews([row[0] for row in rows])
+            return [self._row_to_contractor(row, reviews.get(row[0], [])) for row in rows]
+        except Exception as e:
+            print(f"Error searching contractor store: {e}")
+            return []
+
+    def _load_reviews(self, contractor_ids: List[int]) -> Dict[int, List[Review]]:
+        reviews = {}
+        if not contractor_ids:
+            return reviews
+        placeholders = ",".join("?" * len(contractor_ids))
+        for contractor_id, reviewer_name, rating, review_text, date, source in self._conn.execute(
+            f"""SELECT contractor_id, reviewer_name, rating, review_text, date, source FROM reviews
+            WHERE contractor_id IN ({placeholders}) ORDER BY contractor_id, id""",
+            contractor_ids
+        ):
+            reviews.setdefault(contractor_id, []).append(
+                Review(reviewer_name=reviewer_name, rating=rating, review_text=review_text, date=date, source=source)
+            )
+        return reviews
+
+    def _row_to_contractor(self, row, reviews: List[Review]) -> Contractor:
+        _, name, phone, email, website, address, services, rating, description, license_status, quality_score, score_explanation = row
+        return Contractor(
+            name=name, phone=phone, email=email, website=website, address=address, services=services,
+            rating=rating, description=description, license_status=license_status, reviews=reviews,
+            quality_score=quality_score, score_explanation=score_explanation
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the number of stored contractors, reviews and searches
+        """
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("contractors", "reviews", "contractor_searches")
+            }
+
+
+class BackgroundRefresher:
+    """
+    Runs slow refreshes (e.g. a Grok search behind an instant local answer) on a
+    small thread pool, at most one running per key. A finished result can be read
+    by every session waiting on that key until it is result_ttl seconds old.
+    """
+
+    def __init__(self, max_workers: int = None, result_ttl: float = None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or int(os.getenv("REFRESH_WORKERS", 2)), thread_name_prefix="refresh")
+        self.result_ttl = result_ttl if result_ttl is not None else float(os.getenv("REFRESH_RESULT_TTL", 600))
+        self._lock = threading.Lock()
+        # key -> (future, submitted at)
+        self._futures = {}
+
+    def _expire(self):
+        """
+        Drop finished refreshes older than result_ttl that nobody collected (call with the lock held)
+        """
+        cutoff = time.monotonic() - self.result_ttl
+        for key in [key for key, (future, submitted) in self._futures.items() if submitted < cutoff and future.done()]:
+            del self._futures[key]
+
+    def submit(self, key: str, func, *args, **kwargs) -> bool:
+        """
+        Start func(*args, **kwargs) unless a refresh for key is still running
+        (a finished one is replaced by the new refresh)
+        """
+        with self._lock:
+            self._expire()
+            entry = self._futures.get(key)
+            if entry is not None and not entry[0].done():
+                return False
+            self._futures[key] = (self._pool.submit(func, *args, **kwargs), time.monotonic())
+            return True
+
+    def pending(self, key: str) -> bool:
+        with self._lock:
+            entry = self._futures.get(key)
+        return entry is not None and not entry[0].done()
+
+    def result(self, key: str) -> Optional[Any]:
+        """
+        Read a finished refresh without collecting it, so every session waiting on key
+        gets it: its result, or None if it failed, is still running, has expired or is unknown
+        """
+        with self._lock:
+            self._expire()
+            entry = self._futures.get(key)
+        if entry is None or not entry[0].done():
+            return None
+        return self._outcome(entry[0])
+
+    def pop(self, key: str, timeout: float = None) -> Optional[Any]:
+        """
+        Collect a refresh that only one caller waits for, waiting up to timeout seconds
+        if it is still running: its result, or None if it failed, is still running or is unknown
+        """
+        with self._lock:
+            entry = self._futures.get(key)
+        if entry is None:
+            return None
+        if timeout:
+            wait([entry[0]], timeout)
+        with self._lock:
+            if not entry[0].done() or self._futures.get(key) is not entry:
+                return None
+            del self._futures[key]
+        return self._outcome(entry[0])
+
+    def discard(self, prefix: str) -> int:
+        """
+        Forget every refresh whose key starts with prefix (running ones finish unobserved,
+        queued ones are cancelled) and return how many were dropped
+        """
+        with self._lock:
+            keys = [key for key in self._futures if key.startswith(prefix)]
+            for key in keys:
+                self._futures.pop(key)[0].cancel()
+        return len(keys)
+
+    def _outcome(self, future) -> Optional[Any]:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error in background refresh: {e}")
+            return None
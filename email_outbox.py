@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import smtplib
+import threading
+from email.message import Message
+from email.utils import getaddresses
+from typing import List, Dict, Any, Optional
+
+# Delivery statuses
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+# Failures of the connection itself rather than of one message
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
+    smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError
+)
+
+
+class EmailOutbox:
+    """
+    Persistent SQLite queue of outgoing emails with a background sender.
+
+    enqueue() only writes the message to the queue and returns its id. A daemon
+    worker claims due messages in batches, sends them over one reused,
+    authenticated SMTP connection (reconnecting when the server drops it),
+    retries temporary failures with exponential backoff and records the delivery
+    status of every message. Messages left "sending" by a crash are retried on start.
+
+    With a digest_builder and a digest_window, add_to_digest() collects payloads
+    per digest and the worker turns each digest into one message once its oldest
+    entry is digest_window seconds old (or it holds digest_max_items entries).
+    """
+
+    def __init__(self, path: str = None, smtp_server: str = None, smtp_port: int = None, sender_email: str = None,
+                 sender_password: str = None, use_tls: bool = None, batch_size: int = None, max_attempts: int = None,
+                 retry_delay: float = None, idle_timeout: float = None, digest_builder=None, digest_window: float = None,
+                 digest_max_items: int = None):
+        self.path = path or os.getenv("OUTBOX_PATH", "email_outbox.db")
+        self.smtp_server = smtp_server or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.smtp_port = smtp_port or int(os.getenv("SMTP_PORT", 587))
+        self.sender_email = sender_email if sender_email is not None else os.getenv("SENDER_EMAIL")
+        self.sender_password = sender_password if sender_password is not None else os.getenv("SENDER_PASSWORD")
+        # STARTTLS can only be turned off for local test servers (SMTP_STARTTLS=0)
+        self.use_tls = use_tls if use_tls is not None else os.getenv("SMTP_STARTTLS", "1").lower() not in ("0", "false", "no", "off")
+        # Messages sent per claim, attempts before a message is marked failed, first retry delay in seconds
+        self.batch_size = batch_size or int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+        self.max_attempts = max_attempts or int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+        self.retry_delay = retry_delay if retry_delay is not None else float(os.getenv("OUTBOX_RETRY_DELAY", 5))
+        # The SMTP connection is closed after this many idle seconds
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv("OUTBOX_IDLE_TIMEOUT", 60))
+        # digest_builder(digest, payloads) -> Message; a window of 0 turns digests off
+        self.digest_builder = digest_builder
+        self.digest_window = digest_window if digest_window is not None else float(os.getenv("OUTBOX_DIGEST_WINDOW", 0))
+        self.digest_max_items = digest_max_items or int(os.getenv("OUTBOX_DIGEST_MAX_ITEMS", 50))
+
+        self.connections = 0
+        self._smtp = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY,
+                    sender TEXT NOT NULL,
+                    recipients TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    sent_at REAL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS digest_items (
+                    id INTEGER PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            # Recover messages claimed by a worker that died mid-batch
+            self._conn.execute("UPDATE outbox SET status = ? WHERE status = ?", (PENDING, SENDING))
+
+    def enqueue(self, message: Message, recipients: List[str] = None) -> Optional[int]:
+        """
+        Queue a message for background delivery and return its id (None if it could not be queued).
+        Recipients default to the To, Cc and Bcc headers.
+        """
+        try:
+            with self._lock, self._conn:
+                message_id = self._insert(message, recipients)
+        except Exception as e:
+            print(f"Error queueing email: {e}")
+            return None
+        self._wake.set()
+        return message_id
+
+    def _insert(self, message: Message, recipients: List[str] = None) -> int:
+        """
+        Insert a pending message (call with the lock held, inside a transaction)
+        """
+        if recipients is None:
+            recipients = [address for _, address in getaddresses(message.get_all("To", []) + message.get_all("Cc", []) + message.get_all("Bcc", [])) if address]
+        if not recipients:
+            raise ValueError("no recipients")
+        sender = message.get("From") or self.sender_email
+        now = time.time()
+        cursor = self._conn.execute(
+            """INSERT INTO outbox (sender, recipients, subject, message, status, attempts, next_attempt_at, last_error, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 0, ?, '', ?, ?)""",
+            (sender, json.dumps(recipients), str(message.get("Subject", "")), message.as_string(), PENDING, now, now, now)
+        )
+        return cursor.lastrowid
+
+    def add_to_digest(self, digest: str, payload: Dict[str, Any]) -> bool:
+        """
+        Collect a JSON-serializable payload for the next message of a digest.
+        Returns False if it could not be stored.
+        """
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO digest_items (digest, payload, created_at) VALUES (?, ?, ?)",
+                    (digest, json.dumps(payload), time.time())
+                )
+            return True
+        except Exception as e:
+            print(f"Error adding to email digest: {e}")
+            return False
+
+    def flush_digests(self, force: bool = False) -> int:
+        """
+        Turn every due digest (or every digest, with force) into one queued message.
+        Returns the number of messages queued.
+        """
+        if self.digest_builder is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            due = [digest for digest, oldest, count in self._conn.execute(
+                "SELECT digest, MIN(created_at), COUNT(*) FROM digest_items GROUP BY digest"
+            ) if force or now - oldest >= self.digest_window or count >= self.digest_max_items]
+
+        queued = 0
+        for digest in due:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, payload FROM digest_items WHERE digest = ? ORDER BY id LIMIT ?", (digest, self.digest_max_items)
+                ).fetchall()
+            if not rows:
+                continue
+            try:
+                message = self.digest_builder(digest, [json.loads(payload) for _, payload in rows])
+                # The message and the removal of its entries commit together
+                with self._lock, self._conn:
+                    self._insert(message)
+                    self._conn.executemany("DELETE FROM digest_items WHERE id = ?", [(row[0],) for row in rows])
+                queued += 1
+            except Exception as e:
+                print(f"Error building email digest {digest}: {e}")
+        return queued
+
+    def digest_size(self, digest: str) -> int:
+        """
+        Return the number of entries waiting for the next message of a digest
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM digest_items WHERE digest = ?", (digest,)).fetchone()[0]
+
+    def status(self, message_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the delivery status of a queued message, or None if it is unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, last_error, created_at, sent_at FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": message_id, "status": row[0], "attempts": row[1], "last_error": row[2], "created_at": row[3], "sent_at": row[4]}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of messages per status and the SMTP connections opened so far
+        """
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        counts["connections"] = self.connections
+        return counts
+
+    def start(self) -> "EmailOutbox":
+        """
+        Start the background sender (once)
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the background sender and close the SMTP connection
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._disconnect()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.flush_digests()
+                if self.process_pending():
+                    continue
+            except Exception as e:
+                print(f"Error in email outbox worker: {e}")
+            if self._smtp is not None and time.time() - self._last_used > self.idle_timeout:
+                self._disconnect()
+            self._wake.wait(self._seconds_until_due())
+            self._wake.clear()
+
+    def _seconds_until_due(self) -> float:
+        """
+        Sleep until the next retry is due (at most 1 second, so idle connections get closed)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)).fetchone()
+        if row[0] is None:
+            return 1.0
+        return min(1.0, max(0.0, row[0] - time.time()))
+
+    def process_pending(self) -> int:
+        """
+        Send one batch of due messages on the calling thread and return how many were attempted
+        """
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+
+        for position, (message_id, sender, recipients, message, attempts) in enumerate(batch):
+            try:
+                self._send(sender, json.loads(recipients), message)
+                self._mark(message_id, SENT, attempts + 1, "")
+            except smtplib.SMTPRecipientsRefused as e:
+                self._mark(message_id, FAILED, attempts + 1, f"Recipients refused: {e.recipients!r}")
+            except CONNECTION_ERRORS as e:
+                self._connection_failed(batch, position, e)
+                break
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code >= 500:
+                    # Permanent rejection (message refused)
+                    self._mark(message_id, FAILED, attempts + 1, f"{e.smtp_code} {e.smtp_error!r}")
+                else:
+                    self._retry(message_id, attempts + 1, e)
+            except smtplib.SMTPException as e:
+                self._retry(message_id, attempts + 1, e)
+            except OSError as e:
+                # Socket errors (SMTPException is an OSError too, so this comes last)
+                self._connection_failed(batch, position, e)
+                break
+        return len(batch)
+
+    def _connection_failed(self, batch, position: int, error: Exception):
+        """
+        Drop the connection, retry the failed message later and release the rest of the batch untouched
+        """
+        self._disconnect()
+        message_id, attempts = batch[position][0], batch[position][4]
+        self._retry(message_id, attempts + 1, error)
+        for remaining in batch[position + 1:]:
+            self._mark(remaining[0], PENDING, remaining[4], "")
+
+    def _claim_batch(self):
+        now = time.time()
+        with self._lock, self._conn:
+            batch = self._conn.execute(
+                """SELECT id, sender, recipients, message, attempts FROM outbox
+                WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?""",
+                (PENDING, now, self.batch_size)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                [(SENDING, now, row[0]) for row in batch]
+            )
+        return batch
+
+    def _mark(self, message_id: int, status: str, attempts: int, error: str, next_attempt_at: float = None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """UPDATE outbox SET status = ?, attempts = ?, last_error = ?, updated_at = ?,
+                    next_attempt_at = COALESCE(?, next_attempt_at), sent_at = CASE WHEN ? = ? THEN ? ELSE sent_at END
+                WHERE id = ?""",
+                (status, attempts, error, now, next_attempt_at, status, SENT, now, message_id)
+            )
+
+    def _retry(self, message_id: int, attempts: int, error: Exception):
+        """
+        Schedule another attempt with exponential backoff and jitter, or give up after max_attempts
+        """
+        print(f"Error sending email {message_id} (attempt {attempts}): {error}")
+        if attempts >= self.max_attempts:
+            self._mark(message_id, FAILED, attempts, str(error))
+            return
+        delay = self.retry_delay * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+        self._mark(message_id, PENDING, attempts, str(error), time.time() + delay)
+
+    def _send(self, sender: str, recipients: List[str], message: str):
+        smtp = self._connection()
+        try:
+            smtp.sendmail(sender, recipients, message.encode("utf-8"))
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle connection: reconnect once
+            self._disconnect()
+            smtp = self._connection()
+            smtp.sendmail(sender, recipients, message.encode("utf-8"))
+        self._last_used = time.time()
+
+    def _connection(self) -> smtplib.SMTP:
+        """
+        Return the open SMTP connection, connecting and logging in first if needed
+        """
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+            try:
+                smtp.ehlo()
+                if self.use_tls:
+                    smtp.starttls()
+                    smtp.ehlo()
+                if self.sender_email and self.sender_password:
+                    smtp.login(self.sender_email, self.sender_password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
@@ -0,0 +1,297 @@
+import html
+import time
+from string import Template
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import List, Dict, Any, Optional
+
+# Templates are compiled once at import; every value is escaped before substitution
+
+CARD_STYLE = "background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);"
+
+PAGE_HTML = Template("""<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px;">
+        <h2 style="color: #007bff; text-align: center; border-bottom: 3px solid #007bff; padding-bottom: 10px;">
+            $title
+        </h2>
+        $body
+        <div style="text-align: center; margin-top: 30px;">
+            <p style="background-color: #007bff; color: white; padding: 15px; border-radius: 8px; margin: 20px 0;">
+                <strong>Please follow up with $follow_up regarding their service needs.</strong>
+            </p>
+            <p style="font-size: 0.9em; color: #666;">
+                This quote request was generated via <strong>SantoScore</strong> - Your trusted contractor search platform
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+CONTRACTOR_HTML = Template(f"""
+<div style="{CARD_STYLE}">
+    <h3 style="color: #28a745; margin-top: 0;">📋 Contractor Information</h3>
+    <p><strong>Business Name:</strong> $contractor_name</p>
+    $rows
+</div>
+""")
+
+# Optional contractor rows: (field, template); a row is left out when the field is empty
+CONTRACTOR_ROWS_HTML = (
+    ("phone", Template('<p><strong>Phone:</strong> $value</p>')),
+    ("email", Template('<p><strong>Email:</strong> $value</p>')),
+    ("website", Template('<p><strong>Website:</strong> <a href="$value" target="_blank">$value</a></p>')),
+    ("address", Template('<p><strong>Address:</strong> $value</p>')),
+    ("license_status", Template('<p><strong>License Status:</strong> <span style="color: #28a745; font-weight: bold;">$value</span></p>')),
+    ("services", Template('<p><strong>Services Offered:</strong> $value</p>')),
+    ("quality_score", Template('<p><strong>Quality Score:</strong> <span style="color: #007bff; font-weight: bold; font-size: 1.1em;">$value/10</span></p>')),
+    ("rating", Template('<p><strong>Overall Rating:</strong> <span style="color: #ffc107; font-weight: bold;">$value</span></p>')),
+)
+
+NO_BUSINESS_EMAIL_HTML = '<p style="color: #dc3545; font-weight: bold;">Note: This business could not be emailed directly as no business email was found.</p>'
+
+SEARCH_HTML = Template(f"""
+<div style="{CARD_STYLE}">
+    <h3 style="color: #17a2b8; margin-top: 0;">🔍 Search Details</h3>
+    <div style="display: flex; justify-content: space-between; flex-wrap: wrap; gap: 15px;">
+        <div style="flex: 1; min-width: 150px;">
+            <p style="margin: 0;"><strong>Service Type:</strong></p>
+            <p style="background-color: #e3f2fd; padding: 8px; border-radius: 5px; margin: 5px 0; color: #1565c0; font-weight: bold;">$service_type</p>
+        </div>
+        <div style="flex: 1; min-width: 150px;">
+            <p style="margin: 0;"><strong>Location:</strong></p>
+            <p style="background-color: #e8f5e8; padding: 8px; border-radius: 5px; margin: 5px 0; color: #2e7d32; font-weight: bold;">$location</p>
+        </div>
+        <div style="flex: 1; min-width: 150px;">
+            <p style="margin: 0;"><strong>Results Found:</strong></p>
+            <p style="background-color: #fff3e0; padding: 8px; border-radius: 5px; margin: 5px 0; color: #ef6c00; font-weight: bold;">$results contractors</p>
+        </div>
+    </div>
+    <div style="margin-top: 15px; text-align: center;">
+        <p style="margin: 0; color: #666; font-size: 0.9em;">
+            <strong>Search performed on:</strong> $search_timestamp
+        </p>
+    </div>
+</div>
+""")
+
+CUSTOMER_HTML = Template(f"""
+<div style="{CARD_STYLE}">
+    <h3 style="color: #dc3545; margin-top: 0;">👤 Customer Information</h3>
+    <p><strong>Customer Email:</strong> <a href="mailto:$user_email">$user_email</a></p>
+    <p><strong>Service Request:</strong></p>
+    <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; border-radius: 4px; margin: 10px 0;">
+        <em>"$problem_statement"</em>
+    </div>
+</div>
+""")
+
+DESCRIPTION_HTML = Template(f"""
+<div style="{CARD_STYLE}">
+    <h3 style="color: #6f42c1; margin-top: 0;">📝 Business Description</h3>
+    <p>$description</p>
+</div>
+""")
+
+SETTINGS_HTML = Template("""
+<div style="background-color: #e9ecef; padding: 15px; border-radius: 8px; margin: 20px 0;">
+    <p style="margin: 0;"><strong>Quote Request Settings:</strong></p>
+    <p style="margin: 5px 0; color: $color;">
+        Send to Business: <strong>$label</strong>
+    </p>
+</div>
+""")
+
+DIGEST_ITEM_HTML = Template("""
+<h3 style="color: #007bff; border-top: 2px solid #007bff; padding-top: 15px;">Request $number of $total &middot; $contractor_name &middot; $received_at</h3>
+$body
+""")
+
+QUOTE_TEXT = Template("""New Quote Request via SantoScore
+================================
+
+$request
+
+Please follow up with this customer regarding their service needs.
+
+This quote request was generated via SantoScore - Your trusted contractor search platform
+""")
+
+DIGEST_TEXT = Template("""$total New Quote Requests via SantoScore
+$underline
+
+$requests
+
+Please follow up with these customers regarding their service needs.
+
+This digest was generated via SantoScore - Your trusted contractor search platform
+""")
+
+REQUEST_TEXT = Template("""CONTRACTOR INFORMATION:
+-----------------------
+Business Name: $contractor_name
+$contractor_rows
+$search_section
+CUSTOMER INFORMATION:
+---------------------
+Customer Email: $user_email
+Service Request: $problem_statement
+$description_section
+QUOTE REQUEST SETTINGS:
+-----------------------
+Send to Business: $send_to_business""")
+
+CONTRACTOR_ROWS_TEXT = (
+    ("phone", "Phone"), ("email", "Email"), ("website", "Website"), ("address", "Address"),
+    ("license_status", "License Status"), ("services", "Services"), ("quality_score", "Quality Score"),
+    ("rating", "Overall Rating"),
+)
+
+SEARCH_TEXT = Template("""
+SEARCH DETAILS:
+---------------
+Service Type: $service_type
+Location: $location
+Results Found: $results contractors
+Search performed on: $search_timestamp
+""")
+
+DESCRIPTION_TEXT = Template("""
+BUSINESS DESCRIPTION:
+--------------------
+$description
+""")
+
+
+def quote_context(contractor_name: str, contractor_email: Optional[str], user_email: str, problem_statement: str,
+                  send_to_business: bool, contractor_details=None, search_params: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Collect everything a quote email shows into a JSON-serializable dict
+    (so digest entries can wait in the outbox)
+    """
+    contractor = None
+    if contractor_details is not None:
+        contractor = {key: value for key, value in contractor_details.to_dict().items() if key != "reviews"}
+        if contractor.get("quality_score") is not None:
+            contractor["quality_score"] = f"{contractor['quality_score']:.1f}"
+    return {
+        "contractor_name": contractor_name,
+        "contractor_email": contractor_email or "",
+        "user_email": user_email,
+        "problem_statement": problem_statement,
+        "send_to_business": bool(send_to_business),
+        "contractor": contractor,
+        "search_params": dict(search_params) if search_params else None,
+        "received_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _search_values(search_params: Dict[str, Any], escape) -> Dict[str, str]:
+    return {
+        "service_type": escape(search_params.get("service_type", "N/A")),
+        "location": escape(search_params.get("location", "N/A")),
+        "results": escape(search_params.get("actual_results", search_params.get("max_results", "N/A"))),
+        "search_timestamp": escape(search_params.get("search_timestamp", "N/A")),
+    }
+
+
+def _escape(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _plain(value) -> str:
+    return str(value)
+
+
+def render_quote_body_html(context: Dict[str, Any]) -> str:
+    """
+    Render the contractor, search, customer, description and settings cards of one request
+    """
+    contractor = context.get("contractor") or {}
+    rows = [template.substitute(value=_escape(contractor[field])) for field, template in CONTRACTOR_ROWS_HTML if contractor.get(field)]
+    if not context.get("contractor_email"):
+        rows.append(NO_BUSINESS_EMAIL_HTML)
+
+    parts = [CONTRACTOR_HTML.substitute(contractor_name=_escape(context["contractor_name"]), rows="\n    ".join(rows))]
+    if context.get("search_params"):
+        parts.append(SEARCH_HTML.substitute(_search_values(context["search_params"], _escape)))
+    parts.append(CUSTOMER_HTML.substitute(user_email=_escape(context["user_email"]), problem_statement=_escape(context["problem_statement"])))
+    if contractor.get("description"):
+        parts.append(DESCRIPTION_HTML.substitute(description=_escape(contractor["description"])))
+    send_to_business = context.get("send_to_business")
+    parts.append(SETTINGS_HTML.substitute(color="#28a745" if send_to_business else "#dc3545", label="✅ Yes" if send_to_business else "❌ No"))
+    return "".join(parts)
+
+
+def render_quote_text(context: Dict[str, Any]) -> str:
+    """
+    Plain text version of one request (no escaping needed)
+    """
+    contractor = context.get("contractor") or {}
+    rows = [f"{label}: {contractor[field]}{'/10' if field == 'quality_score' else ''}" for field, label in CONTRACTOR_ROWS_TEXT if contractor.get(field)]
+    if not context.get("contractor_email"):
+        rows.append("NOTE: This business could not be emailed directly as no business email was found.")
+    return REQUEST_TEXT.substitute(
+        contractor_name=context["contractor_name"],
+        contractor_rows="\n".join(rows),
+        search_section=SEARCH_TEXT.substitute(_search_values(context["search_params"], _plain)) if context.get("search_params") else "",
+        user_email=context["user_email"],
+        problem_statement=context["problem_statement"],
+        description_section=DESCRIPTION_TEXT.substitute(description=contractor["description"]) if contractor.get("description") else "",
+        send_to_business="Yes" if context.get("send_to_business") else "No",
+    )
+
+
+def _subject_text(value: str) -> str:
+    # Header values must stay on one line
+    return " ".join(str(value).split())
+
+
+def _message(sender: str, recipients: List[str], subject: str, text_body: str, html_body: str) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['From'] = sender
+    msg['To'] = ', '.join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(text_body, 'plain'))
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def build_quote_message(sender: str, recipients: List[str], context: Dict[str, Any]) -> MIMEMultipart:
+    """
+    Build the email for a single quote request
+    """
+    return _message(
+        sender, recipients,
+        f"🔧 Quote Request for {_subject_text(context['contractor_name'])} - SantoScore",
+        QUOTE_TEXT.substitute(request=render_quote_text(context)),
+        PAGE_HTML.substitute(title="🔧 New Quote Request via SantoScore", body=render_quote_body_html(context), follow_up="this customer"),
+    )
+
+
+def build_digest_message(sender: str, recipients: List[str], contexts: List[Dict[str, Any]]) -> MIMEMultipart:
+    """
+    Build one email that lists several quote requests (see EmailOutbox.add_to_digest)
+    """
+    if len(contexts) == 1:
+        return build_quote_message(sender, recipients, contexts[0])
+    total = len(contexts)
+    html_items = [
+        DIGEST_ITEM_HTML.substitute(
+            number=number, total=total, contractor_name=_escape(context["contractor_name"]),
+            received_at=_escape(context.get("received_at", "")), body=render_quote_body_html(context)
+        )
+        for number, context in enumerate(contexts, 1)
+    ]
+    text_items = [
+        f"REQUEST {number} OF {total} ({context.get('received_at', '')})\n\n{render_quote_text(context)}"
+        for number, context in enumerate(contexts, 1)
+    ]
+    title = f"{total} New Quote Requests via SantoScore"
+    return _message(
+        sender, recipients,
+        f"🔧 {total} Quote Requests - SantoScore",
+        DIGEST_TEXT.substitute(total=total, underline="=" * len(title), requests="\n\n\n".join(text_items)),
+        PAGE_HTML.substitute(title=f"🔧 {title}", body="".join(html_items), follow_up="these customers"),
+    )
@@ -0,0 +1,182 @@
+import re
+from typing import List, Iterable
+from models import canonical_domain
+
+# Trailing words that do not distinguish one business from another
+LEGAL_SUFFIXES = frozenset("""
+llc inc co corp corporation company ltd limited incorporated pllc plc lp llp pc
+""".split())
+
+# Hosts shared by many businesses (directory listings, site builders), useless as identity keys
+SHARED_DOMAINS = frozenset("""
+facebook.com instagram.com linkedin.com twitter.com x.com youtube.com google.com goo.gl
+yelp.com bbb.org angi.com angieslist.com homeadvisor.com thumbtack.com houzz.com nextdoor.com
+yellowpages.com porch.com buildzoom.com mapquest.com business.site sites.google.com
+wixsite.com squarespace.com godaddysites.com weebly.com
+""".split())
+
+# Contact/profile fields filled in from duplicates when the kept record has them empty
+MERGE_FIELDS = ("phone", "email", "website", "address", "services", "rating", "description", "license_status")
+
+NAME_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+NON_DIGIT_PATTERN = re.compile(r'\D')
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Reduce a phone number to its 10 digits (US country code dropped), or "" if it has fewer
+    """
+    digits = NON_DIGIT_PATTERN.sub('', phone or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits if len(digits) >= 10 else ''
+
+
+def website_domain(url: str) -> str:
+    """
+    Lowercased host of a website without "www." or port, or "" for shared/unknown hosts
+    """
+    host = canonical_domain(url)
+    if not host or host in SHARED_DOMAINS or any(host.endswith('.' + shared) for shared in SHARED_DOMAINS):
+        return ''
+    return host
+
+
+def normalize_business_name(name: str) -> str:
+    """
+    Lowercase a business name, drop punctuation, a leading "the" and trailing legal suffixes
+    ("The ABC Plumbing, LLC" -> "abc plumbing")
+    """
+    tokens = NAME_TOKEN_PATTERN.findall((name or '').lower().replace('&', ' and '))
+    if len(tokens) > 1 and tokens[0] == 'the':
+        tokens = tokens[1:]
+    end = len(tokens)
+    while end > 1 and tokens[end - 1] in LEGAL_SUFFIXES:
+        end -= 1
+    return ' '.join(tokens[:end])
+
+
+def blocking_keys(contractor) -> List[str]:
+    """
+    Identity keys of a contractor; two records sharing any key are the same business
+    """
+    keys = []
+    phone = normalize_phone(contractor.phone)
+    if phone:
+        keys.append('phone:' + phone)
+    domain = website_domain(contractor.website)
+    if domain:
+        keys.append('domain:' + domain)
+    name = normalize_business_name(contractor.name)
+    if name:
+        keys.append('name:' + name)
+    return keys
+
+
+def review_key(review) -> tuple:
+    """
+    Key under which two reviews count as the same review
+    """
+    return (
+        ' '.join(NAME_TOKEN_PATTERN.findall((review.reviewer_name or '').lower())),
+        ' '.join(NAME_TOKEN_PATTERN.findall((review.review_text or '').lower())),
+    )
+
+
+def merge_into(target, other):
+    """
+    Merge a duplicate record into target in place: empty fields are filled in,
+    reviews are unioned and the higher score is kept
+    """
+    filled = False
+    for field in MERGE_FIELDS:
+        if not getattr(target, field) and getattr(other, field):
+            setattr(target, field, getattr(other, field))
+            filled = True
+    if filled:
+        # Validation flags and normalized fields are derived from the fields just filled in
+        target.normalize()
+
+    known = {review_key(review) for review in target.reviews}
+    for review in other.reviews:
+        key = review_key(review)
+        if key not in known:
+            known.add(key)
+            target.reviews.append(review)
+
+    if other.quality_score > target.quality_score:
+        target.quality_score = other.quality_score
+        target.score_explanation = other.score_explanation
+    return target
+
+
+class ContractorIndex:
+    """
+    Incremental entity-resolution index over Contractor records.
+
+    Every record is blocked on its normalized phone, website domain and name
+    (see blocking_keys). A record sharing a key with a known entity is merged
+    into it; a record that links two entities merges them (union-find), so the
+    whole result set is resolved in roughly linear time. The first record of
+    each entity is kept and updated in place.
+    """
+
+    def __init__(self, contractors: Iterable = ()):
+        self._entities = []     # entity id -> kept record (None once merged away)
+        self._parent = []       # union-find parent of each entity id
+        self._keys = {}         # blocking key -> entity id
+        for contractor in contractors:
+            self.add(contractor)
+
+    def _find(self, entity: int) -> int:
+        root = entity
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Path compression
+        while self._parent[entity] != root:
+            self._parent[entity], entity = root, self._parent[entity]
+        return root
+
+    def add(self, contractor) -> bool:
+        """
+        Add a record. Returns True if it is a new business, False if it was
+        merged into a business already in the index.
+        """
+        keys = blocking_keys(contractor)
+        roots = sorted({self._find(self._keys[key]) for key in keys if key in self._keys})
+
+        if not roots:
+            entity = len(self._entities)
+            self._entities.append(contractor)
+            self._parent.append(entity)
+            for key in keys:
+                self._keys[key] = entity
+            return True
+
+        # Keep the earliest entity and fold everything else into it
+        root = roots[0]
+        kept = self._entities[root]
+        for other in roots[1:]:
+            merge_into(kept, self._entities[other])
+            self._entities[other] = None
+            self._parent[other] = root
+        merge_into(kept, contractor)
+        for key in keys:
+            self._keys.setdefault(key, root)
+        return False
+
+    def contractors(self) -> List:
+        """
+        The resolved contractors in first-seen order
+        """
+        return [entity for entity in self._entities if entity is not None]
+
+    def __len__(self) -> int:
+        return len(self.contractors())
+
+
+def resolve_contractors(contractors: Iterable) -> List:
+    """
+    Merge duplicate contractors (same phone, website domain or normalized name)
+    """
+    return ContractorIndex(contractors).contractors()
@@ -1,139 +1,222 @@
 import os
 import re
 import json
-import requests
-from urllib.parse import urlparse
-from typing import List, Dict, Any
+import math
+import time
+import hashlib
+import contextvars
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from openai import OpenAI
 from dotenv import load_dotenv
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from models import Review, Contractor
+from response_parser import ResponseParser, CONTRACTOR_HEADER_PATTERN
+from santo_score import SantoScoreEngine
+from record_replay import wrap_client, RecordingClient, ReplayClient
+from metrics import REGISTRY
+from rate_limiter import LIMITER, AdmissionTimeout
+from entity_resolution import ContractorIndex, resolve_contractors, normalize_business_name, normalize_phone, website_domain
 
 load_dotenv()
 
-# Website validation functions
-def is_suspicious_domain(url):
-    """Check for suspicious domain patterns that indicate phishing/scam sites"""
-    if not url:
-        return True
-    
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        
-        # Common phishing indicators
-        suspicious_patterns = [
-            r'[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}',  # IP addresses
-            r'bit\.ly|tinyurl|goo\.gl|t\.co',  # URL shorteners
-            r'[a-z0-9]{20,}',  # Very long random domains
-            r'[a-z]{1,2}[0-9]{3,}',  # Short random domains
-            r'[0-9]{3,}[a-z]{1,2}',  # Number-heavy domains
-            r'[a-z]{1,2}\.[a-z]{1,2}\.[a-z]{1,2}',  # Very short subdomains
-            r'[a-z0-9]{8,}-[a-z0-9]{8,}',  # Random hash-like domains
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, domain):
-                return True
-        
-        # Check for legitimate business indicators
-        legitimate_indicators = [
-            r'\.com$', r'\.org$', r'\.net$', r'\.biz$', r'\.co$',
-            r'[a-z]{3,}\.[a-z]{2,}',  # Normal business domains
-        ]
-        
-        has_legitimate = any(re.search(pattern, domain) for pattern in legitimate_indicators)
-        return not has_legitimate
-        
-    except Exception:
-        return True
+# Point at stub_server.py (e.g. http://127.0.0.1:8765/v1) for offline runs
+GROK_BASE_URL = os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")
 
-def validate_website_safety(url):
-    """Comprehensive website safety validation"""
-    if not url:
-        return False, "No URL provided"
-    
-    # Basic URL format check
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    try:
-        parsed = urlparse(url)
-        
-        # Check for suspicious domain
-        if is_suspicious_domain(url):
-            return False, "Suspicious domain pattern detected"
-        
-        # Check for HTTPS (security requirement)
-        if not url.startswith('https://'):
-            return False, "Website must use HTTPS for security"
-        
-        # Additional checks can be added here:
-        # - SSL certificate validation
-        # - Domain age check
-        # - Reputation check
-        # - Content analysis
-        
-        return True, "Website appears safe"
-        
-    except Exception as e:
-        return False, f"URL validation error: {str(e)}"
+# Bump whenever the scoring prompt changes so cached per-contractor scores are not reused
+SCORING_PROMPT_VERSION = 2
+
+# JSON schema for single-pass search + scoring responses
+_REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reviewer_name": {"type": "string"},
+        "rating": {"type": "string"},
+        "review_text": {"type": "string"},
+        "date": {"type": "string"}
+    },
+    "required": ["reviewer_name", "rating", "review_text", "date"],
+    "additionalProperties": False
+}
+
+CONTRACTOR_RESULTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "contractors": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "phone": {"type": "string"},
+                    "email": {"type": "string"},
+                    "website": {"type": "string"},
+                    "address": {"type": "string"},
+                    "services": {"type": "string"},
+                    "rating": {"type": "string"},
+                    "description": {"type": "string"},
+                    "license_status": {"type": "string"},
+                    "reviews": {"type": "array", "items": _REVIEW_SCHEMA},
+                    "quality_score": {"type": "number"},
+                    "score_explanation": {"type": "string"}
+                },
+                "required": [
+                    "name", "phone", "email", "website", "address", "services", "rating",
+                    "description", "license_status", "reviews", "quality_score", "score_explanation"
+                ],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["contractors"],
+    "additionalProperties": False
+}
+
+# Rough share of US business names starting with each letter, used to balance name-range shards
+LETTER_WEIGHTS = {
+    "A": 9, "B": 7, "C": 8, "D": 5, "E": 4, "F": 4, "G": 4, "H": 4, "I": 2, "J": 3, "K": 3, "L": 4, "M": 7,
+    "N": 3, "O": 2, "P": 7, "Q": 0.5, "R": 5, "S": 10, "T": 6, "U": 1.5, "V": 2, "W": 4, "X": 0.2, "Y": 0.5, "Z": 0.5,
+}
+
+
+def shard_letter_ranges(shard_count: int) -> List[Tuple[str, str]]:
+    """
+    Split A-Z into shard_count contiguous (first, last) letter ranges of similar LETTER_WEIGHTS
+    """
+    letters = sorted(LETTER_WEIGHTS)
+    total = sum(LETTER_WEIGHTS.values())
+    ranges = []
+    first = 0
+    cumulative = 0.0
+    for index, letter in enumerate(letters):
+        cumulative += LETTER_WEIGHTS[letter]
+        shards_left = shard_count - len(ranges)
+        letters_left = len(letters) - index - 1
+        # Close the range at its weight target, but leave at least one letter for every later shard
+        if shards_left > 1 and (cumulative >= total * (len(ranges) + 1) / shard_count or letters_left == shards_left - 1):
+            ranges.append((letters[first], letter))
+            first = index + 1
+    ranges.append((letters[first], letters[-1]))
+    return ranges
+
+
+def normalize_contractor_name(name: str) -> str:
+    """
+    Normalize a business name for matching (case, punctuation and spacing insensitive)
+    """
+    return re.sub(r'[^a-z0-9]+', ' ', (name or "").lower()).strip()
+
+
+class SearchStream:
+    """
+    Parsing and bookkeeping of one streamed search (or continuation) request, shared by
+    GrokContractorSearch and AsyncGrokContractorSearch, which only differ in how they
+    read the chunks: feed() returns the new contractors each chunk completes, finish()
+    the ones left once the stream has ended, and close() records the outcome.
+    """
+
+    def __init__(self, search: "GrokContractorSearch", stage: str, request: Dict[str, Any], received: List[Contractor], max_results: int, status_callback=None):
+        self.search = search
+        self.request = request
+        self.max_results = max_results
+        self.status_callback = status_callback
+        self.entities = ContractorIndex(received)
+        self.count = self.initial = len(received)
+        self.chunks = []
+        self.buffer = ""
+        # Started and finished by hand because the stream is consumed across yields
+        self.span = search.metrics.span(stage, model=request.get("model"), max_tokens=request.get("max_tokens"), stream=True).start()
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.max_results
+
+    def feed(self, chunk) -> List[Contractor]:
+        """
+        Take one streamed chunk and return the new contractors of the CONTRACTOR blocks it completed
+        """
+        self.search._observe_chunk(self.span, chunk)
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            return []
+        self.span.first_token()
+        self.chunks.append(delta)
+        self.buffer += delta
+
+        sections, self.buffer = self.search._split_complete_sections(self.buffer)
+        with self.span.activate():
+            contractors = [self.search._timed_section_to_contractor(self.span, section) for section in sections]
+        return self._accept(contractors, self.status_callback)
+
+    def finish(self) -> List[Contractor]:
+        """
+        Return the new contractors left in the buffer once the stream has ended
+        """
+        with self.span.activate():
+            remaining = self.search._finish_stream(self.buffer, ''.join(self.chunks), self.count, self.max_results, self.span.attributes.get("finish_reason") == "length")
+        return self._accept(remaining)
+
+    def _accept(self, contractors: List[Optional[Contractor]], status_callback=None) -> List[Contractor]:
+        accepted = self.search._accept_contractors(self.entities, contractors, self.count, self.max_results, status_callback)
+        self.count += len(accepted)
+        return accepted
+
+    def fail(self, error: Exception):
+        self.span.set(error=type(error).__name__)
+        print(f"Error streaming contractors: {error}")
+
+    def close(self, state: Dict[str, Any]):
+        """
+        Finish the span, settle the token reservation and set state["finish_reason"]
+        and state["contractors"] (number of new contractors)
+        """
+        state["finish_reason"] = self.span.attributes.get("finish_reason")
+        state["contractors"] = self.count - self.initial
+        self.span.set(contractors=self.count, chars=sum(len(part) for part in self.chunks))
+        self.span.finish()
+        self.search.limiter.settle(self.request, self.span.attributes.get("total_tokens"))
 
-def clean_website_url(url):
-    """Clean and validate website URL, return None if unsafe"""
-    if not url or not url.strip():
-        return None
-    
-    # Remove whitespace and common prefixes
-    url = url.strip()
-    if url.startswith('www.'):
-        url = 'https://' + url
-    elif not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    # Validate safety
-    is_safe, reason = validate_website_safety(url)
-    if not is_safe:
-        print(f"Unsafe website detected: {url} - Reason: {reason}")
-        return None
-    
-    return url
-
-@dataclass
-class Review:
-    reviewer_name: str
-    rating: str
-    review_text: str
-    date: str = ""
-    source: str = ""
-
-@dataclass
-class Contractor:
-    name: str
-    phone: str = ""
-    email: str = ""
-    website: str = ""
-    address: str = ""
-    services: str = ""
-    rating: str = ""
-    description: str = ""
-    license_status: str = ""
-    reviews: List[Review] = None
-    quality_score: float = 0.0
-
-    def __post_init__(self):
-        if self.reviews is None:
-            self.reviews = []
-        # Validate and clean website URL
-        if self.website:
-            self.website = clean_website_url(self.website)
 
 class GrokContractorSearch:
-    def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv("GROK_API_KEY"),
-            base_url="https://api.x.ai/v1"
-        )
+    def __init__(self, cache=None, score_batch_size: int = None, score_workers: int = None, score_cache=None, metrics=None, store=None, review_cache=None, limiter=None):
+        self.client = self._create_client()
         self.system_prompt = self._load_system_prompt()
+        # Precompiled single-pass parser for search and scoring responses
+        self.parser = ResponseParser()
+        # Optional result cache (see result_cache.SearchCache)
+        self.cache = cache
+        # Local deterministic scoring, used for scoring="local" and when the scoring call fails
+        self.score_engine = SantoScoreEngine()
+        # Scoring calls are split into concurrent batches (see _calculate_quality_scores)
+        self.score_batch_size = score_batch_size or int(os.getenv("SCORE_BATCH_SIZE", 5))
+        self.score_workers = score_workers or int(os.getenv("SCORE_WORKERS", 4))
+        self.score_retries = int(os.getenv("SCORE_RETRIES", 1))
+        # Follow-up requests for contractors lost when a search response hits max_tokens
+        self.max_continuations = int(os.getenv("SEARCH_MAX_CONTINUATIONS", 2))
+        # Sharded searches (sharded=True) ask for about shard_size contractors per concurrent request
+        self.shard_size = int(os.getenv("SEARCH_SHARD_SIZE", 5))
+        self.max_shards = int(os.getenv("SEARCH_MAX_SHARDS", 6))
+        # Optional per-contractor score cache (see result_cache.ScoreCache)
+        self.score_cache = score_cache
+        # Per-stage timing spans and token counts (see metrics.py)
+        self.metrics = metrics or REGISTRY
+        # Optional persistent knowledge base of every contractor found (see contractor_store.ContractorStore)
+        self.store = store
+        # Optional cache of reviews fetched per contractor after lazy_reviews searches (see result_cache.ReviewCache)
+        self.review_cache = review_cache
+        # Request/token rate limits, search admission queue and retries, shared by the whole process (see rate_limiter.py)
+        self.limiter = limiter or LIMITER
+    
+    def _create_client(self):
+        """
+        Create the OpenAI-compatible client for the xAI API
+        (GROK_RECORD_MODE=record/replay wraps it, see record_replay.py).
+        The client does not retry on its own; the rate limiter retries with jitter.
+        """
+        return wrap_client(
+            lambda: OpenAI(api_key=os.getenv("GROK_API_KEY"), base_url=GROK_BASE_URL, max_retries=0),
+            RecordingClient,
+            ReplayClient
+        )
     
     def _load_system_prompt(self) -> str:
         """
@@ -149,14 +232,38 @@ class GrokContractorSearch:
             print(f"Error loading system prompt: {e}")
             return "You are a contractor search specialist. Help users find legitimate contractors and businesses."
     
-    def search_contractors(self, service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False) -> List[Contractor]:
+    def _build_search_prompt(self, service_type: str, location: str, max_results: int, skip_reviews: bool, lazy_reviews: bool = False) -> str:
         """
-        Search for contractors using Grok-4 API (web search)
+        Build the user prompt for the contractor search
         """
         # Build prompt based on whether reviews are needed
-        if skip_reviews:
+        if lazy_reviews:
+            # Core fields and overall rating only - reviews are fetched per contractor (see fetch_reviews)
+            return f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
+
+Please search the web for legitimate contractors and businesses that provide {service_type} services. Use ONLY real, current information from web search results.
+
+For each contractor, provide the following information in this exact format (keep all fields as concise as possible):
+
+CONTRACTOR 1:
+Name: [Business Name]
+Phone: [Phone Number]
+Email: [Email Address if available]
+Website: [Website URL if available - ONLY include legitimate, secure websites with HTTPS]
+Address: [Physical Address]
+Services: [Services Offered]
+Rating: [Overall Rating like 4.8/5 or 4.8 stars]
+Description: [Brief Description, 1-2 sentences max]
+License Status: [Active/Inactive/Unknown, and license number if available]
+
+CRITICAL REQUIREMENTS:
+1. Do NOT list individual customer reviews - only the overall rating. Reviews are requested separately.
+2. Each contractor MUST include their active license status (Active/Inactive/Unknown) and license number if available.
+3. ONLY include legitimate, secure websites with HTTPS. Do NOT include suspicious or unverified websites.
+4. Continue this format for all contractors."""
+        elif skip_reviews:
             # Fast search prompt - includes reviews but without extensive validation requirements
-            user_prompt = f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
+            return f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
 
 Please search the web for legitimate contractors and businesses that provide {service_type} services. Use ONLY real, current information from web search results.
 
@@ -184,7 +291,7 @@ CRITICAL REQUIREMENTS:
 4. Continue this format for all contractors."""
         else:
             # Standard prompt with detailed reviews (original)
-            user_prompt = f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
+            return f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
 
 Please search the web for legitimate contractors and businesses that provide {service_type} services. Use ONLY real, current information from web search results.
 
@@ -216,292 +323,1037 @@ CRITICAL REQUIREMENTS:
 6. ONLY include legitimate, secure websites with HTTPS. Do NOT include suspicious or unverified websites.
 7. Use CURRENT dates (2025) for all reviews, not old dates from 2023-2024.
 8. Continue this format for all contractors."""
+    
+    def _build_continuation_prompt(self, service_type: str, location: str, remaining: int, skip_reviews: bool, received_names: List[str], lazy_reviews: bool = False) -> str:
+        """
+        Build the user prompt asking for the contractors a truncated (or sharded) search did not return
+        """
+        already_listed = "\n".join(f"- {name}" for name in received_names)
+        return f"""{self._build_search_prompt(service_type, location, remaining, skip_reviews, lazy_reviews)}
+
+You already provided these contractors in an earlier answer, so do NOT include them again:
+{already_listed}
+
+List {remaining} different contractors."""
+
+    def _build_shard_prompt(self, service_type: str, location: str, count: int, skip_reviews: bool, first_letter: str, last_letter: str, lazy_reviews: bool = False) -> str:
+        """
+        Build the user prompt for one shard of a sharded search (one range of business name initials)
+        """
+        digits = " or a digit" if first_letter == "A" else ""
+        return f"""{self._build_search_prompt(service_type, location, count, skip_reviews, lazy_reviews)}
+
+This search is split across several parallel requests. ONLY include businesses whose name starts with a letter from {first_letter} to {last_letter}{digits} (ignore a leading "The"). If fewer than {count} such businesses exist, list only the ones you find."""
+
+    def search_contractors(self, service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, single_pass: bool = False, scoring: str = "llm", sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Search for contractors using Grok-4 API (web search)
+        
+        With single_pass=True the search and SantoScore are requested together as
+        structured JSON in one call, instead of a search call followed by a scoring call.
+        With scoring="local" the SantoScore is computed locally by SantoScoreEngine
+        and no scoring call is made.
+        With sharded=True a large max_results is split into concurrent requests of
+        about shard_size contractors each (see _sharded_search).
+        With lazy_reviews=True only the core fields and overall rating are requested;
+        reviews are loaded per contractor with fetch_reviews when they are needed.
+        """
+        with self.metrics.span("search", service_type=service_type, location=location, max_results=max_results,
+                               skip_reviews=skip_reviews, single_pass=single_pass, scoring=scoring, sharded=sharded, lazy_reviews=lazy_reviews) as span:
+            contractors = self._search(service_type, location, max_results, status_callback, skip_reviews, single_pass, scoring, sharded, lazy_reviews)
+            span.set(results=len(contractors))
+            return contractors
+
+    def _search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, single_pass: bool, scoring: str, sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the cache lookup, search call and scoring call for search_contractors
+        """
+        cached = self.get_cached_results(service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+        if cached is not None:
+            return self._cache_hit(cached, status_callback)
+        
+        # Wait for a search slot (the queue position is reported through status_callback)
+        try:
+            with self.limiter.admit(status_callback):
+                return self._run_search(service_type, location, max_results, status_callback, skip_reviews, single_pass, scoring, sharded, lazy_reviews)
+        except AdmissionTimeout as e:
+            return self._search_failed(e, status_callback)
+
+    def _run_search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, single_pass: bool, scoring: str, sharded: bool = False, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the search call and scoring call of a search that was not cached
+        """
+        user_prompt = self._timed_search_prompt(service_type, location, max_results, skip_reviews, lazy_reviews)
         
         try:
             # Status update: Starting web search
             if status_callback:
                 status_callback("🔍 Searching the web for contractors...", "info")
             
-            # Single API call to get all contractor data
-            response = self.client.chat.completions.create(
-                model="grok-4",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
-            
-            # Status update: Processing results
-            if status_callback:
-                status_callback("📋 Processing contractor information...", "info")
-            
-            # Debug: Print what Grok actually returned
-            print("=== GROK RESPONSE DEBUG ===")
-            print(response.choices[0].message.content[:1000])  # First 1000 chars
-            print("=== END DEBUG ===")
+            if single_pass:
+                # One API call returns contractors, reviews and scores as JSON
+                response = self._complete("single_pass_api", self._single_pass_request(service_type, location, max_results, skip_reviews, lazy_reviews))
+                safe_contractors = self._single_pass_results(response, skip_reviews, status_callback)
+                if safe_contractors is not None:
+                    return self._finalize_search(safe_contractors, service_type, location, max_results, skip_reviews, status_callback, scoring, lazy_reviews, single_pass, sharded)
             
-            # Parse the response
-            contractors = self._parse_response(response.choices[0].message.content)
-            
-            # Status update: Processing reviews (conditional)
-            if status_callback:
-                if skip_reviews:
-                    status_callback("⚡ Fast mode - processing reviews without fake review validation...", "info")
-                else:
-                    status_callback("⭐ Full mode - extracting and validating customer reviews...", "info")
-            
-            # Debug: Print parsed contractors
-            print(f"=== PARSED {len(contractors)} CONTRACTORS ===")
-            for i, contractor in enumerate(contractors):
-                print(f"Contractor {i+1}: {contractor.name}")
-                print(f"Reviews: {len(contractor.reviews)}")
-                for j, review in enumerate(contractor.reviews[:2]):  # Show first 2 reviews
-                    print(f"  Review {j+1}: {review.date} - {review.reviewer_name}")
-            print("=== END CONTRACTORS ===")
-            
-            # Status update: Validating contractor information
-            if status_callback:
-                if skip_reviews:
-                    status_callback("🔒 Fast validation of contractor websites and contact info...", "info")
-                else:
-                    status_callback("🔒 Full validation of contractor websites, contact info, and review authenticity...", "info")
-            
-            # Filter out contractors with unsafe websites
-            safe_contractors = []
-            for contractor in contractors:
-                if contractor.website is None:
-                    # Remove website field if unsafe
-                    contractor.website = ""
-                safe_contractors.append(contractor)
-            
-            # Status update: Calculating quality scores
-            if status_callback:
-                if skip_reviews:
-                    status_callback("⭐ Calculating SantoScores (fast mode with basic review data)...", "info")
-                else:
-                    status_callback("⭐ Calculating SantoScores (full mode with validated review analysis)...", "info")
+            if sharded and self._shard_count(max_results) > 1:
+                # Several smaller concurrent searches, merged and topped up
+                safe_contractors = self._sharded_search(service_type, location, max_results, skip_reviews, status_callback, lazy_reviews)
+            else:
+                # Single API call to get all contractor data
+                response = self._complete("search_api", self._search_request(user_prompt))
+                safe_contractors = self._search_results(response, skip_reviews, status_callback)
+                # Ask for whatever a response cut off by max_tokens is missing
+                safe_contractors = self._continue_search(safe_contractors, service_type, location, max_results, skip_reviews, status_callback, response, lazy_reviews)
             
             # Only use the reviews Grok returns (no padding, no extra API calls)
             # Calculate quality scores for all contractors
-            safe_contractors = self._calculate_quality_scores(safe_contractors, service_type)
-            
-            # Status update: Finalizing results
-            if status_callback:
-                if skip_reviews:
-                    status_callback("✅ Fast search with reviews completed successfully!", "success")
-                else:
-                    status_callback("✅ Comprehensive search with full review validation completed successfully!", "success")
+            self._report_scoring(status_callback, skip_reviews)
+            safe_contractors = self.score_contractors(safe_contractors, service_type, scoring)
             
-            # Limit results to max_results
-            return safe_contractors[:max_results]
+            return self._finalize_search(safe_contractors, service_type, location, max_results, skip_reviews, status_callback, scoring, lazy_reviews, single_pass, sharded)
         except Exception as e:
-            print(f"Error searching contractors: {e}")
-            return []
-    
-    def _parse_response(self, content: str) -> List[Contractor]:
+            return self._search_failed(e, status_callback)
+
+    def _timed_search_prompt(self, service_type: str, location: str, max_results: int, skip_reviews: bool, lazy_reviews: bool = False) -> str:
         """
-        Parse Grok's response to extract contractor information including reviews
+        Build the search prompt inside a prompt_build timing span
         """
-        contractors = []
-        
-        # Split by CONTRACTOR sections
-        sections = re.split(r'CONTRACTOR\s+\d+:', content)
-        
-        for section in sections[1:]:  # Skip the first empty section
-            if not section.strip():
-                continue
-                
-            contractor_data = self._extract_contractor_info(section)
-            if contractor_data.get('name'):
-                contractors.append(Contractor(**contractor_data))
+        with self.metrics.span("prompt_build"):
+            return self._build_search_prompt(service_type, location, max_results, skip_reviews, lazy_reviews)
+
+    def _cache_hit(self, cached: List[Contractor], status_callback=None) -> List[Contractor]:
+        if status_callback:
+            status_callback("⚡ Loaded cached results for this search", "success")
+        return cached
+
+    def _single_pass_results(self, response, skip_reviews: bool, status_callback=None) -> Optional[List[Contractor]]:
+        """
+        Contractors of a single-pass response, or None to fall back to the two-call pipeline
+        """
+        contractors = self._process_structured_response(response.choices[0].message.content, skip_reviews, status_callback)
+        if contractors is None:
+            print("Single-pass response was not valid JSON, falling back to search + scoring calls")
+        return contractors
+
+    def _search_results(self, response, skip_reviews: bool, status_callback=None) -> List[Contractor]:
+        """
+        Parse and validate the contractors of a search response (minus a block cut off by max_tokens)
+        """
+        return self._process_search_response(self._complete_blocks(response), skip_reviews, status_callback)
+
+    def _report_scoring(self, status_callback, skip_reviews: bool):
+        # Status update: Calculating quality scores
+        if status_callback:
+            if skip_reviews:
+                status_callback("⭐ Calculating SantoScores (fast mode with basic review data)...", "info")
+            else:
+                status_callback("⭐ Calculating SantoScores (full mode with validated review analysis)...", "info")
+
+    def _search_failed(self, error: Exception, status_callback=None) -> List[Contractor]:
+        """
+        Report a failed search (API error, or no free search slot in time) and return no contractors
+        """
+        print(f"Error searching contractors: {error}")
+        if status_callback:
+            status_callback(f"Search failed: {error}", "error")
+        return []
+
+    def _search_request(self, user_prompt: str, stream: bool = False) -> Dict[str, Any]:
+        """
+        Build the chat completion arguments for a contractor search
+        """
+        request = {
+            "model": "grok-4",
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 4000
+        }
+        if stream:
+            request["stream"] = True
+            # Ask for token usage in the final chunk
+            request["stream_options"] = {"include_usage": True}
+        return request
+
+    def _continuation_request(self, service_type: str, location: str, max_results: int, skip_reviews: bool, received: List[Contractor], stream: bool = False, lazy_reviews: bool = False) -> Dict[str, Any]:
+        """
+        Build the chat completion arguments for the contractors missing from a truncated response
+        """
+        prompt = self._build_continuation_prompt(service_type, location, max_results - len(received), skip_reviews, [contractor.name for contractor in received], lazy_reviews)
+        return self._search_request(prompt, stream=stream)
+
+    def _complete_blocks(self, response) -> str:
+        """
+        Return the response text, minus the last CONTRACTOR block if the response
+        was cut off by max_tokens (that block may hold a partial field or review)
+        """
+        choice = response.choices[0]
+        content = choice.message.content or ""
+        if choice.finish_reason != "length":
+            return content
+        return self._drop_incomplete_block(content)
+
+    def _drop_incomplete_block(self, content: str) -> str:
+        """
+        Cut a truncated response at its last CONTRACTOR header (or last line break for free text)
+        """
+        headers = list(CONTRACTOR_HEADER_PATTERN.finditer(content))
+        if headers:
+            print(f"Response truncated by max_tokens, dropping incomplete contractor block {len(headers)}")
+            return content[:headers[-1].start()]
+        return content[:content.rfind("\n") + 1]
+
+    def _continue_search(self, contractors: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, response=None, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Request the contractors still missing, up to max_continuations times.
+        After a response, only continue while responses are cut off by max_tokens;
+        without one (after a sharded search) continue whenever results are short.
+        """
+        for attempt in range(self.max_continuations):
+            request = self._next_continuation(contractors, service_type, location, max_results, skip_reviews, status_callback, response, lazy_reviews)
+            if request is None:
+                break
+            response = self._complete("continuation_api", request, attempt=attempt + 1)
+            merged = self._merge_continuation(contractors, response, skip_reviews)
+            if merged is None:
+                break
+            contractors = merged
+        return contractors
+
+    def _next_continuation(self, contractors: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, response=None, lazy_reviews: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Build the next continuation request of _continue_search, or return None when it should stop
+        """
+        if len(contractors) >= max_results or (response is not None and response.choices[0].finish_reason != "length"):
+            return None
+        if status_callback:
+            status_callback(f"➕ Got {len(contractors)} of {max_results} contractors, requesting the remaining {max_results - len(contractors)}...", "info")
+        return self._continuation_request(service_type, location, max_results, skip_reviews, contractors, lazy_reviews=lazy_reviews)
+
+    def _merge_continuation(self, contractors: List[Contractor], response, skip_reviews: bool) -> Optional[List[Contractor]]:
+        """
+        Merge the contractors of a continuation response, or return None if it added none
+        """
+        merged = self._merge_contractors(contractors, self._search_results(response, skip_reviews))
+        return merged if len(merged) > len(contractors) else None
+
+    def _shard_count(self, max_results: int) -> int:
+        """
+        Number of concurrent requests a sharded search for max_results uses
+        """
+        return max(1, min(self.max_shards, math.ceil(max_results / max(1, self.shard_size))))
+
+    def _shard_requests(self, service_type: str, location: str, max_results: int, skip_reviews: bool, stream: bool = False, lazy_reviews: bool = False) -> List[Dict[str, Any]]:
+        """
+        Build one search request per business-name letter range
+        """
+        shard_count = self._shard_count(max_results)
+        per_shard = math.ceil(max_results / shard_count)
+        return [
+            self._search_request(self._build_shard_prompt(service_type, location, per_shard, skip_reviews, first, last, lazy_reviews), stream=stream)
+            for first, last in shard_letter_ranges(shard_count)
+        ]
+
+    def _sharded_search(self, service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, lazy_reviews: bool = False) -> List[Contractor]:
+        """
+        Run the shard requests concurrently, merge the results without duplicates
+        and top up with a continuation request if the shards came back short.
+        Wall-clock time follows the size of one shard instead of the whole list.
+        """
+        shard_requests = self._shard_requests(service_type, location, max_results, skip_reviews, lazy_reviews=lazy_reviews)
+        if status_callback:
+            status_callback(f"🧩 Searching in {len(shard_requests)} parallel batches...", "info")
         
-        # If structured parsing fails, try alternative parsing
-        if not contractors:
-            contractors = self._parse_alternative_format(content)
+        with ThreadPoolExecutor(max_workers=len(shard_requests)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._search_shard, request, index, skip_reviews) for index, request in enumerate(shard_requests)]
+            shards = [future.result() for future in futures]
         
+        return self._continue_search(self._merge_shards(shards, max_results), service_type, location, max_results, skip_reviews, status_callback, lazy_reviews=lazy_reviews)
+
+    def _merge_shards(self, shards: List[List[Contractor]], max_results: int) -> List[Contractor]:
+        """
+        Merge the contractors of all shards without duplicates, up to max_results
+        """
+        contractors = []
+        for shard in shards:
+            contractors = self._merge_contractors(contractors, shard)
+        print(f"=== MERGED {len(contractors)} CONTRACTORS FROM {len(shards)} SHARDS ===")
+        return contractors[:max_results]
+
+    def _search_shard(self, request: Dict[str, Any], index: int, skip_reviews: bool) -> List[Contractor]:
+        """
+        Run one shard request (a failed shard returns no contractors instead of failing the search)
+        """
+        try:
+            return self._search_results(self._complete("shard_api", request, shard=index + 1), skip_reviews)
+        except Exception as e:
+            return self._shard_failed(e, index)
+
+    def _shard_failed(self, error: Exception, index: int) -> List[Contractor]:
+        print(f"Error in search shard {index + 1}: {error}")
+        return []
+
+    def _merge_contractors(self, contractors: List[Contractor], more: List[Contractor]) -> List[Contractor]:
+        """
+        Merge contractors from a follow-up response into the list, folding duplicates
+        (same phone, website domain or normalized name) into the existing record
+        """
+        return resolve_contractors(list(contractors) + list(more))
+
+    def _complete(self, stage: str, request: Dict[str, Any], **attributes):
+        """
+        Run a chat completion inside a timing span that records token usage and finish_reason
+        """
+        with self.metrics.span(stage, model=request.get("model"), max_tokens=request.get("max_tokens"), **attributes) as span:
+            response = self.limiter.call(self.client.chat.completions.create, request)
+            return self._completed(span, request, response)
+
+    def _completed(self, span, request: Dict[str, Any], response):
+        """
+        Record a response's usage on its span and settle its token reservation
+        """
+        span.record_response(response)
+        self.limiter.settle(request, span.attributes.get("total_tokens"))
+        return response
+
+    def _process_search_response(self, content: str, skip_reviews: bool, status_callback=None) -> List[Contractor]:
+        """
+        Parse and validate the contractors in a search response
+        """
+        # Status update: Processing results
+        if status_callback:
+            status_callback("📋 Processing contractor information...", "info")
+
+        # Debug: Print what Grok actually returned
+        print("=== GROK RESPONSE DEBUG ===")
+        print(content[:1000])  # First 1000 chars
+        print("=== END DEBUG ===")
+
+        # Parse the response (URL validation time is reported as a nested stage)
+        with self.metrics.span("parse", format="text", chars=len(content)) as span:
+            contractors = self._parse_response(content)
+            parsed = len(contractors)
+            contractors = resolve_contractors(contractors)
+            span.set(contractors=len(contractors), duplicates=parsed - len(contractors))
+
+        # Status update: Processing reviews (conditional)
+        if status_callback:
+            if skip_reviews:
+                status_callback("⚡ Fast mode - processing reviews without fake review validation...", "info")
+            else:
+                status_callback("⭐ Full mode - extracting and validating customer reviews...", "info")
+
+        # Debug: Print parsed contractors
+        print(f"=== PARSED {len(contractors)} CONTRACTORS ===")
+        for i, contractor in enumerate(contractors):
+            print(f"Contractor {i+1}: {contractor.name}")
+            print(f"Reviews: {len(contractor.reviews)}")
+            for j, review in enumerate(contractor.reviews[:2]):  # Show first 2 reviews
+                print(f"  Review {j+1}: {review.date} - {review.reviewer_name}")
+        print("=== END CONTRACTORS ===")
+
+        # Status update: Validating contractor information
+        if status_callback:
+            if skip_reviews:
+                status_callback("🔒 Fast validation of contractor websites and contact info...", "info")
+            else:
+                status_callback("🔒 Full validation of contractor websites, contact info, and review authenticity...", "info")
+
+        # Unsafe websites were already dropped when each Contractor was built
         return contractors
+
+    def _build_single_pass_prompt(self, service_type: str, location: str, max_results: int, skip_reviews: bool, lazy_reviews: bool = False) -> str:
+        """
+        Build the user prompt for a combined search + scoring request
+        """
+        if lazy_reviews:
+            review_requirement = "Do NOT list individual customer reviews (return an empty reviews array) - only the overall rating. Reviews are requested separately."
+        elif skip_reviews:
+            review_requirement = "Include 3-5 real customer reviews per contractor from web search if available."
+        else:
+            review_requirement = "Each contractor MUST have exactly 5 real customer reviews from web search, with actual reviewer names, individual ratings, specific review text (1-2 sentences max) and CURRENT dates (2025). If you cannot find 5, do not include the contractor at all. Do NOT make up or pad reviews."
+        
+        return f"""I need to find {max_results} {service_type} contractors{' in ' + location if location else ''}.
+
+Please search the web for legitimate contractors and businesses that provide {service_type} services. Use ONLY real, current information from web search results. Keep all fields as concise as possible and use an empty string when a field is not available.
+
+For each contractor provide: name, phone, email, website (ONLY legitimate, secure websites with HTTPS), address, services, rating (overall rating like 4.8/5), description (1-2 sentences max), license_status (Active/Inactive/Unknown, and license number if available) and reviews.
+
+{review_requirement}
+
+Then act as an expert evaluator of {service_type} contractors and give each contractor a quality_score from 0-10 (10 is the best, 0 is the worst) and a score_explanation (1-2 sentences max). Consider:
+1. Overall rating/reputation
+2. Quality of services offered
+3. Customer review sentiment and ratings
+4. Completeness of contact information
+5. Professional description and experience
+
+Respond with JSON only, matching the provided schema."""
     
-    def _extract_contractor_info(self, text: str) -> Dict[str, Any]:
+    def _single_pass_request(self, service_type: str, location: str, max_results: int, skip_reviews: bool, lazy_reviews: bool = False) -> Dict[str, Any]:
         """
-        Extract contractor information from a text section including reviews
+        Build the chat completion arguments for a combined search + scoring request
         """
-        data = {
-            'name': '',
-            'phone': '',
-            'email': '',
-            'website': '',
-            'address': '',
-            'services': '',
-            'rating': '',
-            'description': '',
-            'license_status': '',
-            'reviews': []
+        return {
+            "model": "grok-4",
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self._build_single_pass_prompt(service_type, location, max_results, skip_reviews, lazy_reviews)}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 5000,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "contractor_results",
+                    "schema": CONTRACTOR_RESULTS_SCHEMA,
+                    "strict": True
+                }
+            }
         }
+    
+    def _process_structured_response(self, content: str, skip_reviews: bool, status_callback=None) -> Optional[List[Contractor]]:
+        """
+        Validate a single-pass JSON response directly into scored Contractor objects.
+        Returns None if the response is not usable JSON.
+        """
+        if status_callback:
+            status_callback("📋 Processing contractor information and SantoScores...", "info")
         
-        lines = text.split('\n')
-        reviews_section = False
+        try:
+            payload = json.loads(content)
+            items = payload.get("contractors") if isinstance(payload, dict) else payload
+            if not isinstance(items, list):
+                return None
+        except (ValueError, TypeError) as e:
+            print(f"Error parsing structured response: {e}")
+            return None
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if we're in the reviews section
-            if line.lower().startswith('reviews:'):
-                reviews_section = True
-                continue
-            
-            # If we're in reviews section, parse review lines
-            if reviews_section:
-                # Check if this line is a review with the specified format
-                if line.startswith('- Reviewer:') or line.startswith('Reviewer:'):
-                    review = self._parse_single_review(line)
-                    if review:
-                        data['reviews'].append(review)
-                elif any(line.lower().startswith(field + ':') for field in ['name', 'phone', 'email', 'website', 'address', 'services', 'rating', 'description', 'license status']):
-                    reviews_section = False
-                else:
-                    # Try to parse as a different review format
-                    review = self._parse_alternative_review_format(line)
-                    if review:
-                        data['reviews'].append(review)
-            
-            # Extract other information based on field labels
-            if not reviews_section:
-                if line.lower().startswith('name:'):
-                    data['name'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('phone:'):
-                    data['phone'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('email:'):
-                    data['email'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('website:'):
-                    website = line.split(':', 1)[1].strip()
-                    # Validate website before adding
-                    data['website'] = clean_website_url(website) or ""
-                elif line.lower().startswith('address:'):
-                    data['address'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('services:'):
-                    data['services'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('rating:'):
-                    data['rating'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('description:'):
-                    data['description'] = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('license status:'):
-                    data['license_status'] = line.split(':', 1)[1].strip()
+        contractors = []
+        with self.metrics.span("parse", format="json", chars=len(content)) as span:
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                contractor = self._contractor_from_json(item)
+                if contractor:
+                    contractors.append(contractor)
+            parsed = len(contractors)
+            contractors = resolve_contractors(contractors)
+            span.set(contractors=len(contractors), duplicates=parsed - len(contractors))
+        
+        print(f"=== PARSED {len(contractors)} CONTRACTORS (single pass) ===")
         
-        return data
+        if status_callback:
+            if skip_reviews:
+                status_callback("🔒 Fast validation of contractor websites and contact info...", "info")
+            else:
+                status_callback("🔒 Full validation of contractor websites, contact info, and review authenticity...", "info")
+        return contractors
     
-    def _parse_single_review(self, line: str) -> Review:
+    def _contractor_from_json(self, item: Dict[str, Any]) -> Optional[Contractor]:
         """
-        Parse a single review line in the format: Reviewer: Name | Rating: X/5 | Review: "Text" | Date: YYYY-MM-DD
+        Build a scored Contractor from one structured JSON item, or None if it has no name
         """
-        try:
-            # Remove leading dash and 'Reviewer:' prefix
-            line = line.lstrip('- ').replace('Reviewer:', '').strip()
-            
-            # Split by | to get components
-            parts = [part.strip() for part in line.split('|')]
-            
-            reviewer_name = ""
-            rating = ""
-            review_text = ""
-            date = ""
-            
-            for part in parts:
-                if part.lower().startswith('rating:'):
-                    rating = part.split(':', 1)[1].strip()
-                elif part.lower().startswith('review:'):
-                    review_text = part.split(':', 1)[1].strip().strip('"\'')
-                elif part.lower().startswith('date:'):
-                    date = part.split(':', 1)[1].strip()
-                elif not reviewer_name and not any(part.lower().startswith(prefix) for prefix in ['rating:', 'review:', 'date:']):
-                    reviewer_name = part.strip()
-            
-            # Only return review if we have both reviewer name and review text
+        def text(value) -> str:
+            return str(value).strip() if value is not None else ""
+        
+        name = text(item.get("name"))
+        if not name:
+            return None
+        
+        reviews = []
+        for review in item.get("reviews") or []:
+            if not isinstance(review, dict):
+                continue
+            reviewer_name = text(review.get("reviewer_name"))
+            review_text = text(review.get("review_text")).strip('"\'')
+            # Same rule as the text parser: a review needs a reviewer and text
             if reviewer_name and review_text:
-                return Review(
+                reviews.append(Review(
                     reviewer_name=reviewer_name,
-                    rating=rating,
+                    rating=text(review.get("rating")),
                     review_text=review_text,
-                    date=date,
+                    date=text(review.get("date")),
                     source="Web Search"
-                )
-        except Exception as e:
-            print(f"Error parsing review line: {e}")
+                ))
         
-        return None
+        try:
+            quality_score = max(0.0, min(10.0, float(item.get("quality_score"))))
+        except (TypeError, ValueError):
+            quality_score = 5.0  # Default score if missing or invalid
+        
+        return Contractor(
+            name=name,
+            phone=text(item.get("phone")),
+            email=text(item.get("email")),
+            website=text(item.get("website")),
+            address=text(item.get("address")),
+            services=text(item.get("services")),
+            rating=text(item.get("rating")),
+            description=text(item.get("description")),
+            license_status=text(item.get("license_status")),
+            reviews=reviews,
+            quality_score=quality_score,
+            score_explanation=text(item.get("score_explanation"))
+        )
     
-    def _parse_alternative_review_format(self, line: str) -> Review:
+    def _finalize_search(self, contractors: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> List[Contractor]:
+        """
+        Report completion, limit results to max_results and cache them
         """
-        Parse reviews in alternative formats that Grok might return - NO hardcoded fallbacks
+        # Status update: Finalizing results
+        if status_callback:
+            if lazy_reviews:
+                status_callback("✅ Search completed - reviews load when you open a contractor", "success")
+            elif skip_reviews:
+                status_callback("✅ Fast search with reviews completed successfully!", "success")
+            else:
+                status_callback("✅ Comprehensive search with full review validation completed successfully!", "success")
+
+        # Limit results to max_results
+        contractors = contractors[:max_results]
+        self.cache_results(service_type, location, max_results, skip_reviews, contractors, scoring, lazy_reviews, single_pass, sharded)
+        return contractors
+
+    def search_contractors_stream(self, service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, sharded: bool = False, lazy_reviews: bool = False) -> Iterator[Contractor]:
+        """
+        Stream contractors from Grok-4 as soon as each CONTRACTOR block is complete.
+        Yielded contractors are not scored yet - collect them and pass the list to
+        score_contractors once the stream is exhausted.
+        With sharded=True each shard's contractors are yielded as soon as that shard finishes.
+        With lazy_reviews=True contractors arrive without reviews (see fetch_reviews).
+        The search holds a slot of the rate limiter's admission queue while it streams;
+        if no slot frees up in time it is reported through status_callback and nothing is yielded.
         """
         try:
-            # Pattern: "John S. - 5/5 stars - Great service!"
-            pattern1 = r'([A-Z][a-z]+\s+[A-Z]\.?)\s*[-–]\s*(\d+(?:\.\d+)?(?:/5|/10|\s*stars?))\s*[-–]\s*["\']?([^"\']+)["\']?'
-            match1 = re.search(pattern1, line)
-            if match1:
-                return Review(
-                    reviewer_name=match1.group(1),
-                    rating=match1.group(2),
-                    review_text=match1.group(3),
-                    source="Web Search"
-                )
-            
-            # Pattern: "Sarah M. (4/5): Excellent work done quickly"
-            pattern2 = r'([A-Z][a-z]+\s+[A-Z]\.?)\s*\((\d+(?:\.\d+)?(?:/5|/10|\s*stars?))\):\s*["\']?([^"\']+)["\']?'
-            match2 = re.search(pattern2, line)
-            if match2:
-                return Review(
-                    reviewer_name=match2.group(1),
-                    rating=match2.group(2),
-                    review_text=match2.group(3),
-                    source="Web Search"
-                )
-            
-            # Pattern: Look for quoted reviews with names and ratings nearby - ONLY if all parts are found
-            quote_pattern = r'["\']([^"\']{20,})["\']'
-            name_pattern = r'([A-Z][a-z]+\s+[A-Z]\.?)'
-            rating_pattern = r'(\d+(?:\.\d+)?(?:/5|/10|\s*stars?))'
-            
-            quote_match = re.search(quote_pattern, line)
-            name_match = re.search(name_pattern, line)
-            rating_match = re.search(rating_pattern, line)
-            
-            # Only return if we found both name and review text
-            if quote_match and name_match:
-                return Review(
-                    reviewer_name=name_match.group(1),
-                    rating=rating_match.group(1) if rating_match else "",
-                    review_text=quote_match.group(1),
-                    source="Web Search"
-                )
+            with self.limiter.admit(status_callback):
+                yield from self._stream_search(service_type, location, max_results, status_callback, skip_reviews, sharded, lazy_reviews)
+        except AdmissionTimeout as e:
+            self._search_failed(e, status_callback)
+
+    def _stream_search(self, service_type: str, location: str, max_results: int, status_callback, skip_reviews: bool, sharded: bool, lazy_reviews: bool) -> Iterator[Contractor]:
+        """
+        Stream the search (or shard) requests and their continuations for search_contractors_stream
+        """
+        if status_callback:
+            status_callback("🔍 Searching the web for contractors...", "info")
+
+        received = []
+        if sharded and self._shard_count(max_results) > 1:
+            for contractor in self._stream_shards(service_type, location, max_results, skip_reviews, status_callback, lazy_reviews):
+                received.append(contractor)
+                yield contractor
+        attempts, stage, request = self._first_stream_request(service_type, location, max_results, skip_reviews, received, sharded, lazy_reviews)
+
+        for attempt in range(attempts):
+            state = {}
+            for contractor in self._stream_contractors(stage, request, received, max_results, status_callback, state):
+                received.append(contractor)
+                yield contractor
+
+            stage, request = "continuation_api", self._next_stream_continuation(attempt, state, service_type, location, max_results, skip_reviews, received, status_callback, lazy_reviews)
+            if request is None:
+                break
+
+        print(f"=== STREAMED {len(received)} CONTRACTORS ===")
+
+    def _first_stream_request(self, service_type: str, location: str, max_results: int, skip_reviews: bool, received: List[Contractor], sharded: bool, lazy_reviews: bool = False) -> Tuple[int, str, Dict[str, Any]]:
+        """
+        Return (attempts, stage, request) for the first streamed request of _stream_search
+        """
+        if sharded and self._shard_count(max_results) > 1:
+            # Shards that came back short are topped up by a streamed continuation
+            attempts = self.max_continuations if len(received) < max_results else 0
+            return attempts, "continuation_api", self._continuation_request(service_type, location, max_results, skip_reviews, received, stream=True, lazy_reviews=lazy_reviews)
+        user_prompt = self._timed_search_prompt(service_type, location, max_results, skip_reviews, lazy_reviews)
+        return 1 + self.max_continuations, "search_api", self._search_request(user_prompt, stream=True)
+
+    def _next_stream_continuation(self, attempt: int, state: Dict[str, Any], service_type: str, location: str, max_results: int, skip_reviews: bool, received: List[Contractor], status_callback=None, lazy_reviews: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Build the next streamed continuation request, or return None when the stream is done
+        """
+        # Only a response cut off by max_tokens is continued, and only while it keeps adding contractors
+        if state.get("finish_reason") != "length" or len(received) >= max_results or (attempt and not state.get("contractors")):
+            return None
+        if status_callback:
+            status_callback(f"➕ Response was cut off after {len(received)} contractors, requesting the remaining {max_results - len(received)}...", "info")
+        return self._continuation_request(service_type, location, max_results, skip_reviews, received, stream=True, lazy_reviews=lazy_reviews)
+
+    def _stream_shards(self, service_type: str, location: str, max_results: int, skip_reviews: bool, status_callback=None, lazy_reviews: bool = False) -> Iterator[Contractor]:
+        """
+        Run the shard requests concurrently and yield each shard's new contractors
+        as soon as that shard finishes
+        """
+        shard_requests = self._shard_requests(service_type, location, max_results, skip_reviews, lazy_reviews=lazy_reviews)
+        entities = ContractorIndex()
+        count = 0
+        with ThreadPoolExecutor(max_workers=len(shard_requests)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._search_shard, request, index, skip_reviews) for index, request in enumerate(shard_requests)]
+            for future in as_completed(futures):
+                accepted = self._accept_contractors(entities, future.result(), count, max_results, status_callback)
+                count += len(accepted)
+                yield from accepted
+
+    def _accept_contractors(self, entities: ContractorIndex, contractors: List[Optional[Contractor]], count: int, max_results: int, status_callback=None) -> List[Contractor]:
+        """
+        Add contractors to entities and return the new ones, until count (already
+        received) plus the new ones reach max_results. Each is reported through status_callback.
+        """
+        accepted = []
+        for contractor in contractors:
+            if contractor and count + len(accepted) < max_results and entities.add(contractor):
+                accepted.append(contractor)
+                if status_callback:
+                    status_callback(f"📋 Received {count + len(accepted)} of {max_results} contractors...", "info")
+        return accepted
+
+    def _stream_contractors(self, stage: str, request: Dict[str, Any], received: List[Contractor], max_results: int, status_callback, state: Dict[str, Any]) -> Iterator[Contractor]:
+        """
+        Stream one search (or continuation) request and yield each contractor not
+        already in received, until max_results have arrived in total.
+        Sets state["finish_reason"] and state["contractors"] (number yielded).
+        """
+        search_stream = SearchStream(self, stage, request, received, max_results, status_callback)
+        try:
+            stream = self.limiter.call(self.client.chat.completions.create, request)
+            for chunk in stream:
+                yield from search_stream.feed(chunk)
+                if search_stream.full:
+                    stream.close()
+                    search_stream.span.set(closed_early=True)
+                    break
+            yield from search_stream.finish()
         except Exception as e:
-            print(f"Error parsing alternative review format: {e}")
-        
-        return None
-    
+            search_stream.fail(e)
+        finally:
+            search_stream.close(state)
+
+    def _observe_chunk(self, span, chunk):
+        """
+        Record usage and finish_reason carried by a streamed chunk
+        """
+        if getattr(chunk, "usage", None):
+            span.record_usage(chunk.usage)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            span.set(finish_reason=chunk.choices[0].finish_reason)
+
+    def _timed_section_to_contractor(self, span, section: str) -> Optional[Contractor]:
+        """
+        Parse one streamed CONTRACTOR block, adding its parse time to the stream span
+        """
+        start = time.perf_counter()
+        try:
+            return self._section_to_contractor(section)
+        finally:
+            span.add_time("parse", time.perf_counter() - start)
+
+    def get_cached_results(self, service_type: str, location: str, max_results: int, skip_reviews: bool, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> Optional[List[Contractor]]:
+        """
+        Return previously scored results for this search, or None if there is no cache or no fresh entry
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+
+    def get_local_results(self, service_type: str, location: str, max_results: int) -> List[Contractor]:
+        """
+        Return matching contractors from the persistent store (any earlier search), or [] without a store
+        """
+        if self.store is None:
+            return []
+        with self.metrics.span("store_search", max_results=max_results) as span:
+            contractors = self.store.search(service_type, location, max_results)
+            span.set(contractors=len(contractors))
+        return contractors
+
+    def cache_results(self, service_type: str, location: str, max_results: int, skip_reviews: bool, contractors: List[Contractor], scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False):
+        """
+        Store scored results for this search if a cache is configured, and record
+        the contractors in the persistent store if one is configured
+        """
+        if self.cache is not None:
+            self.cache.set(service_type, location, max_results, skip_reviews, contractors, scoring=scoring, lazy_reviews=lazy_reviews, single_pass=single_pass, sharded=sharded)
+
+        if self.store is not None:
+            self.store.upsert(contractors, service_type, location)
+
+    def search_more(self, contractors: List[Contractor], service_type: str, location: str = "", max_results: int = 15, status_callback=None, skip_reviews: bool = False, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> List[Contractor]:
+        """
+        Grow earlier results to max_results by requesting only the contractors they
+        are missing (continuation requests listing the known names) and scoring only
+        the new ones. Returns the merged list sorted by SantoScore, or the given
+        contractors if nothing new was found. single_pass and sharded are the original
+        search's options; they only pick the cache entry.
+        """
+        with self._search_more_span(contractors, service_type, location, max_results, scoring, lazy_reviews) as span:
+            cached = self._cached_more_results(span, contractors, service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+            if cached is not None:
+                return cached
+            try:
+                with self.limiter.admit(status_callback):
+                    merged = self._continue_search(list(contractors), service_type, location, max_results, skip_reviews, status_callback, lazy_reviews=lazy_reviews)
+                    new = self._new_contractors(span, contractors, merged, status_callback)
+                    if not new:
+                        return contractors
+                    self.score_contractors(new, service_type, scoring)
+            except Exception as e:
+                return self._search_more_failed(e, contractors, status_callback)
+            return self._finish_search_more(span, merged, service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+
+    def _search_more_span(self, contractors: List[Contractor], service_type: str, location: str, max_results: int, scoring: str, lazy_reviews: bool):
+        return self.metrics.span("search_more", service_type=service_type, location=location, max_results=max_results,
+                                 known=len(contractors), scoring=scoring, lazy_reviews=lazy_reviews)
+
+    def _cached_more_results(self, span, contractors: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, scoring: str, lazy_reviews: bool, single_pass: bool, sharded: bool) -> Optional[List[Contractor]]:
+        """
+        Cached results of search_more, if the cache already holds more than contractors
+        """
+        cached = self.get_cached_results(service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+        if cached is None or len(cached) <= len(contractors):
+            return None
+        span.set(cached=True, results=len(cached))
+        return cached
+
+    def _new_contractors(self, span, contractors: List[Contractor], merged: List[Contractor], status_callback=None) -> List[Contractor]:
+        """
+        The contractors of merged that were not in contractors (they still need scoring)
+        """
+        known = {id(contractor) for contractor in contractors}
+        new = [contractor for contractor in merged if id(contractor) not in known]
+        span.set(new=len(new))
+        if new and status_callback:
+            status_callback(f"⭐ Calculating SantoScores for {len(new)} new contractors...", "info")
+        return new
+
+    def _search_more_failed(self, error: Exception, contractors: List[Contractor], status_callback=None) -> List[Contractor]:
+        print(f"Error loading more contractors: {error}")
+        if status_callback:
+            status_callback(f"Loading more contractors failed: {error}", "error")
+        return contractors
+
+    def _finish_search_more(self, span, merged: List[Contractor], service_type: str, location: str, max_results: int, skip_reviews: bool, scoring: str, lazy_reviews: bool, single_pass: bool, sharded: bool) -> List[Contractor]:
+        """
+        Sort the merged results by SantoScore, limit them to max_results and cache them
+        """
+        merged.sort(key=lambda x: x.quality_score, reverse=True)
+        merged = merged[:max_results]
+        self.cache_results(service_type, location, max_results, skip_reviews, merged, scoring, lazy_reviews, single_pass, sharded)
+        span.set(results=len(merged))
+        return merged
+
+    def fetch_reviews(self, contractor: Contractor, service_type: str = "", location: str = "", skip_reviews: bool = False) -> List[Review]:
+        """
+        Fetch reviews for one contractor of a lazy_reviews search (one small request,
+        or none on a review cache hit) and store them on the contractor.
+        On an API error the contractor's current reviews are returned unchanged.
+        """
+        key = self._review_cache_key(contractor, skip_reviews)
+        with self.metrics.span("fetch_reviews") as span:
+            reviews = self._cached_reviews(key)
+            span.set(cached=reviews is not None)
+            if reviews is None:
+                try:
+                    response = self._complete("reviews_api", self._reviews_request(contractor, service_type, location, skip_reviews))
+                except Exception as e:
+                    return self._fetch_reviews_failed(e, contractor)
+                reviews = self._reviews_from_response(key, response)
+            span.set(reviews=len(reviews))
+
+        self._save_reviews(contractor, reviews, service_type, location)
+        return reviews
+
+    def _cached_reviews(self, key: str) -> Optional[List[Review]]:
+        return self.review_cache.get(key) if self.review_cache is not None else None
+
+    def _reviews_from_response(self, key: str, response) -> List[Review]:
+        """
+        Parse the reviews of a review response and cache them under key
+        """
+        reviews = self.parser.parse_reviews(response.choices[0].message.content or "")
+        if self.review_cache is not None:
+            self.review_cache.set(key, reviews)
+        return reviews
+
+    def _fetch_reviews_failed(self, error: Exception, contractor: Contractor) -> List[Review]:
+        print(f"Error fetching reviews for {contractor.name}: {error}")
+        return contractor.reviews
+
+    def _save_reviews(self, contractor: Contractor, reviews: List[Review], service_type: str, location: str):
+        """
+        Store fetched reviews on the contractor and in the persistent store
+        """
+        contractor.reviews = reviews
+        if self.store is not None and reviews:
+            self.store.upsert([contractor], service_type, location)
+
+    def _review_cache_key(self, contractor: Contractor, skip_reviews: bool) -> str:
+        """
+        Hash of the contractor identity (as entity resolution sees it) and review mode
+        """
+        fingerprint = {
+            "name": normalize_business_name(contractor.name),
+            "phone": normalize_phone(contractor.phone),
+            "domain": website_domain(contractor.website),
+            "skip_reviews": bool(skip_reviews)
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _build_reviews_prompt(self, contractor: Contractor, service_type: str, location: str, skip_reviews: bool) -> str:
+        """
+        Build the user prompt asking for the reviews of a single contractor
+        """
+        details = "\n".join(
+            f"{label}: {value}" for label, value in (
+                ("Name", contractor.name), ("Phone", contractor.phone),
+                ("Website", contractor.website), ("Address", contractor.address)
+            ) if value
+        )
+        if skip_reviews:
+            requirement = "List 3-5 customer reviews from web search if available."
+        else:
+            requirement = "List exactly 5 real customer reviews from web search, with actual reviewer names, individual ratings, specific review text and CURRENT dates (2025). Do NOT make up or pad reviews - list fewer if you cannot find 5."
+        return f"""Find real customer reviews for this {service_type or 'home services'} contractor{' in ' + location if location else ''}:
+{details}
+
+{requirement}
+
+Put each review on its own line in this exact format and add nothing else:
+- Reviewer: John S. | Rating: 5/5 | Review: "Excellent service, very professional" | Date: 2025-01-15
+
+If you cannot find any reviews for this business, reply with: No reviews found"""
 
+    def _reviews_request(self, contractor: Contractor, service_type: str, location: str, skip_reviews: bool) -> Dict[str, Any]:
+        """
+        Build the chat completion arguments for a single-contractor review request
+        """
+        return {
+            "model": "grok-4",
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self._build_reviews_prompt(contractor, service_type, location, skip_reviews)}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 800
+        }
+
+    def score_contractors(self, contractors: List[Contractor], service_type: str, scoring: str = "llm") -> List[Contractor]:
+        """
+        Calculate SantoScores for contractors collected from search_contractors_stream.
+        scoring="llm" asks grok-4, scoring="local" uses the local SantoScoreEngine.
+        """
+        with self.metrics.span("scoring", scoring=scoring, contractors=len(contractors)):
+            if scoring == "local":
+                return self.score_engine.score_contractors(contractors)
+            return self._calculate_quality_scores(contractors, service_type)
+
+    def _split_complete_sections(self, buffer: str):
+        """
+        Split off every CONTRACTOR block that is already closed by the next header.
+        Returns the complete sections and the remaining buffer.
+        """
+        # Every header after the first one closes the block before it
+        headers = list(CONTRACTOR_HEADER_PATTERN.finditer(buffer))
+        if len(headers) < 2:
+            return [], buffer
+        sections = [buffer[headers[k].end():headers[k + 1].start()] for k in range(len(headers) - 1)]
+        return sections, buffer[headers[-1].start():]
+
+    def _finish_stream(self, buffer: str, content: str, yielded: int, max_results: int, truncated: bool = False) -> List[Contractor]:
+        """
+        Parse the last block once a stream has ended. If structured parsing found
+        nothing at all, fall back to the alternative parser on the full content.
+        A stream cut off by max_tokens (truncated=True) never completes its last block.
+        """
+        if yielded >= max_results:
+            return []
+
+        # The last block is only complete once the stream has ended normally
+        header = CONTRACTOR_HEADER_PATTERN.search(buffer)
+        if header and not truncated:
+            contractor = self._section_to_contractor(buffer[header.end():])
+            if contractor:
+                return [contractor]
+
+        if truncated:
+            content = self._drop_incomplete_block(content)
+        if yielded == 0:
+            return self._parse_alternative_format(content)[:max_results]
+        return []
+
+    def _section_to_contractor(self, section: str) -> Optional[Contractor]:
+        """
+        Build a Contractor from a single CONTRACTOR block, or None if it has no name
+        """
+        if not section.strip():
+            return None
+
+        contractor_data = self._extract_contractor_info(section)
+        if not contractor_data.get('name'):
+            return None
+
+        return Contractor(**contractor_data)
+
+    def _parse_response(self, content: str) -> List[Contractor]:
+        """
+        Parse Grok's response to extract contractor information including reviews
+        """
+        return self.parser.parse(content)
+    
+    def _extract_contractor_info(self, text: str) -> Dict[str, Any]:
+        """
+        Extract contractor information from a text section including reviews
+        """
+        return self.parser.extract_contractor_info(text)
+    
+    def _parse_single_review(self, line: str) -> Optional[Review]:
+        """
+        Parse a single review line in the format: Reviewer: Name | Rating: X/5 | Review: "Text" | Date: YYYY-MM-DD
+        """
+        return self.parser.parse_single_review(line)
+    
+    def _parse_alternative_review_format(self, line: str) -> Optional[Review]:
+        """
+        Parse reviews in alternative formats that Grok might return
+        """
+        return self.parser.parse_alternative_review(line)
+    
     def _calculate_quality_scores(self, contractors: List[Contractor], service_type: str) -> List[Contractor]:
         """
         Calculate quality scores for contractors using Grok API (using grok-4 for best quality)
+        
+        Contractors are scored in batches of score_batch_size that run concurrently.
+        Scores are matched back by contractor id/name, never by position, and the
+        contractors a batch response did not cover are retried on their own.
         """
-        try:
-            # Prepare contractor data for scoring
-            contractor_data = []
-            for contractor in contractors:
-                contractor_info = {
-                    "name": contractor.name,
-                    "rating": contractor.rating,
-                    "services": contractor.services,
-                    "description": contractor.description,
-                    "license_status": contractor.license_status,
-                    "reviews": [{"reviewer": r.reviewer_name, "rating": r.rating, "text": r.review_text} for r in contractor.reviews]
-                }
-                contractor_data.append(contractor_info)
-            
-            scoring_prompt = f"""You are an expert evaluator of {service_type} contractors. Based on the provided contractor information, rate each contractor on a scale of 0-10 (where 10 is the best and 0 is the worst).
+        # Only contractors without a cached score go to the LLM
+        misses = self._apply_cached_scores(contractors, service_type)
+        if not misses:
+            return contractors
+        
+        batches = self._score_batches(misses)
+        if len(batches) == 1:
+            scored = [self._score_batch(batches[0], service_type)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.score_workers, len(batches))) as pool:
+                # Each batch runs in a copy of this context so its spans nest under the scoring span
+                futures = [pool.submit(contextvars.copy_context().run, self._score_batch, batch, service_type) for batch in batches]
+                scored = [future.result() for future in futures]
+        
+        self._store_cached_scores(scored, service_type)
+        return contractors
+    
+    def _score_cache_key(self, contractor: Contractor, service_type: str) -> str:
+        """
+        Hash of everything that feeds the scoring prompt for this contractor
+        """
+        fingerprint = {
+            "version": SCORING_PROMPT_VERSION,
+            "service_type": " ".join((service_type or "").lower().split()),
+            "name": contractor.name,
+            "rating": contractor.rating,
+            "services": contractor.services,
+            "description": contractor.description,
+            "license_status": contractor.license_status,
+            "reviews": [[r.reviewer_name, r.rating, r.review_text] for r in contractor.reviews]
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def _apply_cached_scores(self, contractors: List[Contractor], service_type: str) -> List[Contractor]:
+        """
+        Assign cached scores and return the contractors that still need scoring
+        """
+        if self.score_cache is None or not contractors:
+            return list(contractors)
+        
+        keys = [self._score_cache_key(contractor, service_type) for contractor in contractors]
+        cached = self.score_cache.get_many(keys)
+        misses = []
+        for contractor, key in zip(contractors, keys):
+            if key in cached:
+                contractor.quality_score, contractor.score_explanation = cached[key]
+            else:
+                misses.append(contractor)
+        print(f"Score cache: {len(contractors) - len(misses)} hits, {len(misses)} misses")
+        return misses
+    
+    def _store_cached_scores(self, scored: List[List[Contractor]], service_type: str):
+        """
+        Cache the LLM scores of the scored batches (local fallback scores are never cached)
+        """
+        contractors = [contractor for batch in scored for contractor in batch]
+        if self.score_cache is None or not contractors:
+            return
+        self.score_cache.set_many({
+            self._score_cache_key(contractor, service_type): (contractor.quality_score, contractor.score_explanation)
+            for contractor in contractors
+        })
+    
+    def _score_batches(self, contractors: List[Contractor]) -> List[List[Contractor]]:
+        """
+        Split contractors into scoring batches
+        """
+        size = max(1, self.score_batch_size)
+        return [contractors[i:i + size] for i in range(0, len(contractors), size)]
+    
+    def _score_batch(self, batch: List[Contractor], service_type: str) -> List[Contractor]:
+        """
+        Score one batch, retrying only the contractors that were not scored.
+        Returns the contractors that received an LLM score.
+        """
+        pending = batch
+        for attempt in range(1 + self.score_retries):
+            try:
+                response = self._complete("scoring_api", self._scoring_request(pending, service_type), batch_size=len(pending), attempt=attempt + 1)
+                pending = self._assign_batch_scores(pending, response)
+            except Exception as e:
+                print(f"Error calculating quality scores (attempt {attempt + 1}): {e}")
+            if not pending:
+                break
+        return self._finish_score_batch(batch, pending)
+
+    def _assign_batch_scores(self, pending: List[Contractor], response) -> List[Contractor]:
+        """
+        Assign the scores of a scoring response and return the contractors still unscored
+        """
+        with self.metrics.span("score_parse", batch_size=len(pending)) as span:
+            pending = self._assign_quality_scores(pending, response.choices[0].message.content)
+            span.set(unscored=len(pending))
+        return pending
+
+    def _finish_score_batch(self, batch: List[Contractor], pending: List[Contractor]) -> List[Contractor]:
+        """
+        Give the contractors left unscored the local SantoScore and return the ones the LLM scored
+        """
+        if pending:
+            # Contractors the model never scored get the local SantoScore
+            print(f"No score returned for {len(pending)} contractors, using local SantoScore")
+            self._assign_default_scores(pending)
+        pending_ids = {id(contractor) for contractor in pending}
+        return [contractor for contractor in batch if id(contractor) not in pending_ids]
+    
+    def _scoring_request(self, contractors: List[Contractor], service_type: str) -> Dict[str, Any]:
+        """
+        Build the chat completion arguments for scoring contractors
+        """
+        # Prepare contractor data for scoring, with a stable id to match scores back
+        contractor_data = []
+        for i, contractor in enumerate(contractors, 1):
+            contractor_info = {
+                "id": i,
+                "name": contractor.name,
+                "rating": contractor.rating,
+                "services": contractor.services,
+                "description": contractor.description,
+                "license_status": contractor.license_status,
+                "reviews": [{"reviewer": r.reviewer_name, "rating": r.rating, "text": r.review_text} for r in contractor.reviews]
+            }
+            contractor_data.append(contractor_info)
+        
+        scoring_prompt = f"""You are an expert evaluator of {service_type} contractors. Based on the provided contractor information, rate each contractor on a scale of 0-10 (where 10 is the best and 0 is the worst).
 
 Consider these factors when scoring:
 1. Overall rating/reputation
@@ -516,115 +1368,72 @@ Here are the contractors to evaluate:
 For each contractor, provide a score from 0-10 and a brief explanation (1-2 sentences max). Format your response as:
 
 CONTRACTOR: [Name]
+ID: [id]
 SCORE: [0-10 score]
 EXPLANATION: [Brief explanation of why this score was given, 1-2 sentences max]
 
 Continue for all contractors."""
+        
+        return {
+            "model": "grok-4",
+            "messages": [
+                {"role": "system", "content": "You are a professional contractor evaluation expert. Provide objective scores based on the information provided."},
+                {"role": "user", "content": scoring_prompt}
+            ],
+            "temperature": 0.2,
+            "max_tokens": 1500
+        }
+    
+    def _assign_quality_scores(self, contractors: List[Contractor], content: str) -> List[Contractor]:
+        """
+        Assign parsed scores from a scoring response to contractors by id or name.
+        Returns the contractors that did not get a score.
+        """
+        by_name = {}
+        for contractor in contractors:
+            by_name.setdefault(normalize_contractor_name(contractor.name), contractor)
+        
+        scored = set()
+        for entry in self._parse_quality_scores(content):
+            contractor = None
+            # Prefer the id, but only when the name (if given) agrees with it
+            contractor_id = entry.get('id')
+            if contractor_id is not None and 1 <= contractor_id <= len(contractors):
+                candidate = contractors[contractor_id - 1]
+                if not entry.get('name') or normalize_contractor_name(entry['name']) == normalize_contractor_name(candidate.name):
+                    contractor = candidate
+            if contractor is None and entry.get('name'):
+                contractor = by_name.get(normalize_contractor_name(entry['name']))
+            if contractor is None or id(contractor) in scored:
+                continue
             
-            response = self.client.chat.completions.create(
-                model="grok-4",
-                messages=[
-                    {"role": "system", "content": "You are a professional contractor evaluation expert. Provide objective scores based on the information provided."},
-                    {"role": "user", "content": scoring_prompt}
-                ],
-                temperature=0.2,
-                max_tokens=1500
-            )
-            
-            # Parse scores and assign to contractors
-            scores = self._parse_quality_scores(response.choices[0].message.content)
-            
-            # Assign scores to contractors
-            for i, contractor in enumerate(contractors):
-                if i < len(scores):
-                    contractor.quality_score = scores[i]
-                else:
-                    contractor.quality_score = 5.0  # Default score if not found
-            
-            return contractors
-            
+            contractor.quality_score = entry['score']
+            contractor.score_explanation = entry.get('explanation', '')
+            scored.add(id(contractor))
+        
+        return [contractor for contractor in contractors if id(contractor) not in scored]
+    
+    def _assign_default_scores(self, contractors: List[Contractor]) -> List[Contractor]:
+        """
+        Return contractors with local SantoScores if the scoring call fails
+        """
+        try:
+            return self.score_engine.score_contractors(contractors)
         except Exception as e:
-            print(f"Error calculating quality scores: {e}")
-            # Return contractors with default scores if scoring fails
+            print(f"Error calculating local quality scores: {e}")
             for contractor in contractors:
                 contractor.quality_score = 5.0
             return contractors
     
-    def _parse_quality_scores(self, content: str) -> List[float]:
+    def _parse_quality_scores(self, content: str) -> List[Dict[str, Any]]:
         """
-        Parse quality scores from Grok's response
+        Parse quality scores from Grok's response into entries with
+        name, id, score and explanation (entries without a score are dropped)
         """
-        scores = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('SCORE:'):
-                try:
-                    score_text = line.split(':', 1)[1].strip()
-                    # Extract numeric score
-                    score_match = re.search(r'(\d+(?:\.\d+)?)', score_text)
-                    if score_match:
-                        score = float(score_match.group(1))
-                        # Ensure score is between 0 and 10
-                        score = max(0, min(10, score))
-                        scores.append(score)
-                except (ValueError, IndexError):
-                    scores.append(5.0)  # Default score if parsing fails
-        
-        return scores
+        return self.parser.parse_quality_scores(content)
     
     def _parse_alternative_format(self, content: str) -> List[Contractor]:
         """
         Alternative parsing method for different response formats
         """
-        contractors = []
-        lines = content.split('\n')
-        
-        current_contractor = {'reviews': []}
-        business_name_pattern = r'^[A-Z][A-Za-z\s&\-\'\.\,\(\)]+(?:LLC|Inc|Corporation|Corp|Company|Co\.|Services|Solutions|Group)?$'
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Look for business names
-            if re.match(business_name_pattern, line) and len(line) > 5 and len(line) < 100:
-                if current_contractor and current_contractor.get('name'):
-                    contractors.append(Contractor(**current_contractor))
-                    current_contractor = {'reviews': []}
-                current_contractor['name'] = line
-            
-            # Extract other information...
-            phone_match = re.search(r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b', line)
-            if phone_match:
-                current_contractor['phone'] = phone_match.group()
-            
-            email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', line)
-            if email_match:
-                current_contractor['email'] = email_match.group()
-            
-            website_match = re.search(r'https?://[^\s]+|www\.[^\s]+', line)
-            if website_match:
-                current_contractor['website'] = website_match.group()
-            
-            if re.search(r'\b\d+\s+[A-Za-z\s]+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive|Ln|Lane|Way|Ct|Court)\b', line):
-                current_contractor['address'] = line
-            
-            rating_match = re.search(r'(\d+\.?\d*)\s*(?:\/\s*5|\s*stars?|\s*out\s*of\s*5)', line, re.IGNORECASE)
-            if rating_match:
-                current_contractor['rating'] = rating_match.group()
-            
-            # Parse reviews in alternative format - only if valid data found
-            review = self._parse_alternative_review_format(line)
-            if review:
-                if 'reviews' not in current_contractor:
-                    current_contractor['reviews'] = []
-                current_contractor['reviews'].append(review)
-        
-        # Add last contractor if exists
-        if current_contractor and current_contractor.get('name'):
-            contractors.append(Contractor(**current_contractor))
-        
-        return contractors
+        return self.parser.parse_alternative_format(content)
@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Number of recent observations each histogram keeps for percentiles
+HISTOGRAM_WINDOW = int(os.getenv("METRICS_HISTOGRAM_WINDOW", 10000))
+
+# Innermost active span in the current thread/task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+logger = logging.getLogger("metrics")
+
+
+def _configure_logger():
+    """
+    Send span JSON logs to stderr unless METRICS_LOG=0 or logging is already configured for "metrics"
+    """
+    if os.getenv("METRICS_LOG", "1").lower() in ("0", "false", "no", "off"):
+        logger.disabled = True
+        return
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+_configure_logger()
+
+
+class Histogram:
+    """
+    Sliding window of observations with count/mean/percentile summaries
+    """
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.values)
+        if not ordered:
+            return {"count": 0}
+
+        def percentile(p: float) -> float:
+            # Nearest-rank percentile over the window
+            return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": ordered[-1],
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process registry of histograms and counters fed by finished spans
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def span(self, name: str, parent: "Span" = None, **attributes) -> "Span":
+        """
+        Create a span that reports to this registry (use as a context manager)
+        """
+        return Span(name, self, parent=parent, **attributes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return {"histograms": {name: summary}, "counters": {name: value}}
+        """
+        with self._lock:
+            return {
+                "histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+class Span:
+    """
+    Timed pipeline stage. On finish the duration (and time-to-first-token,
+    token usage and nested stage times when recorded) go to the registry and
+    one JSON log line is emitted:
+
+        with registry.span("search_api", model="grok-4") as span:
+            response = client.chat.completions.create(...)
+            span.record_response(response)
+    """
+
+    def __init__(self, name: str, registry: MetricsRegistry, parent: "Span" = None, **attributes):
+        self.name = name
+        self.registry = registry
+        parent = parent if parent is not None else _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes)
+        self.stage_times = {}
+        self.duration_ms = None
+        self._start = None
+        self._token = None
+        self._finished = False
+
+    def __enter__(self) -> "Span":
+        self.start()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.finish()
+        return False
+
+    def start(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this span the active parent without timing anything (for spans that
+        are started and finished by hand, e.g. around a streamed response)
+        """
+        token = _current_span.set(self)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def first_token(self):
+        """
+        Mark the arrival of the first streamed token (only the first call counts)
+        """
+        if "ttft_ms" not in self.attributes:
+            self.attributes["ttft_ms"] = (time.perf_counter() - self._start) * 1000.0
+
+    def record_usage(self, usage):
+        """
+        Record token counts from an OpenAI usage object or dict
+        """
+        if not usage:
+            return
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+            if value is not None:
+                self.attributes[field] = value
+
+    def record_response(self, response):
+        """
+        Record usage and finish_reason from a chat completion response
+        """
+        self.record_usage(getattr(response, "usage", None))
+        choices = getattr(response, "choices", None)
+        if choices:
+            self.attributes["finish_reason"] = choices[0].finish_reason
+
+    def add_time(self, stage: str, seconds: float):
+        """
+        Accumulate time spent in a nested stage (see timed_stage)
+        """
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.duration_ms = (time.perf_counter() - self._start) * 1000.0
+
+        registry = self.registry
+        registry.observe(f"{self.name}.duration_ms", self.duration_ms)
+        if "ttft_ms" in self.attributes:
+            registry.observe(f"{self.name}.ttft_ms", self.attributes["ttft_ms"])
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if field in self.attributes:
+                registry.observe(f"{self.name}.{field}", self.attributes[field])
+        if self.attributes.get("finish_reason"):
+            registry.increment(f"{self.name}.finish_reason.{self.attributes['finish_reason']}")
+        if "error" in self.attributes:
+            registry.increment(f"{self.name}.errors")
+        for stage, seconds in self.stage_times.items():
+            registry.observe(f"{stage}.duration_ms", seconds * 1000.0)
+
+        if logger.isEnabledFor(logging.INFO):
+            record = {
+                "event": "span",
+                "name": self.name,
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "ts": time.time(),
+                "duration_ms": round(self.duration_ms, 3),
+            }
+            record.update({f"{stage}_ms": round(seconds * 1000.0, 3) for stage, seconds in self.stage_times.items()})
+            record.update(self.attributes)
+            logger.info(json.dumps(record, default=str))
+
+
+def current_span() -> Optional[Span]:
+    """
+    Return the innermost active span, if any
+    """
+    return _current_span.get()
+
+
+def timed_stage(stage: str):
+    """
+    Decorator that adds the wrapped function's run time to the active span as a
+    nested stage (e.g. URL validation inside the parse span)
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            span = _current_span.get()
+            if span is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                span.add_time(stage, time.perf_counter() - start)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+# Process-wide registry used by default
+REGISTRY = MetricsRegistry()
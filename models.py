@@ -0,0 +1,279 @@
+import re
+import sys
+from enum import Enum
+from datetime import datetime
+from functools import lru_cache
+from dataclasses import dataclass, field, fields
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+from validators import clean_website_url, is_valid_email, is_valid_phone
+
+RATING_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?)|out\s+of\s+(\d+(?:\.\d+)?))?', re.IGNORECASE)
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%Y-%m", "%B %Y", "%b %Y")
+NON_DIGIT_PATTERN = re.compile(r'\D')
+# "License #12345" first, otherwise the first token with a digit ("CSLB 987654", "ROC-12345")
+LICENSE_NUMBER_PATTERN = re.compile(r'#\s*([A-Z0-9][A-Z0-9-]{2,})|\b([A-Z]*-?\d[A-Z0-9-]{2,})\b', re.IGNORECASE)
+INACTIVE_LICENSE_WORDS = ("inactive", "expired", "revoked", "suspended", "not licensed", "unlicensed")
+ACTIVE_LICENSE_WORDS = ("active", "licensed", "valid", "current")
+
+
+class LicenseStatus(str, Enum):
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+    UNKNOWN = "unknown"
+
+
+def parse_rating(text: str) -> Optional[float]:
+    """
+    Parse a free-form rating ("4.8/5 stars", "9 out of 10", "4.5") into 0-1, or None
+    """
+    if not text:
+        return None
+    match = RATING_PATTERN.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    scale = match.group(2) or match.group(3)
+    if scale:
+        scale = float(scale)
+    elif value <= 5:
+        scale = 5.0
+    elif value <= 10:
+        scale = 10.0
+    else:
+        scale = 100.0
+    if scale <= 0:
+        return None
+    return max(0.0, min(1.0, value / scale))
+
+
+@lru_cache(maxsize=4096)
+def rating_stars(text: str) -> Optional[float]:
+    """
+    Parse a free-form rating onto the 0-5 scale, or None
+    (memoized: reviews repeat the same few rating strings)
+    """
+    rating = parse_rating(text)
+    return None if rating is None else round(rating * 5, 2)
+
+
+def parse_date(text: str) -> Optional[datetime]:
+    """
+    Parse a review date in any of DATE_FORMATS, or None if the format is unknown
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        # Fast path for the ISO dates the search prompt asks for
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_review_date(text: str) -> Optional[float]:
+    """
+    Parse a review date into a POSIX timestamp, or None if the format is unknown
+    """
+    parsed = parse_date(text)
+    return None if parsed is None else parsed.timestamp()
+
+
+@lru_cache(maxsize=4096)
+def iso_date(text: str) -> str:
+    """
+    Review date as YYYY-MM-DD (month-only dates become the 1st), or "" if the format is unknown
+    (memoized like rating_stars)
+    """
+    parsed = parse_date(text)
+    return parsed.date().isoformat() if parsed else ""
+
+
+def e164_phone(phone: str) -> str:
+    """
+    Phone number in E.164 form (+15551234567; 10 digit numbers are taken as US), or ""
+    """
+    digits = NON_DIGIT_PATTERN.sub('', phone or '')
+    if (phone or '').lstrip().startswith('+'):
+        return '+' + digits if 8 <= len(digits) <= 15 else ''
+    if len(digits) == 10:
+        return '+1' + digits
+    if len(digits) == 11 and digits.startswith('1'):
+        return '+' + digits
+    return ''
+
+
+def canonical_domain(url: str) -> str:
+    """
+    Lowercased host of a website without "www." or port, or ""
+    """
+    url = (url or '').strip().lower()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'https://' + url
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def parse_license(license_status: str) -> Tuple[LicenseStatus, str]:
+    """
+    Split a free-form license status ("Active, License #12345") into a LicenseStatus and the license number
+    """
+    status = (license_status or "").lower()
+    if not status or "unknown" in status:
+        state = LicenseStatus.UNKNOWN
+    elif any(word in status for word in INACTIVE_LICENSE_WORDS):
+        state = LicenseStatus.INACTIVE
+    elif any(word in status for word in ACTIVE_LICENSE_WORDS):
+        state = LicenseStatus.ACTIVE
+    else:
+        state = LicenseStatus.UNKNOWN
+    match = LICENSE_NUMBER_PATTERN.search(license_status or "")
+    number = (match.group(1) or match.group(2)).upper() if match else ""
+    return state, number
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+# Short strings repeated across many records share one copy
+INTERNED_REVIEW_FIELDS = frozenset(("reviewer_name", "rating", "date", "source"))
+INTERNED_CONTRACTOR_FIELDS = frozenset(("rating", "license_status", "domain"))
+
+
+@dataclass(slots=True)
+class Review:
+    reviewer_name: str
+    rating: str
+    review_text: str
+    date: str = ""
+    source: str = ""
+    # Normalized once at construction (or restored by from_dict)
+    rating_value: Optional[float] = field(init=False, repr=False, compare=False)
+    date_iso: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.reviewer_name = _intern(self.reviewer_name)
+        self.rating = _intern(self.rating)
+        self.date = _intern(self.date)
+        self.source = _intern(self.source)
+        self.rating_value = rating_stars(self.rating)
+        self.date_iso = iso_date(self.date)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        All fields, normalized ones included, as a JSON-serializable dict
+        """
+        return {name: getattr(self, name) for name in ALL_REVIEW_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Review":
+        """
+        Rebuild a review from to_dict output without normalizing it again
+        (output without the normalized fields is normalized as on construction)
+        """
+        if not data.keys() >= ALL_REVIEW_FIELDS_SET:
+            return cls(**{name: data[name] for name in REVIEW_FIELDS if name in data})
+        review = cls.__new__(cls)
+        for name in ALL_REVIEW_FIELDS:
+            value = data[name]
+            setattr(review, name, _intern(value) if name in INTERNED_REVIEW_FIELDS else value)
+        return review
+
+
+@dataclass(slots=True)
+class Contractor:
+    name: str
+    phone: str = ""
+    email: str = ""
+    website: str = ""
+    address: str = ""
+    services: str = ""
+    rating: str = ""
+    description: str = ""
+    license_status: str = ""
+    reviews: List[Review] = None
+    quality_score: float = 0.0
+    score_explanation: str = ""
+    # Normalized fields and validation flags, computed once at construction (or restored by
+    # from_dict); call normalize() after changing a field they are derived from
+    rating_value: Optional[float] = field(init=False, repr=False, compare=False)
+    phone_e164: str = field(init=False, repr=False, compare=False)
+    phone_valid: bool = field(init=False, repr=False, compare=False)
+    email_valid: bool = field(init=False, repr=False, compare=False)
+    domain: str = field(init=False, repr=False, compare=False)
+    website_safe: bool = field(init=False, repr=False, compare=False)
+    license_state: LicenseStatus = field(init=False, repr=False, compare=False)
+    license_number: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.reviews is None:
+            self.reviews = []
+        self.normalize()
+
+    def normalize(self):
+        """
+        Validate the website and compute the normalized fields from the raw ones
+        """
+        # Validate and clean website URL (the only place websites are validated; unsafe ones become "")
+        if self.website:
+            self.website = clean_website_url(self.website) or ""
+        self.rating = _intern(self.rating)
+        self.license_status = _intern(self.license_status)
+        self.rating_value = rating_stars(self.rating)
+        self.phone_e164 = e164_phone(self.phone)
+        self.phone_valid = is_valid_phone(self.phone)
+        self.email_valid = is_valid_email(self.email)
+        self.domain = _intern(canonical_domain(self.website))
+        self.website_safe = bool(self.website)
+        self.license_state, self.license_number = parse_license(self.license_status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        All fields (reviews and normalized fields included) as a JSON-serializable dict
+        """
+        data = {name: getattr(self, name) for name in ALL_CONTRACTOR_FIELDS}
+        data["license_state"] = self.license_state.value
+        data["reviews"] = [review.to_dict() for review in self.reviews]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Contractor":
+        """
+        Rebuild a contractor from to_dict output (unknown keys are ignored). The website
+        is not validated and nothing is normalized again; output without the normalized
+        fields (written before they were serialized) goes through the constructor.
+        """
+        reviews = [Review.from_dict(review) for review in data.get("reviews") or []]
+        if not data.keys() >= ALL_CONTRACTOR_FIELDS_SET:
+            values = {name: data[name] for name in CONTRACTOR_FIELDS if name in data}
+            values["reviews"] = reviews
+            return cls(**values)
+        contractor = cls.__new__(cls)
+        for name in ALL_CONTRACTOR_FIELDS:
+            value = data[name]
+            setattr(contractor, name, _intern(value) if name in INTERNED_CONTRACTOR_FIELDS else value)
+        contractor.license_state = LicenseStatus(data["license_state"])
+        contractor.reviews = reviews
+        return contractor
+
+
+# Constructor (raw) fields
+REVIEW_FIELDS = tuple(f.name for f in fields(Review) if f.init)
+CONTRACTOR_FIELDS = tuple(f.name for f in fields(Contractor) if f.init)
+# Every field, as serialized by to_dict
+ALL_REVIEW_FIELDS = tuple(f.name for f in fields(Review))
+ALL_CONTRACTOR_FIELDS = tuple(f.name for f in fields(Contractor))
+ALL_REVIEW_FIELDS_SET = frozenset(ALL_REVIEW_FIELDS)
+ALL_CONTRACTOR_FIELDS_SET = frozenset(ALL_CONTRACTOR_FIELDS)
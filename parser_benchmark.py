@@ -0,0 +1,244 @@
+"""
+Microbenchmarks for the response parsing and website validation hot paths.
+
+Each case reports time per call, throughput and peak allocation (tracemalloc),
+and can be saved as or compared against a baseline file:
+
+    python parser_benchmark.py                    # run and print
+    python parser_benchmark.py --save-baseline    # write benchmark_baseline.json
+    python parser_benchmark.py --compare          # fail if a case got slower than the baseline allows
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Callable, Dict, Any, List, Tuple
+from response_parser import ResponseParser, CONTRACTOR_HEADER_PATTERN
+from validators import is_suspicious_domain, clean_website_url
+from synthetic_data import (
+    make_search_response, make_messy_response, make_scoring_response,
+    make_pathological_line, make_website_samples, contractor_name
+)
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+# A case regresses when it is this much slower than its baseline
+DEFAULT_TOLERANCE = 0.25
+SIZES = (5, 50, 500)
+QUICK_SIZES = (5, 50)
+
+
+class Case:
+    """
+    One benchmark: calls func(arg) and counts len(payload) bytes of input per call
+    """
+
+    def __init__(self, name: str, func: Callable, arg: Any, payload_bytes: int):
+        self.name = name
+        self.func = func
+        self.arg = arg
+        self.payload_bytes = payload_bytes
+
+
+def build_cases(sizes=SIZES) -> List[Case]:
+    """
+    Build every benchmark case from the synthetic corpus.
+    Case names use the GrokContractorSearch method each parser function backs.
+    """
+    parser = ResponseParser()
+    cases = []
+
+    for size in sizes:
+        wellformed = make_search_response(size, reviews=5)
+        messy = make_messy_response(size)
+        scores = make_scoring_response([{"id": i + 1, "name": contractor_name(i)} for i in range(size)])
+        cases.append(Case(f"_parse_response/wellformed/{size}", parser.parse, wellformed, len(wellformed)))
+        cases.append(Case(f"_parse_response/messy/{size}", parser.parse, messy, len(messy)))
+        cases.append(Case(f"_parse_alternative_format/messy/{size}", parser.parse_alternative_format, messy, len(messy)))
+        cases.append(Case(f"_parse_quality_scores/{size}", parser.parse_quality_scores, scores, len(scores)))
+
+    section = CONTRACTOR_HEADER_PATTERN.split(make_search_response(1, reviews=10))[1]
+    cases.append(Case("_extract_contractor_info/block", parser.extract_contractor_info, section, len(section)))
+
+    review = '- Reviewer: Sarah M. | Rating: 5/5 | Review: "Excellent service, very professional and on time" | Date: 2025-03-14'
+    cases.append(Case("_parse_single_review/line", parser.parse_single_review, review, len(review)))
+
+    for label, line in (
+        ("dash", "John S. - 5/5 stars - Great service, fixed the leak in under an hour!"),
+        ("paren", "Sarah M. (4/5): Excellent work done quickly and cleanly"),
+        ("quote", "Mike D. left 4.5 stars: \"They showed up on time and the price was fair\""),
+        ("nomatch", "They have been in business for over twenty years and serve the whole county"),
+    ):
+        cases.append(Case(f"_parse_alternative_review_format/{label}", parser.parse_alternative_review, line, len(line)))
+
+    # Pathological long lines
+    for length in (10_000, 100_000):
+        line = make_pathological_line(length)
+        block = "Name: Long Line Plumbing\n" + line + "\nReviews:\n" + line
+        cases.append(Case(f"_parse_alternative_review_format/long/{length}", parser.parse_alternative_review, line, len(line)))
+        cases.append(Case(f"_extract_contractor_info/long/{length}", parser.extract_contractor_info, block, len(block)))
+        cases.append(Case(f"_parse_response/long/{length}", parser.parse, line, len(line)))
+
+    websites = make_website_samples(200)
+    website_bytes = sum(len(url) for url in websites)
+    cases.append(Case("is_suspicious_domain/mixed/200", lambda urls: [is_suspicious_domain(url) for url in urls], websites, website_bytes))
+    cases.append(Case("clean_website_url/mixed/200", lambda urls: [clean_website_url(url) for url in urls], websites, website_bytes))
+    long_url = "https://www." + "a" * 5000 + ".com/" + "b" * 5000
+    cases.append(Case("clean_website_url/long/10000", clean_website_url, long_url, len(long_url)))
+
+    return cases
+
+
+def time_case(case: Case, min_time: float, repeats: int) -> Tuple[float, float]:
+    """
+    Return (best, median) seconds per call over repeats rounds of at least min_time each
+    """
+    # Calibrate the number of calls per round
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            case.func(case.arg)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= 1_000_000:
+            break
+        calls *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    rounds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            case.func(case.arg)
+        rounds.append((time.perf_counter() - start) / calls)
+    return min(rounds), statistics.median(rounds)
+
+
+def measure_allocation(case: Case) -> Tuple[int, int]:
+    """
+    Return (peak bytes, allocated blocks still alive) for one call under tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = case.func(case.arg)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+        del result
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline), blocks
+
+
+def run(cases: List[Case], min_time: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Time and measure every case (validation warnings are silenced while timing)
+    """
+    results = {}
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for case in cases:
+            best, median = time_case(case, min_time, repeats)
+            peak_bytes, blocks = measure_allocation(case)
+            results[case.name] = {
+                "best_us": best * 1e6,
+                "median_us": median * 1e6,
+                "calls_per_s": 1.0 / best if best else 0.0,
+                "mb_per_s": case.payload_bytes / best / 1e6 if best else 0.0,
+                "input_bytes": case.payload_bytes,
+                "peak_kb": peak_bytes / 1024,
+                "blocks": blocks,
+            }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Return the names of cases whose best time regressed beyond tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["best_us"] > reference["best_us"] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]] = None):
+    header = f"{'case':<48} {'best us':>11} {'median us':>11} {'MB/s':>8} {'peak KB':>9} {'blocks':>7}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        line = (
+            f"{name:<48} {result['best_us']:>11.1f} {result['median_us']:>11.1f} "
+            f"{result['mb_per_s']:>8.1f} {result['peak_kb']:>9.1f} {result['blocks']:>7}"
+        )
+        if baseline:
+            reference = baseline.get(name)
+            line += f" {result['best_us'] / reference['best_us']:>7.2f}x" if reference else f" {'new':>8}"
+        print(line)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file).get("results", {})
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, file, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark response parsing and website validation")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline file to compare against or save")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="exit with status 1 if any case regressed")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown before a case counts as a regression")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="skip the 500-contractor corpus and use shorter rounds")
+    parser.add_argument("--min-time", type=float, default=None, help="minimum seconds per timing round")
+    parser.add_argument("--repeats", type=int, default=5, help="timing rounds per case")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in build_cases(QUICK_SIZES if args.quick else SIZES) if args.filter in case.name]
+    min_time = args.min_time if args.min_time is not None else (0.02 if args.quick else 0.1)
+    results = run(cases, min_time, args.repeats)
+
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nSaved baseline to {args.baseline}")
+
+    if args.compare:
+        if not baseline:
+            print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}:")
+            for name in regressions:
+                print(f"  {name}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Process-wide rate limiting for xAI API calls.
+
+Every GrokContractorSearch in the process (the Streamlit singleton shared by
+all sessions, background refreshes, batch_search.py workers) shares LIMITER:
+
+- token buckets for requests per minute and tokens per minute, so bursts of
+  concurrent searches are spread out instead of all hitting xAI at once;
+  a request reserves its prompt plus the share of max_tokens responses usually
+  use (GROK_EXPECTED_OUTPUT_RATIO, default 0.5) and settles to its real usage,
+  so the default 10-second burst fits every shard of one sharded search;
+- an admission queue that lets at most max_concurrent searches run at a time
+  and reports each waiting search's queue position through its status_callback;
+- retries with exponential backoff and full jitter for 429, 5xx and connection
+  errors, honoring Retry-After when the API sends one.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Callable, Dict, Any, Optional
+from metrics import REGISTRY
+
+# Statuses worth retrying: rate limited, and server errors that are usually transient
+RETRY_STATUSES = frozenset((408, 409, 429, 500, 502, 503, 504))
+# Rough prompt size estimate before the API reports real usage
+CHARS_PER_TOKEN = 4
+# Seconds between checks of an async search waiting for a slot (it cannot wait on the condition)
+ASYNC_ADMIT_POLL = 0.1
+
+# (status_callback, thread id) of the search admitted in this context
+_status = contextvars.ContextVar("rate_limiter_status", default=None)
+
+
+class AdmissionTimeout(RuntimeError):
+    """
+    A search waited longer than admission_timeout for a free slot
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at rate per second up to capacity (rate 0 = unlimited).
+
+    reserve() takes tokens immediately, even into debt, and returns how long the
+    caller must wait, so concurrent callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take amount tokens and return the seconds to wait before using them
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            # A request larger than the bucket would never fit, so it only waits for a full bucket
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        """
+        Give back tokens reserved but not used (e.g. a token estimate above the real usage)
+        """
+        if self.rate <= 0 or not amount:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(request: Dict[str, Any], output_ratio: float = 1.0) -> int:
+    """
+    Token estimate of a chat completion request: prompt size plus output_ratio
+    of max_tokens (1.0 gives an upper bound)
+    """
+    prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages") or [])
+    return prompt_chars // CHARS_PER_TOKEN + int(int(request.get("max_tokens") or 0) * output_ratio)
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """
+    HTTP status of an API error, or 0 for connection errors and timeouts, or None if not retryable
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status if status in RETRY_STATUSES or status >= 500 else None
+    name = type(error).__name__
+    if name in ("APIConnectionError", "APITimeoutError") or isinstance(error, (ConnectionError, TimeoutError)):
+        return 0
+    return None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Seconds from the Retry-After header of an API error response, if present
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Request and token buckets, search admission queue and retry policy for xAI calls
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, max_concurrent: int = None,
+                 max_retries: int = None, backoff_base: float = None, backoff_max: float = None, admission_timeout: float = None,
+                 output_ratio: float = None):
+        requests_per_minute = requests_per_minute if requests_per_minute is not None else float(os.getenv("GROK_REQUESTS_PER_MINUTE", 60))
+        tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else float(os.getenv("GROK_TOKENS_PER_MINUTE", 100000))
+        # Bursts of up to 10 seconds' worth of requests/tokens pass without waiting. With the defaults
+        # that is 10 requests and ~16.7k tokens: the 6 shard requests of a sharded search (~2.6k tokens
+        # each with output_ratio 0.5) start together, and so do its concurrent scoring batches.
+        self.requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute / 6.0)
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 6.0)
+        # Share of max_tokens reserved for the response until the real usage is known (see settle)
+        self.output_ratio = output_ratio if output_ratio is not None else float(os.getenv("GROK_EXPECTED_OUTPUT_RATIO", 0.5))
+        self.max_concurrent = max_concurrent or int(os.getenv("GROK_MAX_CONCURRENT_SEARCHES", 4))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GROK_MAX_RETRIES", 4))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.getenv("GROK_BACKOFF_BASE", 1.0))
+        self.backoff_max = backoff_max if backoff_max is not None else float(os.getenv("GROK_BACKOFF_MAX", 30.0))
+        self.admission_timeout = admission_timeout if admission_timeout is not None else float(os.getenv("GROK_ADMISSION_TIMEOUT", 300))
+        self.active = 0
+        self.retries = 0
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._random = random.Random()
+
+    @contextmanager
+    def admit(self, status_callback: Callable = None):
+        """
+        Hold one of max_concurrent search slots for the duration of the block.
+        Searches wait in FIFO order; a waiting search is told its position in line
+        through status_callback. Nested admits in the same context reuse the slot.
+        """
+        if _status.get() is not None:
+            yield
+            return
+        ticket = object()
+        started = time.monotonic()
+        reported = None
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    position = self._take_slot(ticket)
+                    if not position:
+                        break
+                    reported = self._waiting(position, reported, status_callback)
+                    self._condition.wait(min(self._remaining(started), 1.0))
+            except BaseException:
+                self._leave_queue(ticket)
+                raise
+        REGISTRY.observe("admission_wait.duration_ms", (time.monotonic() - started) * 1000.0)
+        token = _status.set((status_callback, threading.get_ident()))
+        try:
+            yield
+        finally:
+            _status.reset(token)
+            self._release()
+
+    @asynccontextmanager
+    async def admit_async(self, status_callback: Callable = None):
+        """
+        admit() for coroutines: waits in the same queue for the same slots, but with
+        asyncio.sleep between checks so other tasks on the event loop keep running
+        """
+        if _status.get() is not None:
+            yield
+            return
+        ticket = object()
+        started = time.monotonic()
+        reported = None
+        with self._condition:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._condition:
+                    position = self._take_slot(ticket)
+                if not position:
+                    break
+                reported = self._waiting(position, reported, status_callback)
+                await asyncio.sleep(min(self._remaining(started), ASYNC_ADMIT_POLL))
+        except BaseException:
+            with self._condition:
+                self._leave_queue(ticket)
+            raise
+        REGISTRY.observe("admission_wait.duration_ms", (time.monotonic() - started) * 1000.0)
+        token = _status.set((status_callback, threading.get_ident()))
+        try:
+            yield
+        finally:
+            _status.reset(token)
+            self._release()
+
+    def _take_slot(self, ticket) -> int:
+        """
+        Admit ticket if it is first in line and a slot is free (returns 0), otherwise
+        return its position in line (call with the condition held)
+        """
+        if self._queue[0] is not ticket or self.active >= self.max_concurrent:
+            return self._queue.index(ticket) + 1
+        self._queue.popleft()
+        self.active += 1
+        # The next search in line may also fit
+        self._condition.notify_all()
+        return 0
+
+    def _waiting(self, position: int, reported: Optional[int], status_callback: Callable) -> int:
+        """
+        Tell a waiting search its position in line when it changed, and return the position
+        """
+        if status_callback and position != reported:
+            status_callback(f"⏳ All search slots are busy - you are #{position} in line...", "info")
+        return position
+
+    def _remaining(self, started: float) -> float:
+        """
+        Seconds a search waiting since started may still wait for a slot
+        """
+        remaining = self.admission_timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            raise AdmissionTimeout("Too many searches are running right now, please try again in a minute.")
+        return remaining
+
+    def _leave_queue(self, ticket):
+        # Call with the condition held
+        self._queue.remove(ticket)
+        self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def call(self, func: Callable, request: Dict[str, Any]):
+        """
+        Run func(**request) once the request and token buckets allow it, retrying
+        429/5xx/connection errors with exponential backoff and full jitter
+        """
+        estimated = estimate_tokens(request, self.output_ratio)
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._reserve(estimated))
+            try:
+                return func(**request)
+            except Exception as e:
+                # A failed request used none of the tokens reserved for it
+                self.tokens.refund(estimated)
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def call_async(self, func: Callable, request: Dict[str, Any]):
+        """
+        call() for coroutine functions: awaits func(**request), waiting with asyncio.sleep
+        """
+        estimated = estimate_tokens(request, self.output_ratio)
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._reserve(estimated))
+            try:
+                return await func(**request)
+            except Exception as e:
+                # A failed request used none of the tokens reserved for it
+                self.tokens.refund(estimated)
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def _backoff(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed attempt, or None if it should not be retried
+        """
+        status = error_status(error)
+        if status is None or attempt >= self.max_retries:
+            if status is not None:
+                self._report(f"xAI API is unavailable ({status or 'connection error'}) after {attempt + 1} attempts.", "error")
+            return None
+        # Full jitter: uniform in [0, base * 2^attempt], capped; Retry-After wins when it is longer
+        delay = self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        delay = max(delay, min(self.backoff_max, retry_after(error) or 0.0))
+        with self._condition:
+            self.retries += 1
+        REGISTRY.increment("grok_api.retries")
+        print(f"xAI API error ({status or type(error).__name__}), retrying in {delay:.1f}s (attempt {attempt + 2} of {self.max_retries + 1})")
+        reason = "is rate limiting us" if status == 429 else "had an error"
+        self._report(f"⏳ xAI API {reason}, retrying in {delay:.1f}s (attempt {attempt + 2} of {self.max_retries + 1})...", "info")
+        return delay
+
+    def settle(self, request: Dict[str, Any], used: Optional[int]):
+        """
+        Correct a request's token reservation to its real usage (used = reported total_tokens):
+        the unused part of the estimate is returned, usage above it is charged so later
+        requests wait for it. Never waits, so call() and call_async() both use it.
+        """
+        if used is None:
+            return
+        estimated = estimate_tokens(request, self.output_ratio)
+        if used < estimated:
+            self.tokens.refund(estimated - used)
+        elif used > estimated:
+            self.tokens.reserve(used - estimated)
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Take one request and tokens from the buckets and return the seconds to wait before sending
+        """
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            REGISTRY.observe("rate_limit_wait.duration_ms", wait * 1000.0)
+            if wait >= 1.0:
+                self._report(f"⏳ Pacing requests to stay within the xAI rate limit ({wait:.0f}s)...", "info")
+        return wait
+
+    def _report(self, message: str, status_type: str):
+        """
+        Send a message to the status_callback of the search being run, if this is its thread
+        (worker threads of a sharded search cannot update the Streamlit page)
+        """
+        status = _status.get()
+        if status and status[0] and status[1] == threading.get_ident():
+            status[0](message, status_type)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {"active": self.active, "queued": len(self._queue), "max_concurrent": self.max_concurrent, "retries": self.retries}
+
+
+# Shared by every search in the process
+LIMITER = RateLimiter()
@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+DEFAULT_RECORDING_PATH = "grok_recording.json"
+
+# Request fields that decide which recorded response is replayed ("stream" is
+# left out so a recording made with streaming can be replayed without it)
+KEY_FIELDS = ("model", "messages", "temperature", "max_tokens", "response_format")
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """
+    Stable hash of the parts of a chat.completions.create request that affect the response
+    """
+    relevant = {field: request.get(field) for field in KEY_FIELDS}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def usage_to_dict(usage) -> Optional[Dict[str, int]]:
+    """
+    Convert an OpenAI usage object (or dict) to a plain dict
+    """
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+    }
+
+
+def make_response(content: str, finish_reason: str = "stop", usage: Dict[str, int] = None, model: str = "grok-4") -> SimpleNamespace:
+    """
+    Build an object shaped like an OpenAI ChatCompletion
+    """
+    return SimpleNamespace(
+        id="replay",
+        model=model,
+        choices=[SimpleNamespace(
+            index=0,
+            message=SimpleNamespace(role="assistant", content=content),
+            finish_reason=finish_reason
+        )],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+
+def make_chunks(content: str, finish_reason: str = "stop", usage: Dict[str, int] = None, chunk_chars: int = 64, model: str = "grok-4") -> List[SimpleNamespace]:
+    """
+    Split content into objects shaped like OpenAI ChatCompletionChunks
+    """
+    chunks = [
+        SimpleNamespace(
+            id="replay",
+            model=model,
+            choices=[SimpleNamespace(index=0, delta=SimpleNamespace(role="assistant", content=content[start:start + chunk_chars]), finish_reason=None)],
+            usage=None
+        )
+        for start in range(0, len(content), chunk_chars)
+    ]
+    chunks.append(SimpleNamespace(
+        id="replay",
+        model=model,
+        choices=[SimpleNamespace(index=0, delta=SimpleNamespace(role=None, content=None), finish_reason=finish_reason)],
+        usage=SimpleNamespace(**usage) if usage else None
+    ))
+    return chunks
+
+
+class Recording:
+    """
+    JSON file of recorded responses keyed by request_key
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("GROK_RECORDING_PATH", DEFAULT_RECORDING_PATH)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file).get("entries", {})
+
+    def get(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Return the recorded entry for a request, or None
+        """
+        return self.entries.get(request_key(request))
+
+    def put(self, request: Dict[str, Any], content: str, finish_reason: str, usage: Dict[str, int] = None):
+        """
+        Record the response to a request and rewrite the recording file
+        """
+        messages = request.get("messages") or []
+        entry = {
+            "model": request.get("model"),
+            # Only a short preview of the prompt is kept to make recordings easy to browse
+            "prompt_preview": (messages[-1].get("content") or "")[:200] if messages else "",
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": usage,
+        }
+        with self._lock:
+            self.entries[request_key(request)] = entry
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({"version": 1, "entries": self.entries}, file, indent=2)
+            os.replace(temp_path, self.path)
+
+
+class _Completions:
+    """
+    Exposes create() as client.chat.completions.create
+    """
+
+    def __init__(self, create):
+        self.create = create
+
+
+class _RecordingStream:
+    """
+    Passes chunks through from a live stream and records the text once the stream ends or is closed
+    """
+
+    def __init__(self, stream, recording: Recording, request: Dict[str, Any]):
+        self._stream = stream
+        self._recording = recording
+        self._request = request
+        self._parts = []
+        self._finish_reason = None
+        self._usage = None
+        self._saved = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._save()
+            raise
+        self._observe(chunk)
+        return chunk
+
+    def _observe(self, chunk):
+        if getattr(chunk, "usage", None):
+            self._usage = usage_to_dict(chunk.usage)
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                self._parts.append(choice.delta.content)
+            if choice.finish_reason:
+                self._finish_reason = choice.finish_reason
+
+    def _save(self):
+        if not self._saved:
+            self._saved = True
+            # A stream closed early is recorded as-is so the replay stops at the same point
+            self._recording.put(self._request, "".join(self._parts), self._finish_reason or "stop", self._usage)
+
+    def close(self):
+        self._save()
+        self._stream.close()
+
+
+class _AsyncRecordingStream(_RecordingStream):
+    """
+    Async version of _RecordingStream
+    """
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._save()
+            raise
+        self._observe(chunk)
+        return chunk
+
+    async def close(self):
+        self._save()
+        await self._stream.close()
+
+
+class _ReplayStream:
+    """
+    Iterates over replayed chunks with an optional delay between them
+    """
+
+    def __init__(self, chunks: List[SimpleNamespace], delay: float):
+        self._chunks = iter(chunks)
+        self._delay = delay
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._delay:
+            time.sleep(self._delay)
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks = iter(())
+
+
+class _AsyncReplayStream(_ReplayStream):
+    """
+    Async version of _ReplayStream
+    """
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self):
+        self._chunks = iter(())
+
+
+class RecordingClient:
+    """
+    Wraps an OpenAI client and records every chat completion to a Recording.
+
+        client = RecordingClient(OpenAI(...), "grok_recording.json")
+    """
+
+    def __init__(self, client, path: str = None):
+        self.client = client
+        self.recording = Recording(path)
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, **request):
+        response = self.client.chat.completions.create(**request)
+        if request.get("stream"):
+            return _RecordingStream(response, self.recording, request)
+        choice = response.choices[0]
+        self.recording.put(request, choice.message.content or "", choice.finish_reason, usage_to_dict(getattr(response, "usage", None)))
+        return response
+
+
+class AsyncRecordingClient(RecordingClient):
+    """
+    Wraps an AsyncOpenAI client and records every chat completion to a Recording
+    """
+
+    async def _create(self, **request):
+        response = await self.client.chat.completions.create(**request)
+        if request.get("stream"):
+            return _AsyncRecordingStream(response, self.recording, request)
+        choice = response.choices[0]
+        self.recording.put(request, choice.message.content or "", choice.finish_reason, usage_to_dict(getattr(response, "usage", None)))
+        return response
+
+
+class ReplayClient:
+    """
+    Drop-in replacement for the OpenAI client that answers from a Recording,
+    with no network access. Unknown requests raise LookupError.
+
+    latency is slept before each response and stream_delay between streamed
+    chunks, so recorded runs can reproduce realistic timing.
+    """
+
+    def __init__(self, path: str = None, latency: float = None, stream_delay: float = None, chunk_chars: int = 64):
+        self.recording = Recording(path)
+        self.latency = latency if latency is not None else float(os.getenv("GROK_REPLAY_LATENCY", 0))
+        self.stream_delay = stream_delay if stream_delay is not None else float(os.getenv("GROK_REPLAY_STREAM_DELAY", 0))
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _lookup(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        entry = self.recording.get(request)
+        if entry is None:
+            raise LookupError(f"No recorded response for request {request_key(request)[:12]} in {self.recording.path}")
+        self.calls += 1
+        return entry
+
+    def _create(self, **request):
+        entry = self._lookup(request)
+        if self.latency:
+            time.sleep(self.latency)
+        if request.get("stream"):
+            return _ReplayStream(make_chunks(entry["content"], entry["finish_reason"], entry.get("usage"), self.chunk_chars), self.stream_delay)
+        return make_response(entry["content"], entry["finish_reason"], entry.get("usage"), entry.get("model") or "grok-4")
+
+
+class AsyncReplayClient(ReplayClient):
+    """
+    Async drop-in replacement for AsyncOpenAI that answers from a Recording
+    """
+
+    async def _create(self, **request):
+        entry = self._lookup(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.get("stream"):
+            return _AsyncReplayStream(make_chunks(entry["content"], entry["finish_reason"], entry.get("usage"), self.chunk_chars), self.stream_delay)
+        return make_response(entry["content"], entry["finish_reason"], entry.get("usage"), entry.get("model") or "grok-4")
+
+
+def wrap_client(create_client, recording_client=RecordingClient, replay_client=ReplayClient):
+    """
+    Create a client according to GROK_RECORD_MODE: "record" wraps the live
+    client in recording_client, "replay" returns replay_client without
+    touching the network, anything else returns the live client
+    """
+    mode = os.getenv("GROK_RECORD_MODE", "").strip().lower()
+    if mode == "replay":
+        return replay_client()
+    if mode == "record":
+        return recording_client(create_client())
+    return create_client()
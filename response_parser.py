@@ -0,0 +1,294 @@
+import re
+from typing import List, Dict, Any, Optional
+from models import Review, Contractor
+
+# Splits a Grok response into CONTRACTOR N: blocks
+CONTRACTOR_HEADER_PATTERN = re.compile(r'CONTRACTOR\s+\d+:')
+
+# One match per line decides which field (if any) the line belongs to
+LABEL_PATTERN = re.compile(r'(name|phone|email|website|address|services|rating|description|license status|reviews):', re.IGNORECASE)
+
+# Label -> contractor field
+FIELD_BY_LABEL = {
+    'name': 'name',
+    'phone': 'phone',
+    'email': 'email',
+    'website': 'website',
+    'address': 'address',
+    'services': 'services',
+    'rating': 'rating',
+    'description': 'description',
+    'license status': 'license_status',
+}
+
+REVIEW_PREFIXES = ('- Reviewer:', 'Reviewer:')
+REVIEW_PART_LABELS = ('rating', 'review', 'date')
+
+# Alternative review formats
+REVIEWER_NAME = r'([A-Z][a-z]+\s+[A-Z]\.?)'
+REVIEW_RATING = r'(\d+(?:\.\d+)?(?:/5|/10|\s*stars?))'
+# "John S. - 5/5 stars - Great service!"
+DASH_REVIEW_PATTERN = re.compile(REVIEWER_NAME + r'\s*[-–]\s*' + REVIEW_RATING + r'\s*[-–]\s*["\']?([^"\']+)["\']?')
+# "Sarah M. (4/5): Excellent work done quickly"
+PAREN_REVIEW_PATTERN = re.compile(REVIEWER_NAME + r'\s*\(' + REVIEW_RATING + r'\):\s*["\']?([^"\']+)["\']?')
+QUOTE_PATTERN = re.compile(r'["\']([^"\']{20,})["\']')
+NAME_PATTERN = re.compile(REVIEWER_NAME)
+RATING_PATTERN = re.compile(REVIEW_RATING)
+
+# Alternative (free text) contractor format
+BUSINESS_NAME_PATTERN = re.compile(r'^[A-Z][A-Za-z\s&\-\'\.\,\(\)]+(?:LLC|Inc|Corporation|Corp|Company|Co\.|Services|Solutions|Group)?$')
+PHONE_PATTERN = re.compile(r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+WEBSITE_PATTERN = re.compile(r'https?://[^\s]+|www\.[^\s]+')
+ADDRESS_PATTERN = re.compile(r'\b\d+\s+[A-Za-z\s]+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive|Ln|Lane|Way|Ct|Court)\b')
+FREE_RATING_PATTERN = re.compile(r'(\d+\.?\d*)\s*(?:\/\s*5|\s*stars?|\s*out\s*of\s*5)', re.IGNORECASE)
+
+# Scoring responses
+SCORE_VALUE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+SCORE_ID_PATTERN = re.compile(r'\d+')
+
+
+class ResponseParser:
+    """
+    Single-pass parser for Grok search and scoring responses.
+
+    Every pattern is compiled once at import time. Each line of a CONTRACTOR
+    block is classified by one anchored label match and dispatched through
+    FIELD_BY_LABEL, so parse cost is linear in the response length. The parser
+    has no API dependencies and can be benchmarked on its own.
+    """
+
+    def parse(self, content: str) -> List[Contractor]:
+        """
+        Parse Grok's response to extract contractor information including reviews
+        """
+        contractors = []
+
+        for section in CONTRACTOR_HEADER_PATTERN.split(content)[1:]:  # Skip the text before the first block
+            if not section.strip():
+                continue
+
+            contractor_data = self.extract_contractor_info(section)
+            if contractor_data['name']:
+                contractors.append(Contractor(**contractor_data))
+
+        # If structured parsing fails, try alternative parsing
+        if not contractors:
+            contractors = self.parse_alternative_format(content)
+
+        return contractors
+
+    def extract_contractor_info(self, text: str) -> Dict[str, Any]:
+        """
+        Extract contractor information from a text section including reviews
+        """
+        data = {
+            'name': '',
+            'phone': '',
+            'email': '',
+            'website': '',
+            'address': '',
+            'services': '',
+            'rating': '',
+            'description': '',
+            'license_status': '',
+            'reviews': []
+        }
+        reviews = data['reviews']
+        reviews_section = False
+
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            label_match = LABEL_PATTERN.match(line)
+            label = label_match.group(1).lower() if label_match else None
+
+            if label == 'reviews':
+                reviews_section = True
+                continue
+
+            if reviews_section:
+                if line.startswith(REVIEW_PREFIXES):
+                    review = self.parse_single_review(line)
+                    if review:
+                        reviews.append(review)
+                    continue
+                if label is None:
+                    # Try to parse as a different review format
+                    review = self.parse_alternative_review(line)
+                    if review:
+                        reviews.append(review)
+                    continue
+                # A field label ends the reviews section
+                reviews_section = False
+
+            if label is not None:
+                # Websites are validated once, by Contractor (see models.py)
+                data[FIELD_BY_LABEL[label]] = line[label_match.end():].strip()
+
+        return data
+
+    def parse_reviews(self, content: str) -> List[Review]:
+        """
+        Parse a response that lists reviews only, one per line (single-contractor review requests)
+        """
+        reviews = []
+        for line in content.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(REVIEW_PREFIXES):
+                review = self.parse_single_review(line)
+            else:
+                review = self.parse_alternative_review(line)
+            if review:
+                reviews.append(review)
+        return reviews
+
+    def parse_single_review(self, line: str) -> Optional[Review]:
+        """
+        Parse a single review line in the format: Reviewer: Name | Rating: X/5 | Review: "Text" | Date: YYYY-MM-DD
+        """
+        # Remove leading dash and 'Reviewer:' prefix
+        line = line.lstrip('- ').replace('Reviewer:', '').strip()
+
+        reviewer_name = ""
+        values = {'rating': "", 'review': "", 'date': ""}
+
+        for part in line.split('|'):
+            part = part.strip()
+            label, separator, value = part.partition(':')
+            label = label.lower()
+            if separator and label in values:
+                values[label] = value.strip()
+            elif not reviewer_name:
+                reviewer_name = part
+
+        review_text = values['review'].strip('"\'')
+
+        # Only return review if we have both reviewer name and review text
+        if reviewer_name and review_text:
+            return Review(
+                reviewer_name=reviewer_name,
+                rating=values['rating'],
+                review_text=review_text,
+                date=values['date'],
+                source="Web Search"
+            )
+        return None
+
+    def parse_alternative_review(self, line: str) -> Optional[Review]:
+        """
+        Parse reviews in alternative formats that Grok might return - NO hardcoded fallbacks
+        """
+        match = DASH_REVIEW_PATTERN.search(line) or PAREN_REVIEW_PATTERN.search(line)
+        if match:
+            return Review(
+                reviewer_name=match.group(1),
+                rating=match.group(2),
+                review_text=match.group(3),
+                source="Web Search"
+            )
+
+        # Look for quoted reviews with names and ratings nearby - ONLY if all parts are found
+        quote_match = QUOTE_PATTERN.search(line)
+        if not quote_match:
+            return None
+        name_match = NAME_PATTERN.search(line)
+        if not name_match:
+            return None
+        rating_match = RATING_PATTERN.search(line)
+        return Review(
+            reviewer_name=name_match.group(1),
+            rating=rating_match.group(1) if rating_match else "",
+            review_text=quote_match.group(1),
+            source="Web Search"
+        )
+
+    def parse_alternative_format(self, content: str) -> List[Contractor]:
+        """
+        Alternative parsing method for different response formats
+        """
+        contractors = []
+        current_contractor = {'reviews': []}
+
+        for line in content.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Look for business names
+            if 5 < len(line) < 100 and BUSINESS_NAME_PATTERN.match(line):
+                if current_contractor.get('name'):
+                    contractors.append(Contractor(**current_contractor))
+                    current_contractor = {'reviews': []}
+                current_contractor['name'] = line
+
+            # Extract other information...
+            phone_match = PHONE_PATTERN.search(line)
+            if phone_match:
+                current_contractor['phone'] = phone_match.group()
+
+            email_match = EMAIL_PATTERN.search(line)
+            if email_match:
+                current_contractor['email'] = email_match.group()
+
+            website_match = WEBSITE_PATTERN.search(line)
+            if website_match:
+                current_contractor['website'] = website_match.group()
+
+            if ADDRESS_PATTERN.search(line):
+                current_contractor['address'] = line
+
+            rating_match = FREE_RATING_PATTERN.search(line)
+            if rating_match:
+                current_contractor['rating'] = rating_match.group()
+
+            # Parse reviews in alternative format - only if valid data found
+            review = self.parse_alternative_review(line)
+            if review:
+                current_contractor['reviews'].append(review)
+
+        # Add last contractor if exists
+        if current_contractor.get('name'):
+            contractors.append(Contractor(**current_contractor))
+
+        return contractors
+
+    def parse_quality_scores(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Parse quality scores from Grok's response into entries with
+        name, id, score and explanation (entries without a score are dropped)
+        """
+        entries = []
+        current = {}
+
+        for line in content.split('\n'):
+            line = line.strip().lstrip('*#- ').replace('**', '')
+            label, _, value = line.partition(':')
+            label = label.strip().upper()
+            value = value.strip()
+
+            if label == 'CONTRACTOR':
+                if 'score' in current:
+                    entries.append(current)
+                current = {'name': value}
+            elif label == 'ID':
+                id_match = SCORE_ID_PATTERN.search(value)
+                if id_match:
+                    current['id'] = int(id_match.group())
+            elif label == 'SCORE':
+                # Extract numeric score
+                score_match = SCORE_VALUE_PATTERN.search(value)
+                if score_match:
+                    # Ensure score is between 0 and 10
+                    current['score'] = max(0.0, min(10.0, float(score_match.group(1))))
+            elif label == 'EXPLANATION':
+                current['explanation'] = value
+
+        if 'score' in current:
+            entries.append(current)
+
+        return entries
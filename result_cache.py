@@ -0,0 +1,311 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from models import Contractor, Review
+
+
+def normalize_search_key(service_type: str, location: str, max_results: int, skip_reviews: bool, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> str:
+    """
+    Build a stable cache key from the search parameters, ignoring case and extra whitespace
+    """
+    normalized = {
+        "service_type": re.sub(r'\s+', ' ', (service_type or "").strip().lower()),
+        "location": re.sub(r'\s+', ' ', (location or "").strip().lower()),
+        "max_results": int(max_results),
+        "skip_reviews": bool(skip_reviews),
+        "scoring": scoring,
+    }
+    # Only added when set so keys of earlier (eager review, two-call, unsharded) searches stay valid
+    if lazy_reviews:
+        normalized["lazy_reviews"] = True
+    if single_pass:
+        normalized["single_pass"] = True
+    if sharded:
+        normalized["sharded"] = True
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def serialize_contractors(contractors: List[Contractor]) -> str:
+    """
+    Serialize contractors (with reviews and scores) to JSON
+    """
+    return json.dumps([contractor.to_dict() for contractor in contractors])
+
+
+def serialize_reviews(reviews: List[Review]) -> str:
+    """
+    Serialize reviews to JSON
+    """
+    return json.dumps([review.to_dict() for review in reviews])
+
+
+def deserialize_reviews(payload: str) -> List[Review]:
+    """
+    Rebuild Review objects from serialize_reviews output
+    """
+    return [Review.from_dict(review) for review in json.loads(payload)]
+
+
+def deserialize_contractors(payload: str) -> List[Contractor]:
+    """
+    Rebuild Contractor/Review objects from serialize_contractors output
+    """
+    return [Contractor.from_dict(data) for data in json.loads(payload)]
+
+
+class SQLiteTTLCache:
+    """
+    Shared SQLite connection, locking and eviction for the caches below
+    """
+
+    def __init__(self, path: str, max_entries: int, schema: str, table: str):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(schema)
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_access ON {table} (last_access)")
+
+    def _evict(self, now: float):
+        """
+        Drop expired entries and the least recently used entries over max_entries (call with the lock held)
+        """
+        self._conn.execute(f"DELETE FROM {self._table} WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            f"""DELETE FROM {self._table} WHERE key IN (
+                SELECT key FROM {self._table} ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        """
+        Remove every cached entry
+        """
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and the current number of cached entries
+        """
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+
+class SearchCache(SQLiteTTLCache):
+    """
+    SQLite-backed cache of scored search results with TTL expiry and LRU eviction
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, fast_ttl_seconds: int = None, max_entries: int = None):
+        # Full mode results carry validated reviews and stay fresh longer than fast mode results
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("SEARCH_CACHE_TTL", 24 * 3600))
+        self.fast_ttl_seconds = fast_ttl_seconds if fast_ttl_seconds is not None else int(os.getenv("SEARCH_CACHE_FAST_TTL", 6 * 3600))
+        super().__init__(
+            path or os.getenv("SEARCH_CACHE_PATH", "search_cache.db"),
+            max_entries if max_entries is not None else int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 500)),
+            """CREATE TABLE IF NOT EXISTS search_results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "search_results"
+        )
+
+    def get(self, service_type: str, location: str, max_results: int, skip_reviews: bool, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False) -> Optional[List[Contractor]]:
+        """
+        Return cached contractors for a search, or None on a miss or expired entry
+        """
+        key = normalize_search_key(service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT payload, expires_at FROM search_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[1] < now:
+                    if row is not None:
+                        self._conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE search_results SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            return deserialize_contractors(row[0])
+        except Exception as e:
+            print(f"Error reading search cache: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, service_type: str, location: str, max_results: int, skip_reviews: bool, contractors: List[Contractor], ttl_seconds: int = None, scoring: str = "llm", lazy_reviews: bool = False, single_pass: bool = False, sharded: bool = False):
+        """
+        Store scored contractors for a search and evict the least recently used entries over the size limit
+        """
+        if not contractors:
+            return
+        if ttl_seconds is None:
+            ttl_seconds = self.fast_ttl_seconds if skip_reviews else self.ttl_seconds
+        key = normalize_search_key(service_type, location, max_results, skip_reviews, scoring, lazy_reviews, single_pass, sharded)
+        now = time.time()
+        try:
+            payload = serialize_contractors(contractors)
+
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_results (key, payload, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, now, now + ttl_seconds, now)
+                )
+                self._evict(now)
+        except Exception as e:
+            print(f"Error writing search cache: {e}")
+
+
+class ScoreCache(SQLiteTTLCache):
+    """
+    SQLite-backed cache of per-contractor LLM scores keyed by a content hash
+    (see GrokContractorSearch._score_cache_key), with TTL expiry and LRU eviction
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("SCORE_CACHE_TTL", 7 * 24 * 3600))
+        super().__init__(
+            path or os.getenv("SCORE_CACHE_PATH", "score_cache.db"),
+            max_entries if max_entries is not None else int(os.getenv("SCORE_CACHE_MAX_ENTRIES", 20000)),
+            """CREATE TABLE IF NOT EXISTS contractor_scores (
+                key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                explanation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "contractor_scores"
+        )
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[float, str]]:
+        """
+        Return {key: (score, explanation)} for every fresh cached key
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        try:
+            with self._lock, self._conn:
+                # Stay well below SQLite's bound parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, score, explanation FROM contractor_scores WHERE key IN ({placeholders}) AND expires_at >= ?",
+                        (*chunk, now)
+                    ).fetchall()
+                    for key, score, explanation in rows:
+                        found[key] = (score, explanation)
+                    if rows:
+                        self._conn.executemany(
+                            "UPDATE contractor_scores SET last_access = ? WHERE key = ?",
+                            [(now, row[0]) for row in rows]
+                        )
+                self.hits += len(found)
+                self.misses += len(keys) - len(found)
+        except Exception as e:
+            print(f"Error reading score cache: {e}")
+        return found
+
+    def set_many(self, scores: Dict[str, Tuple[float, str]]):
+        """
+        Store {key: (score, explanation)} and evict the least recently used entries over the size limit
+        """
+        if not scores:
+            return
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO contractor_scores (key, score, explanation, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(key, score, explanation or "", now, now + self.ttl_seconds, now) for key, (score, explanation) in scores.items()]
+                )
+                self._evict(now)
+        except Exception as e:
+            print(f"Error writing score cache: {e}")
+
+
+class ReviewCache(SQLiteTTLCache):
+    """
+    SQLite-backed cache of the reviews fetched for single contractors
+    (see GrokContractorSearch.fetch_reviews), with TTL expiry and LRU eviction
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("REVIEW_CACHE_TTL", 3 * 24 * 3600))
+        super().__init__(
+            path or os.getenv("REVIEW_CACHE_PATH", "review_cache.db"),
+            max_entries if max_entries is not None else int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", 5000)),
+            """CREATE TABLE IF NOT EXISTS contractor_reviews (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "contractor_reviews"
+        )
+
+    def get(self, key: str) -> Optional[List[Review]]:
+        """
+        Return the cached reviews for a contractor key, or None on a miss or expired entry
+        """
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT payload FROM contractor_reviews WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE contractor_reviews SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+            return deserialize_reviews(row[0])
+        except Exception as e:
+            print(f"Error reading review cache: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, reviews: List[Review]):
+        """
+        Store the reviews for a contractor key (an empty list is cached too, so a
+        contractor without reviews is not looked up again until the entry expires)
+        """
+        now = time.time()
+        try:
+            payload = serialize_reviews(reviews)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO contractor_reviews (key, payload, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, now, now + self.ttl_seconds, now)
+                )
+                self._evict(now)
+        except Exception as e:
+            print(f"Error writing review cache: {e}")
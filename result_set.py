@@ -0,0 +1,74 @@
+from typing import List, Dict, Optional, Iterator
+import numpy as np
+from models import Contractor, LicenseStatus
+from santo_score import SantoScoreEngine
+
+
+class ResultSet:
+    """
+    Column view of a search's contractors for instant filtering, sorting and re-ranking.
+
+    The fields the results view filters and sorts on are kept as NumPy arrays
+    aligned with the contractor list (built once from the fields normalized in
+    models.py), so changing a filter or the ranking weights is a few vectorized
+    operations instead of a new grok-4 search and scoring call.
+    """
+
+    def __init__(self, contractors: List[Contractor] = ()):
+        self.contractors = list(contractors)
+        count = len(self.contractors)
+        self.score = np.fromiter((c.quality_score for c in self.contractors), dtype=float, count=count)
+        self.rating = np.fromiter((np.nan if c.rating_value is None else c.rating_value for c in self.contractors), dtype=float, count=count)
+        self.review_count = np.fromiter((len(c.reviews) for c in self.contractors), dtype=np.int32, count=count)
+        self.licensed = np.fromiter((c.license_state is LicenseStatus.ACTIVE for c in self.contractors), dtype=bool, count=count)
+        self.has_email = np.fromiter((c.email_valid for c in self.contractors), dtype=bool, count=count)
+        self.has_phone = np.fromiter((c.phone_valid for c in self.contractors), dtype=bool, count=count)
+        # SantoScore components, computed on the first re-rank
+        self._components = None
+
+    def __len__(self) -> int:
+        return len(self.contractors)
+
+    def __getitem__(self, index):
+        return self.contractors[index]
+
+    def __iter__(self) -> Iterator[Contractor]:
+        return iter(self.contractors)
+
+    def mask(self, licensed_only: bool = False, min_rating: float = 0.0, require_email: bool = False, require_phone: bool = False) -> np.ndarray:
+        """
+        Boolean array of the contractors passing every filter (unrated contractors fail a min_rating above 0)
+        """
+        keep = np.ones(len(self.contractors), dtype=bool)
+        if licensed_only:
+            keep &= self.licensed
+        if min_rating > 0:
+            with np.errstate(invalid="ignore"):
+                keep &= self.rating >= min_rating
+        if require_email:
+            keep &= self.has_email
+        if require_phone:
+            keep &= self.has_phone
+        return keep
+
+    def rerank(self, weights: Dict[str, float]) -> np.ndarray:
+        """
+        0-10 local SantoScores with the given component weights (see santo_score.DEFAULT_WEIGHTS)
+        """
+        if self._components is None:
+            self._components = SantoScoreEngine().compute_components(self.contractors)
+        return SantoScoreEngine(weights).combine(self._components, len(self.contractors))
+
+    def select(self, keep: np.ndarray = None, scores: np.ndarray = None, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Indices of the kept contractors, best score first (ties keep the search order).
+        With a limit only the top limit are selected (argpartition), not the whole set sorted.
+        """
+        scores = self.score if scores is None else scores
+        indices = np.arange(len(self.contractors)) if keep is None else np.flatnonzero(keep)
+        if limit is not None and limit < len(indices):
+            # Keep everything scoring at least the limit-th best score (ties included), then sort only those
+            threshold = np.partition(scores[indices], len(indices) - limit)[len(indices) - limit]
+            indices = indices[scores[indices] >= threshold]
+        order = indices[np.lexsort((indices, -scores[indices]))]
+        return order if limit is None else order[:limit]
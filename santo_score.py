@@ -0,0 +1,196 @@
+import re
+import time
+from typing import List, Dict, Optional
+import numpy as np
+from models import LicenseStatus, parse_review_date
+
+# Relative weight of each SantoScore component (normalized to sum to 1)
+DEFAULT_WEIGHTS = {
+    "rating": 0.35,      # Overall rating/reputation
+    "reviews": 0.20,     # Recency-weighted individual review ratings
+    "sentiment": 0.15,   # Lexicon-based review sentiment
+    "volume": 0.10,      # Number of reviews
+    "license": 0.10,     # License status
+    "contact": 0.10,     # Completeness of contact information
+}
+
+# Review ages are discounted with this half-life
+REVIEW_HALF_LIFE_DAYS = 365.0
+# Number of reviews at which the volume component saturates
+FULL_REVIEW_VOLUME = 5
+# Neutral value used when a component cannot be computed
+NEUTRAL = 0.5
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+LICENSE_VALUES = {LicenseStatus.ACTIVE: 1.0, LicenseStatus.INACTIVE: 0.0, LicenseStatus.UNKNOWN: NEUTRAL}
+
+POSITIVE_WORDS = frozenset("""
+excellent great outstanding amazing awesome fantastic professional recommend recommended highly
+friendly helpful prompt punctual timely clean courteous reliable honest fair affordable reasonable
+quick fast efficient knowledgeable skilled thorough quality best perfect wonderful superb happy
+pleased satisfied responsive respectful trustworthy impressed smooth good nice love loved
+""".split())
+
+NEGATIVE_WORDS = frozenset("""
+terrible horrible awful bad poor worst rude late unprofessional overpriced expensive slow dirty
+messy dishonest scam unreliable disappointed disappointing broken sloppy careless problem
+problems issue issues delay delayed ignored unresponsive avoid refund complaint damaged leak leaking
+overcharged waste nightmare incompetent
+""".split())
+
+NEGATIONS = frozenset(("not", "no", "never", "didn't", "don't", "wasn't", "isn't", "won't", "couldn't", "wouldn't"))
+
+
+def review_sentiment(text: str) -> Optional[float]:
+    """
+    Lexicon-based sentiment of a review in 0-1, or None if no opinion words were found
+    """
+    positive = negative = 0
+    negate = False
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in NEGATIONS:
+            negate = True
+            continue
+        if word in POSITIVE_WORDS:
+            if negate:
+                negative += 1
+            else:
+                positive += 1
+        elif word in NEGATIVE_WORDS:
+            if negate:
+                positive += 1
+            else:
+                negative += 1
+        negate = False
+    if positive + negative == 0:
+        return None
+    return positive / (positive + negative)
+
+
+class SantoScoreEngine:
+    """
+    Deterministic local SantoScore computed from already parsed contractor data.
+
+    Per-contractor features are gathered in one pass and every component is then
+    computed as array math over all contractors (reviews are flattened into one
+    array and reduced per contractor with bincount), so scoring a full result set
+    takes microseconds instead of a grok-4 round trip.
+    """
+
+    def __init__(self, weights: Dict[str, float] = None):
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        total = sum(weights.values()) or 1.0
+        self.weights = {name: value / total for name, value in weights.items()}
+
+    def compute_scores(self, contractors: List, now: float = None) -> np.ndarray:
+        """
+        Return the 0-10 SantoScore for each contractor as an array
+        """
+        return self.combine(self.compute_components(contractors, now=now), len(contractors))
+
+    def compute_components(self, contractors: List, now: float = None) -> Dict[str, np.ndarray]:
+        """
+        Return each 0-1 score component as an array aligned with contractors
+        """
+        now = time.time() if now is None else now
+        count = len(contractors)
+
+        overall = np.full(count, np.nan)
+        license_status = np.empty(count)
+        contact = np.empty(count)
+        review_owner = []
+        review_rating = []
+        review_time = []
+        review_tone = []
+
+        # Ratings, license and contact checks were normalized when the contractors were built (see models.py)
+        for i, contractor in enumerate(contractors):
+            if contractor.rating_value is not None:
+                overall[i] = contractor.rating_value / 5.0
+            license_status[i] = LICENSE_VALUES[contractor.license_state]
+            contact[i] = (
+                contractor.phone_valid + contractor.email_valid
+                + bool(contractor.website) + bool(contractor.address)
+            ) / 4.0
+            for review in contractor.reviews:
+                rating = review.rating_value
+                timestamp = parse_review_date(review.date_iso)
+                tone = review_sentiment(review.review_text)
+                review_owner.append(i)
+                review_rating.append(np.nan if rating is None else rating / 5.0)
+                review_time.append(np.nan if timestamp is None else timestamp)
+                review_tone.append(np.nan if tone is None else tone)
+
+        owner = np.asarray(review_owner, dtype=np.intp)
+        ratings = np.asarray(review_rating, dtype=float)
+        times = np.asarray(review_time, dtype=float)
+        tones = np.asarray(review_tone, dtype=float)
+
+        # Recency weights: undated reviews count as one half-life old
+        age_days = np.where(np.isnan(times), REVIEW_HALF_LIFE_DAYS, np.maximum(now - times, 0.0) / 86400.0)
+        recency = np.power(0.5, age_days / REVIEW_HALF_LIFE_DAYS)
+
+        review_mean = self._grouped_mean(owner, ratings, recency, count)
+        sentiment = self._grouped_mean(owner, tones, np.ones_like(tones), count)
+        volume = np.minimum(np.bincount(owner, minlength=count) / FULL_REVIEW_VOLUME, 1.0)
+
+        # Missing overall ratings fall back to the review average, then to neutral
+        overall = np.where(np.isnan(overall), review_mean, overall)
+        overall = np.where(np.isnan(overall), NEUTRAL, overall)
+        review_mean = np.where(np.isnan(review_mean), overall, review_mean)
+        sentiment = np.where(np.isnan(sentiment), NEUTRAL, sentiment)
+
+        return {
+            "rating": overall,
+            "reviews": review_mean,
+            "sentiment": sentiment,
+            "volume": volume,
+            "license": license_status,
+            "contact": contact,
+        }
+
+    def score_contractors(self, contractors: List, now: float = None) -> List:
+        """
+        Assign quality_score and a short score_explanation to each contractor
+        """
+        if not contractors:
+            return contractors
+        components = self.compute_components(contractors, now=now)
+        scores = self.combine(components, len(contractors))
+        for i, contractor in enumerate(contractors):
+            contractor.quality_score = float(scores[i])
+            contractor.score_explanation = self._explain(contractor, {name: values[i] for name, values in components.items()})
+        return contractors
+
+    def combine(self, components: Dict[str, np.ndarray], count: int) -> np.ndarray:
+        """
+        Weighted sum of the components scaled to 0-10
+        """
+        total = np.zeros(count)
+        for name, values in components.items():
+            total += self.weights.get(name, 0.0) * values
+        return np.round(np.clip(total * 10.0, 0.0, 10.0), 1)
+
+    def _grouped_mean(self, owner: np.ndarray, values: np.ndarray, weights: np.ndarray, count: int) -> np.ndarray:
+        """
+        Weighted mean of values per contractor, NaN where a contractor has no values
+        """
+        valid = ~np.isnan(values)
+        weight_sum = np.bincount(owner[valid], weights=weights[valid], minlength=count)
+        value_sum = np.bincount(owner[valid], weights=values[valid] * weights[valid], minlength=count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(weight_sum > 0, value_sum / np.where(weight_sum > 0, weight_sum, 1.0), np.nan)
+
+    def _explain(self, contractor, components: Dict[str, float]) -> str:
+        """
+        One-sentence summary of what drove the local score
+        """
+        parts = [f"Rated {components['rating'] * 5:.1f}/5 across {len(contractor.reviews)} reviews"]
+        if contractor.reviews:
+            parts.append(f"{components['sentiment'] * 100:.0f}% positive review sentiment")
+        if components["license"] == 1.0:
+            parts.append("active license")
+        elif components["license"] == 0.0:
+            parts.append("inactive license")
+        parts.append(f"{components['contact'] * 100:.0f}% complete contact info")
+        return "Local SantoScore: " + ", ".join(parts) + "."
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from models import Contractor
+from result_set import ResultSet
+from result_cache import SQLiteTTLCache, serialize_contractors, deserialize_contractors
+
+
+class SessionResultStore(SQLiteTTLCache):
+    """
+    Result sets of all Streamlit sessions, shared by the process.
+
+    A session keeps only the handle returned by put(). Result sets are written
+    through to SQLite and kept in memory as ResultSets (see result_set.py) in an
+    LRU bounded by max_bytes (sizes are the serialized JSON sizes). A set evicted from memory, or one from
+    before a process restart, is loaded back from disk on get().
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, ttl_seconds: int = None, max_entries: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("SESSION_RESULTS_MAX_BYTES", 64 * 1024 * 1024))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("SESSION_RESULTS_TTL", 24 * 3600))
+        self.memory_bytes = 0
+        self.disk_loads = 0
+        # handle -> (ResultSet, params, size)
+        self._memory = OrderedDict()
+        super().__init__(
+            path or os.getenv("SESSION_RESULTS_PATH", "session_results.db"),
+            max_entries if max_entries is not None else int(os.getenv("SESSION_RESULTS_MAX_ENTRIES", 10000)),
+            """CREATE TABLE IF NOT EXISTS session_results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""",
+            "session_results"
+        )
+
+    def put(self, contractors: List[Contractor], params: Dict[str, Any] = None, handle: str = None) -> str:
+        """
+        Store a result set (and the search parameters it came from) and return its handle
+        """
+        handle = handle or uuid.uuid4().hex
+        result_set = ResultSet(contractors)
+        payload = serialize_contractors(result_set.contractors)
+        params_json = json.dumps(params or {})
+        now = time.time()
+        with self._lock:
+            self._remember(handle, result_set, params or {}, len(payload))
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO session_results (key, payload, params, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                        (handle, payload, params_json, now, now + self.ttl_seconds, now)
+                    )
+                    self._evict(now)
+            except Exception as e:
+                print(f"Error writing session results: {e}")
+        return handle
+
+    def get(self, handle: str) -> Optional[ResultSet]:
+        """
+        Return the result set of a handle, or None if it expired or is unknown
+        """
+        entry = self._load(handle)
+        return entry[0] if entry else None
+
+    def get_params(self, handle: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the search parameters stored with a handle, or None
+        """
+        entry = self._load(handle)
+        return entry[1] if entry else None
+
+    def save(self, handle: str):
+        """
+        Write a result set changed in place (e.g. reviews loaded on demand) back to
+        disk and rebuild its columns
+        """
+        with self._lock:
+            entry = self._memory.get(handle)
+        if entry is not None:
+            self.put(entry[0].contractors, entry[1], handle)
+
+    def discard(self, handle: str):
+        """
+        Drop a result set that its session no longer shows
+        """
+        with self._lock:
+            entry = self._memory.pop(handle, None)
+            if entry is not None:
+                self.memory_bytes -= entry[2]
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM session_results WHERE key = ?", (handle,))
+            except Exception as e:
+                print(f"Error deleting session results: {e}")
+
+    def _load(self, handle: str) -> Optional[Tuple[ResultSet, Dict[str, Any], int]]:
+        if not handle:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(handle)
+            if entry is not None:
+                self._memory.move_to_end(handle)
+                self.hits += 1
+                return entry
+            try:
+                with self._conn:
+                    row = self._conn.execute(
+                        "SELECT payload, params FROM session_results WHERE key = ? AND expires_at >= ?", (handle, now)
+                    ).fetchone()
+                    if row is None:
+                        self.misses += 1
+                        return None
+                    self._conn.execute(
+                        "UPDATE session_results SET last_access = ?, expires_at = ? WHERE key = ?",
+                        (now, now + self.ttl_seconds, handle)
+                    )
+                contractors = deserialize_contractors(row[0])
+                params = json.loads(row[1])
+            except Exception as e:
+                print(f"Error reading session results: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_loads += 1
+            return self._remember(handle, ResultSet(contractors), params, len(row[0]))
+
+    def _remember(self, handle: str, result_set: ResultSet, params: Dict[str, Any], size: int):
+        """
+        Put a result set at the front of the memory LRU and evict the oldest sets
+        over max_bytes (call with the lock held; evicted sets stay on disk)
+        """
+        previous = self._memory.pop(handle, None)
+        if previous is not None:
+            self.memory_bytes -= previous[2]
+        entry = self._memory[handle] = (result_set, params, size)
+        self.memory_bytes += size
+        # The newest set stays even if it alone is over the limit
+        while self.memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= evicted[2]
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the base cache counters plus memory use across all sessions
+        """
+        stats = super().stats()
+        with self._lock:
+            stats.update(
+                memory_entries=len(self._memory),
+                memory_bytes=self.memory_bytes,
+                max_bytes=self.max_bytes,
+                disk_loads=self.disk_loads,
+            )
+        return stats
@@ -0,0 +1,175 @@
+"""
+Local SMTP stub for exercising the email outbox without a real mail server.
+
+Accepts EHLO/HELO, AUTH PLAIN/LOGIN (any credentials), MAIL, RCPT, DATA, RSET,
+NOOP and QUIT, keeps every delivered message in memory and can reject a
+fraction of messages with a temporary or permanent error. No STARTTLS, so
+point the app at it with:
+
+    python smtp_stub.py --port 8025
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=0 streamlit run app.py
+"""
+import os
+import sys
+import random
+import argparse
+import threading
+import socketserver
+from typing import List
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """
+    One SMTP session
+    """
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("utf-8"))
+
+    def handle(self):
+        server = self.server
+        server.record_connection()
+        sender, recipients = None, []
+        self.reply("220 smtp-stub ESMTP ready")
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command in ("EHLO", "HELO"):
+                if command == "EHLO":
+                    self.reply("250-smtp-stub")
+                    self.reply("250-AUTH PLAIN LOGIN")
+                    self.reply("250 8BITMIME")
+                else:
+                    self.reply("250 smtp-stub")
+            elif command == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    # Username and password prompts (both base64 "Username:"/"Password:")
+                    parts = line.split()
+                    if len(parts) < 3:
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(line.split()) < 3:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == "MAIL":
+                sender, recipients = line.split(":", 1)[1].strip().strip("<>"), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip().strip("<>"))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    raw = self.rfile.readline()
+                    if not raw or raw in (b".\r\n", b".\n"):
+                        break
+                    data.append(raw[1:] if raw.startswith(b"..") else raw)
+                status = server.should_reject()
+                if status:
+                    self.reply(f"{status} Injected stub rejection")
+                else:
+                    server.deliver(sender, recipients, b"".join(data).decode("utf-8", "replace"))
+                    self.reply("250 OK queued")
+                sender, recipients = None, []
+            elif command == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded SMTP stub that can run in the background of a script:
+
+        with SMTPStubServer() as smtp:
+            outbox = EmailOutbox(smtp_server=smtp.host, smtp_port=smtp.port, use_tls=False)
+            ...
+            smtp.messages
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reject_rate: float = 0.0, reject_status: int = 451, seed: int = 0):
+        super().__init__((host, port), SMTPStubHandler)
+        # Fraction of messages answered with reject_status (4xx temporary, 5xx permanent)
+        self.reject_rate = reject_rate
+        self.reject_status = reject_status
+        self.messages = []
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "SMTPStubServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "SMTPStubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def should_reject(self) -> int:
+        with self._lock:
+            return self.reject_status if self._random.random() < self.reject_rate else 0
+
+    def deliver(self, sender: str, recipients: List[str], data: str):
+        with self._lock:
+            self.messages.append({"sender": sender, "recipients": recipients, "data": data})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local SMTP stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SMTP_STUB_PORT", 8025)))
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of messages to reject")
+    parser.add_argument("--reject-status", type=int, default=451, help="SMTP status of rejections (4xx retried, 5xx permanent)")
+    args = parser.parse_args(argv)
+
+    server = SMTPStubServer(args.host, args.port, args.reject_rate, args.reject_status)
+    print(f"SMTP stub listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
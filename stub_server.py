@@ -0,0 +1,302 @@
+"""
+Local OpenAI-compatible stub of the xAI chat completions API.
+
+Serves POST /v1/chat/completions with recorded responses (see record_replay.py)
+or synthetic CONTRACTOR N: / SCORE: / single-pass JSON responses, with
+configurable latency, streaming speed, truncation and error injection.
+Point the app or the search classes at it with:
+
+    python stub_server.py --port 8765 --latency 1.5 --error-rate 0.05
+    GROK_BASE_URL=http://127.0.0.1:8765/v1 GROK_API_KEY=stub streamlit run app.py
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Tuple
+from record_replay import Recording
+from synthetic_data import (
+    make_search_response, make_structured_response, make_scoring_response,
+    contractors_in_scoring_prompt, requested_count, excluded_names, shard_letters,
+    make_reviews_response, reviews_prompt_name, lazy_reviews_prompt
+)
+
+
+class StubConfig:
+    """
+    Behaviour of the stub server (all values can be changed while it runs)
+    """
+
+    def __init__(self, latency: float = 0.0, stream_delay: float = 0.0, chunk_chars: int = 64, truncate_ratio: float = 1.0,
+                 chars_per_token: int = 4, error_rate: float = 0.0, error_status: int = 500, reviews: int = 5,
+                 seed: int = 0, recording_path: str = None):
+        # Seconds before the first byte of every response
+        self.latency = latency
+        # Seconds between streamed chunks, and characters per chunk
+        self.stream_delay = stream_delay
+        self.chunk_chars = chunk_chars
+        # Fraction of each response to send; anything below 1 ends with finish_reason="length"
+        self.truncate_ratio = truncate_ratio
+        # Responses longer than max_tokens * chars_per_token are cut the same way
+        self.chars_per_token = chars_per_token
+        # Fraction of requests answered with error_status instead of a completion
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Reviews per synthetic contractor and seed for the synthetic data
+        self.reviews = reviews
+        self.seed = seed
+        # Recorded responses are served before falling back to synthetic ones
+        self.recording = Recording(recording_path) if recording_path else None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the stub chat completions endpoint
+    """
+
+    server_version = "GrokStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": {"message": f"Invalid JSON body: {e}", "type": "invalid_request_error"}})
+            return
+
+        config = self.server.config
+        self.server.record_request(request)
+
+        if config.latency:
+            time.sleep(config.latency)
+
+        if self.server.should_fail():
+            self._send_json(config.error_status, {"error": {"message": "Injected stub error", "type": "server_error", "code": config.error_status}})
+            return
+
+        content, finish_reason = self.server.completion_for(request)
+        usage = self.server.usage_for(request, content)
+
+        if request.get("stream"):
+            self._send_stream(request, content, finish_reason, usage)
+        else:
+            self._send_json(200, {
+                "id": self.server.next_id(),
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "grok-4"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason
+                }],
+                "usage": usage
+            })
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request: Dict[str, Any], content: str, finish_reason: str, usage: Dict[str, int]):
+        config = self.server.config
+        completion_id = self.server.next_id()
+        created = int(time.time())
+        model = request.get("model", "grok-4")
+
+        def chunk(delta: Dict[str, Any], finish: str = None, chunk_usage: Dict[str, int] = None, choices: bool = True) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if choices else [],
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            self.wfile.write(chunk({"role": "assistant", "content": ""}))
+            for start in range(0, len(content), config.chunk_chars):
+                if config.stream_delay:
+                    time.sleep(config.stream_delay)
+                self.wfile.write(chunk({"content": content[start:start + config.chunk_chars]}))
+                self.wfile.flush()
+            self.wfile.write(chunk({}, finish_reason))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                self.wfile.write(chunk({}, chunk_usage=usage, choices=False))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early (e.g. it already has max_results contractors)
+            pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded stub server that can run in the background of a benchmark or script:
+
+        with StubServer(StubConfig(latency=0.5)) as stub:
+            os.environ["GROK_BASE_URL"] = stub.base_url
+            ...
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: StubConfig = None, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        super().__init__((host, port), StubHandler)
+        self.config = config or StubConfig()
+        self.verbose = verbose
+        self.requests = []
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._counter = 0
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        """
+        Serve requests on a daemon thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket
+        """
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record_request(self, request: Dict[str, Any]):
+        with self._lock:
+            self.requests.append(request)
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._counter += 1
+            return f"chatcmpl-stub-{self._counter}"
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def completion_for(self, request: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Return (content, finish_reason) for a request: recorded if available, synthetic otherwise
+        """
+        config = self.config
+        entry = config.recording.get(request) if config.recording else None
+        if entry is not None:
+            content, finish_reason = entry["content"], entry["finish_reason"]
+        else:
+            messages = request.get("messages") or []
+            prompt = messages[-1].get("content", "") if messages else ""
+            scoring_contractors = contractors_in_scoring_prompt(prompt)
+            reviews_for = reviews_prompt_name(prompt)
+            # Lazy review searches get contractors without reviews
+            reviews = 0 if lazy_reviews_prompt(prompt) else config.reviews
+            if request.get("response_format"):
+                content = make_structured_response(requested_count(prompt), reviews, config.seed)
+            elif scoring_contractors:
+                content = make_scoring_response(scoring_contractors)
+            elif reviews_for:
+                content = make_reviews_response(reviews_for, config.reviews, config.seed)
+            else:
+                # Continuation and shard prompts restrict which contractors are returned
+                content = make_search_response(requested_count(prompt), reviews, config.seed, excluded_names(prompt), shard_letters(prompt))
+
+            finish_reason = "stop"
+
+        limit = int(len(content) * config.truncate_ratio)
+        if request.get("max_tokens"):
+            limit = min(limit, request["max_tokens"] * config.chars_per_token)
+        if limit < len(content):
+            content, finish_reason = content[:limit], "length"
+        return content, finish_reason
+
+    def usage_for(self, request: Dict[str, Any], content: str) -> Dict[str, int]:
+        """
+        Approximate token usage from character counts
+        """
+        prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages") or [])
+        prompt_tokens = prompt_chars // self.config.chars_per_token
+        completion_tokens = len(content) // self.config.chars_per_token
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub of the xAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", 8765)))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--chunk-chars", type=int, default=64, help="characters per streamed chunk")
+    parser.add_argument("--truncate", type=float, default=1.0, help="fraction of each response to send (finish_reason=length below 1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected errors (e.g. 429, 500, 503)")
+    parser.add_argument("--reviews", type=int, default=5, help="reviews per synthetic contractor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="serve responses from this recording (see record_replay.py) when available")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency=args.latency,
+        stream_delay=args.stream_delay,
+        chunk_chars=args.chunk_chars,
+        truncate_ratio=args.truncate,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reviews=args.reviews,
+        seed=args.seed,
+        recording_path=args.replay
+    )
+    server = StubServer(config, args.host, args.port, verbose=args.verbose)
+    print(f"Stub xAI API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import re
+import json
+import random
+import hashlib
+from typing import List, Dict, Any
+
+FIRST_WORDS = ["Acme", "Summit", "Reliable", "Precision", "Blue Ridge", "Metro", "Hometown", "Allied", "Pioneer", "Evergreen"]
+TRADE_WORDS = ["Plumbing", "Electric", "Roofing", "HVAC", "Builders", "Remodeling", "Drain Pros", "Home Services"]
+SUFFIXES = ["LLC", "Inc", "Co.", "Services", "Group", ""]
+STREETS = ["Main Street", "Oak Avenue", "Maple Drive", "Cedar Lane", "Elm Road", "Park Boulevard"]
+REVIEWERS = ["John S.", "Sarah M.", "Mike D.", "Lisa R.", "David K.", "Emma T.", "Carlos P.", "Priya N."]
+REVIEW_TEXTS = [
+    "Excellent service, very professional and on time",
+    "Good work, arrived on time and cleaned up after",
+    "Outstanding quality and fair pricing, highly recommend",
+    "Friendly crew, quick response and honest quote",
+    "Took longer than expected but the result was solid",
+    "Rude on the phone and the job was late, disappointed",
+]
+
+
+def contractor_name(index: int) -> str:
+    """
+    Deterministic synthetic business name for a contractor index
+    """
+    first = FIRST_WORDS[index % len(FIRST_WORDS)]
+    trade = TRADE_WORDS[(index // len(FIRST_WORDS)) % len(TRADE_WORDS)]
+    suffix = SUFFIXES[index % len(SUFFIXES)]
+    return " ".join(part for part in (first, trade, str(index + 1), suffix) if part)
+
+
+def make_contractor_fields(index: int, reviews: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    Synthetic field values for one contractor (same keys as CONTRACTOR_RESULTS_SCHEMA)
+    """
+    rng = random.Random(seed * 100003 + index)
+    name = contractor_name(index)
+    slug = re.sub(r'[^a-z]+', '', name.lower())[:18]
+    return {
+        "name": name,
+        "phone": f"({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        "email": f"info@{slug}.com",
+        "website": f"https://www.{slug}.com",
+        "address": f"{rng.randint(10, 9999)} {rng.choice(STREETS)}, Springfield, IL",
+        "services": "Repairs, installations, maintenance, emergency service",
+        "rating": f"{rng.uniform(3.5, 5.0):.1f}/5 stars",
+        "description": f"{name} is a family-owned business serving the area for {rng.randint(2, 40)} years.",
+        "license_status": rng.choice(["Active, License #", "Active, License #", "Unknown", "Inactive, License #"]) + str(rng.randint(10000, 99999)),
+        "reviews": [
+            {
+                "reviewer_name": rng.choice(REVIEWERS),
+                "rating": f"{rng.randint(3, 5)}/5",
+                "review_text": rng.choice(REVIEW_TEXTS),
+                "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            }
+            for _ in range(reviews)
+        ],
+    }
+
+
+def matching_indices(count: int, exclude=(), letters=None, limit: int = 10000) -> List[int]:
+    """
+    First count contractor indices whose names are not excluded and, if letters=(first, last)
+    is given, start with a letter in that range (digits count as before "A")
+    """
+    exclude = set(exclude)
+    indices = []
+    for index in range(limit):
+        if len(indices) >= count:
+            break
+        name = contractor_name(index)
+        if name in exclude:
+            continue
+        if letters:
+            initial = name[0].upper()
+            if not ((initial.isdigit() and letters[0] == "A") or letters[0] <= initial <= letters[1]):
+                continue
+        indices.append(index)
+    return indices
+
+
+def make_search_response(count: int, reviews: int = 5, seed: int = 0, exclude=(), letters=None) -> str:
+    """
+    Well-formed CONTRACTOR N: search response in the format the search prompt asks for
+    (exclude and letters restrict the names like continuation and shard prompts do)
+    """
+    blocks = [f"Here are {count} contractors I found:\n"]
+    for number, index in enumerate(matching_indices(count, exclude, letters), 1):
+        fields = make_contractor_fields(index, reviews, seed)
+        lines = [
+            f"CONTRACTOR {number}:",
+            f"Name: {fields['name']}",
+            f"Phone: {fields['phone']}",
+            f"Email: {fields['email']}",
+            f"Website: {fields['website']}",
+            f"Address: {fields['address']}",
+            f"Services: {fields['services']}",
+            f"Rating: {fields['rating']}",
+            f"Description: {fields['description']}",
+            f"License Status: {fields['license_status']}",
+            "Reviews:",
+        ]
+        for review in fields["reviews"]:
+            lines.append(
+                f"- Reviewer: {review['reviewer_name']} | Rating: {review['rating']} | "
+                f"Review: \"{review['review_text']}\" | Date: {review['date']}"
+            )
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+
+def make_reviews_response(name: str, reviews: int = 5, seed: int = 0) -> str:
+    """
+    "- Reviewer: ... |" lines for a single-contractor review prompt (deterministic per name)
+    """
+    rng = random.Random(f"{seed}:{name}")
+    return "\n".join(
+        f"- Reviewer: {rng.choice(REVIEWERS)} | Rating: {rng.randint(3, 5)}/5 | "
+        f"Review: \"{rng.choice(REVIEW_TEXTS)}\" | Date: 2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        for _ in range(reviews)
+    )
+
+
+def make_structured_response(count: int, reviews: int = 5, seed: int = 0) -> str:
+    """
+    Single-pass JSON response matching CONTRACTOR_RESULTS_SCHEMA
+    """
+    contractors = []
+    for index in range(count):
+        fields = make_contractor_fields(index, reviews, seed)
+        fields["quality_score"] = synthetic_score(fields["name"])
+        fields["score_explanation"] = "Synthetic score for offline testing."
+        contractors.append(fields)
+    return json.dumps({"contractors": contractors})
+
+
+def synthetic_score(name: str) -> float:
+    """
+    Deterministic 0-10 score derived from a contractor name
+    """
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return round(4.0 + digest[0] / 255 * 6.0, 1)
+
+
+def make_scoring_response(contractors: List[Dict[str, Any]]) -> str:
+    """
+    CONTRACTOR/ID/SCORE/EXPLANATION response for the contractors in a scoring prompt
+    """
+    blocks = []
+    for position, contractor in enumerate(contractors, 1):
+        name = contractor.get("name", "")
+        blocks.append(
+            f"CONTRACTOR: {name}\n"
+            f"ID: {contractor.get('id', position)}\n"
+            f"SCORE: {synthetic_score(name)}\n"
+            f"EXPLANATION: Synthetic score for offline testing."
+        )
+    return "\n\n".join(blocks)
+
+
+def contractors_in_scoring_prompt(prompt: str) -> List[Dict[str, Any]]:
+    """
+    Extract the contractor JSON list embedded in a scoring prompt
+    """
+    match = re.search(r'Here are the contractors to evaluate:\s*(\[.*\])\s*For each contractor', prompt, re.DOTALL)
+    if not match:
+        return []
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return []
+
+
+def excluded_names(prompt: str) -> List[str]:
+    """
+    Names a continuation prompt says were already provided
+    """
+    match = re.search(r'do NOT include them again:\n((?:- .*\n?)+)', prompt)
+    if not match:
+        return []
+    return [line[2:].strip() for line in match.group(1).splitlines() if line.startswith("- ")]
+
+
+def shard_letters(prompt: str):
+    """
+    (first, last) initial-letter range of a shard prompt, or None
+    """
+    match = re.search(r'starts with a letter from ([A-Z]) to ([A-Z])', prompt)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def reviews_prompt_name(prompt: str) -> str:
+    """
+    Contractor name of a single-contractor review prompt, or ""
+    """
+    match = re.search(r'Find real customer reviews for this .*?:\s*\nName: (.*)', prompt)
+    return match.group(1).strip() if match else ""
+
+
+def lazy_reviews_prompt(prompt: str) -> bool:
+    """
+    True if a search prompt asks for the overall rating only (no individual reviews)
+    """
+    return "Do NOT list individual customer reviews" in prompt
+
+
+def requested_count(prompt: str, default: int = 5) -> int:
+    """
+    Number of contractors a search prompt asks for ("I need to find N ...")
+    """
+    match = re.search(r'I need to find (\d+)', prompt)
+    return int(match.group(1)) if match else default
+
+
+def make_messy_response(count: int, seed: int = 0) -> str:
+    """
+    Free-text response without CONTRACTOR N: headers (exercises the alternative parser)
+    """
+    rng = random.Random(seed)
+    blocks = ["Sure! I searched around and here is what I found:\n"]
+    for index in range(count):
+        fields = make_contractor_fields(index, 0, seed)
+        reviewer = rng.choice(["John S.", "Sarah M.", "Mike D.", "Lisa R."])
+        lines = [
+            fields["name"],
+            f"**Call them at** {fields['phone']} or email {fields['email']}",
+            f"They're located at {rng.randint(10, 9999)} {rng.choice(STREETS)}",
+            f"Check out {fields['website'].replace('https://', '')} for more details.",
+            f"Customers give them {rng.uniform(3.0, 5.0):.1f} out of 5 overall.",
+            rng.choice([
+                f"{reviewer} - {rng.randint(3, 5)}/5 stars - {rng.choice(REVIEW_TEXTS)}",
+                f"{reviewer} ({rng.randint(3, 5)}/5): {rng.choice(REVIEW_TEXTS)}",
+                f"One customer, {reviewer}, said \"{rng.choice(REVIEW_TEXTS)}\" and gave {rng.randint(3, 5)} stars",
+            ]),
+            "",
+        ]
+        blocks.append("\n".join(lines))
+    return "\n".join(blocks)
+
+
+def make_pathological_line(length: int, seed: int = 0) -> str:
+    """
+    One very long line mixing quotes, digits, capitalized words and URL fragments,
+    the kind of input that makes backtracking regexes slow
+    """
+    rng = random.Random(seed)
+    pieces = ["Name: ", "John S. ", "'", "\"", "4.5/5 ", "stars ", "(555) ", "123-4567 ", "www.", "aaaa", "1234 ", "Main St ", " - ", "|", "Review: "]
+    parts = []
+    size = 0
+    while size < length:
+        piece = rng.choice(pieces)
+        parts.append(piece)
+        size += len(piece)
+    return "".join(parts)[:length]
+
+
+def make_website_samples(count: int, seed: int = 0) -> List[str]:
+    """
+    Mix of legitimate, suspicious, bare and very long website values
+    """
+    rng = random.Random(seed)
+    samples = []
+    for index in range(count):
+        slug = re.sub(r'[^a-z]+', '', contractor_name(index).lower())[:18]
+        samples.append(rng.choice([
+            f"https://www.{slug}.com",
+            f"www.{slug}.net",
+            f"{slug}.org/contact",
+            f"http://{slug}.biz",
+            f"https://{rng.randint(1, 255)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 255)}/login",
+            f"https://bit.ly/{slug[:6]}",
+            f"https://ab{rng.randint(100, 99999)}.xyz",
+            "https://" + "".join(rng.choice("abcdef0123456789") for _ in range(40)) + ".com",
+            "",
+        ]))
+    return samples
@@ -0,0 +1,115 @@
+import re
+from urllib.parse import urlparse
+from metrics import timed_stage
+
+# Common phishing indicators, combined into one pattern (a match on any of them flags the domain)
+SUSPICIOUS_DOMAIN_PATTERN = re.compile('|'.join('(?:%s)' % pattern for pattern in [
+    r'[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}',  # IP addresses
+    r'bit\.ly|tinyurl|goo\.gl|t\.co',  # URL shorteners
+    r'[a-z0-9]{20,}',  # Very long random domains
+    r'[a-z]{1,2}[0-9]{3,}',  # Short random domains
+    r'[0-9]{3,}[a-z]{1,2}',  # Number-heavy domains
+    r'[a-z]{1,2}\.[a-z]{1,2}\.[a-z]{1,2}',  # Very short subdomains
+    r'[a-z0-9]{8,}-[a-z0-9]{8,}',  # Random hash-like domains
+]))
+
+# Legitimate business indicators
+LEGITIMATE_DOMAIN_PATTERN = re.compile('|'.join('(?:%s)' % pattern for pattern in [
+    r'\.com$', r'\.org$', r'\.net$', r'\.biz$', r'\.co$',
+    r'[a-z]{3,}\.[a-z]{2,}',  # Normal business domains
+]))
+
+EMAIL_PATTERN = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w{2,}$")
+# Accepts (123) 456-7890, 123-456-7890, 1234567890, +1 123 456 7890, etc.
+PHONE_PATTERN = re.compile(r"^(\+\d{1,3}[- ]?)?(\(?\d{3}\)?[- ]?)?\d{3}[- ]?\d{4}$")
+
+# Website validation functions
+def is_suspicious_domain(url):
+    """Check for suspicious domain patterns that indicate phishing/scam sites"""
+    if not url:
+        return True
+    
+    try:
+        parsed = urlparse(url)
+        domain = parsed.netloc.lower()
+        
+        if SUSPICIOUS_DOMAIN_PATTERN.search(domain):
+            return True
+        
+        # Check for legitimate business indicators
+        return LEGITIMATE_DOMAIN_PATTERN.search(domain) is None
+        
+    except Exception:
+        return True
+
+def validate_website_safety(url):
+    """Comprehensive website safety validation"""
+    if not url:
+        return False, "No URL provided"
+    
+    # Basic URL format check
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    try:
+        parsed = urlparse(url)
+        
+        # Check for suspicious domain
+        if is_suspicious_domain(url):
+            return False, "Suspicious domain pattern detected"
+        
+        # Check for HTTPS (security requirement)
+        if not url.startswith('https://'):
+            return False, "Website must use HTTPS for security"
+        
+        # Additional checks can be added here:
+        # - SSL certificate validation
+        # - Domain age check
+        # - Reputation check
+        # - Content analysis
+        
+        return True, "Website appears safe"
+        
+    except Exception as e:
+        return False, f"URL validation error: {str(e)}"
+
+@timed_stage("url_validation")
+def clean_website_url(url):
+    """Clean and validate website URL, return None if unsafe"""
+    if not url or not url.strip():
+        return None
+    
+    # Remove whitespace and common prefixes
+    url = url.strip()
+    if url.startswith('www.'):
+        url = 'https://' + url
+    elif not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    # Validate safety
+    is_safe, reason = validate_website_safety(url)
+    if not is_safe:
+        print(f"Unsafe website detected: {url} - Reason: {reason}")
+        return None
+    
+    return url
+
+# Contact validation functions
+def is_valid_email(email):
+    if not email:
+        return False
+    return EMAIL_PATTERN.match(email) is not None
+
+def is_valid_website(url):
+    if not url:
+        return False
+    try:
+        result = urlparse(url)
+        return all([result.scheme in ("http", "https"), result.netloc])
+    except Exception:
+        return False
+
+def is_valid_phone(phone):
+    if not phone:
+        return False
+    return PHONE_PATTERN.match(phone) is not None